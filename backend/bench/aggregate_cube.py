@@ -0,0 +1,87 @@
+"""
+Aggregations behind the dataviz plots and /network-analysis: pandas groupbys over the row-level frame
+vs. rollups of the snapshot's aggregate cube, at multiples of the NAICS row count; plus what the cube
+costs to build, and how close its sketched quantiles come to the exact ones.
+
+    uv run python -m bench.aggregate_cube [--scale 1 10 100] [--repeat 20]
+"""
+
+import argparse, time
+
+import pandas as pd
+
+from core.cube import AggregateCube, records_measure_frame
+from core.naics import NAICSProcessor
+
+
+def _frame_aggregates(df: pd.DataFrame):
+    """The row-level groupbys the plots and the network analysis ran before the cube."""
+    defense = df[df["defense_related"]]
+    scores = ("defense_score", "mean")
+    df.pivot_table(values="defense_score", index="sector", columns="level", aggfunc="mean", fill_value=0)
+    df.groupby(["level", "defense_related"]).size()
+    defense.groupby("sector").agg(naics_code=("naics_code", "count"), defense_score=scores)
+    defense.groupby("score_bucket").agg(
+        naics_code=("naics_code", "count"),
+        cross_ref_count=("cross_ref_count", "mean"),
+    )
+    df.groupby("sector").agg(
+        defense_related=("defense_related", "sum"),
+        naics_code=("naics_code", "count"),
+        defense_score=scores,
+    )
+    df.groupby("level").agg(cross_ref_count=("cross_ref_count", "mean"), defense_score=scores)
+    df.groupby("sector").agg({"cross_ref_count": ["mean", "sum", "count"], "defense_related": "sum"})
+    defense.groupby("sector").agg({"naics_code": "count", "cross_ref_count": "mean"})
+
+
+def _cube_aggregates(cube: AggregateCube):
+    """The same answers from the cube."""
+    cube.rollup(["sector", "level"])["defense_score_mean"].unstack("level", fill_value=0)
+    cube.rollup(["level", "defense_related"])
+    cube.rollup(["sector"], where={"defense_related": True})
+    cube.rollup(["score_bucket"], where={"defense_related": True})
+    cube.rollup(["sector"])
+    cube.rollup(["level"])
+    cube.rollup()
+
+
+def _timed(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    snapshot = NAICSProcessor().load_snapshot()
+    if snapshot is None:
+        raise SystemExit("No snapshot; run the pipeline first.")
+    base = records_measure_frame(snapshot.records)
+
+    print(f"\n{'rows':>9} {'cells':>6} {'build s':>8} {'groupbys ms':>12} {'cube ms':>8} {'speedup':>8}")
+    for scale in args.scale:
+        df = pd.concat([base] * scale, ignore_index=True)
+        t0 = time.perf_counter()
+        cube = AggregateCube.build(df)
+        build = time.perf_counter() - t0
+        frame_s = _timed(lambda: _frame_aggregates(df), args.repeat)
+        cube_s = _timed(lambda: _cube_aggregates(cube), args.repeat)
+        row = f"{len(df):>9,} {len(cube):>6} {build:>8.3f}"
+        print(f"{row} {frame_s * 1e3:>12.2f} {cube_s * 1e3:>8.2f} {frame_s / cube_s:>7.1f}x")
+
+    cube = AggregateCube.build(base)
+    print(f"\n{'quantile':<26} {'exact':>8} {'sketch':>8}")
+    for measure in ("defense_score", "cross_ref_count"):
+        for q in (0.5, 0.9):
+            exact, sketch = base[measure].quantile(q), cube.quantile(measure, q)
+            print(f"{f'{measure} p{round(q * 100)}':<26} {exact:>8.3f} {sketch:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
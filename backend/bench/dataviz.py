@@ -0,0 +1,58 @@
+"""
+Rendering every dataviz plot: cold (empty image cache) inline vs. in a process pool, then warm
+(served from the on-disk cache), on the resident snapshot; then each plot alone, as
+`/dataviz/{plot_name}` renders it: its own aggregates, full resolution and thumbnail. Uses a
+scratch cache directory.
+
+    uv run python -m bench.dataviz [--workers 1 4] [--format png]
+"""
+
+from pathlib import Path
+import argparse, tempfile, time
+
+from core.dataviz import PLOTS, THUMBNAIL_DPI, DatavizRenderer, render_plot, snapshot_frame
+from core.naics import NAICSProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--format", choices=["png", "svg", "webp"], default="png")
+    args = parser.parse_args()
+
+    snapshot = NAICSProcessor().load_snapshot()
+    if snapshot is None:
+        raise SystemExit("No snapshot; run the pipeline first.")
+    df, frame_key = snapshot_frame(snapshot)
+
+    print(f"\n{'mode':<24} {'seconds':>9} {'bytes':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            renderer = DatavizRenderer(Path(tmp) / f"workers-{workers}", workers=workers)
+            t0 = time.perf_counter()
+            images = renderer.render(df, frame_key=frame_key)
+            cold = time.perf_counter() - t0
+            size = sum(len(image) for image in images.values())
+            print(f"{f'cold, workers={workers}':<24} {cold:>9.3f} {size:>12,}")
+            for name, stat in renderer.stats.items():
+                print(f"{'  ' + name:<24} {stat['seconds']:>9.3f}")
+
+        t0 = time.perf_counter()
+        renderer.render(df, frame_key=frame_key)
+        print(f"{'warm (disk cache)':<24} {time.perf_counter() - t0:>9.4f}")
+
+    print(f"\n{'plot':<22} {'prepare s':>9} {'full s':>8} {'full bytes':>12} {'thumb s':>8} {'thumb bytes':>12}")
+    for name, spec in PLOTS.items():
+        t0 = time.perf_counter()
+        data = spec.prepare(df, snapshot.cube)
+        prepare = time.perf_counter() - t0
+        row = f"{name:<22} {prepare:>9.3f}"
+        for dpi in (300, THUMBNAIL_DPI):
+            t0 = time.perf_counter()
+            image = render_plot(name, data, args.format, dpi)
+            row += f" {time.perf_counter() - t0:>8.3f} {len(image):>12,}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
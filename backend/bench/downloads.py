@@ -0,0 +1,93 @@
+"""
+Source downloads against a local HTTP stand-in for census.gov/sba.gov serving the bundled workbooks
+(with ETag/Last-Modified support and optional injected 503s): a cold fetch, a conditional refresh
+that should cost only 304s, and a refresh after one source changed.
+
+    uv run python -m bench.downloads [--fail-first 1] [--concurrency 4]
+"""
+
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote
+import argparse, hashlib, tempfile, threading, time
+
+from core.downloads import SourceDownloader
+from core.naics import NAICSProcessor
+
+
+def _handler(root: Path, fail_first: int):
+    failures: dict = {}
+
+    class StandIn(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = root / unquote(self.path.lstrip("/"))
+            if not path.is_file():
+                return self.send_error(404)
+            failures[path] = failures.get(path, 0) + 1
+            if failures[path] <= fail_first:
+                return self.send_error(503)
+
+            body = path.read_bytes()
+            etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            mtime = int(path.stat().st_mtime)
+            since = self.headers.get("If-Modified-Since")
+            unchanged_since = since is not None and parsedate_to_datetime(since).timestamp() >= mtime
+            if self.headers.get("If-None-Match", etag if unchanged_since else None) == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return StandIn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fail-first", type=int, default=1, help="503s served per file before succeeding")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    processor = NAICSProcessor()
+    with tempfile.TemporaryDirectory() as served, tempfile.TemporaryDirectory() as target:
+        served, target = Path(served), Path(target)
+        for info in processor.files.values():
+            (served / info["filename"]).write_bytes((processor.data_dir / info["filename"]).read_bytes())
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(served, args.fail_first))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        sources = {
+            name: (f"{base}/{quote(info['filename'])}", target / info["filename"])
+            for name, info in processor.files.items()
+        }
+        downloader = SourceDownloader(max_concurrency=args.concurrency, backoff=0.05)
+
+        changed = served / processor.files["sba_size_standards"]["filename"]
+        rounds = [("cold", None), ("refresh, unchanged", None), ("refresh, one changed", changed)]
+        print(f"{'round':<22} {'wall s':>7} {'bytes':>12} {'statuses'}")
+        for label, touch in rounds:
+            if touch is not None:
+                touch.write_bytes(touch.read_bytes() + b"\0")
+            start = time.perf_counter()
+            report = downloader.download(sources)
+            wall = time.perf_counter() - start
+            statuses = {}
+            for r in report.values():
+                statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+            total = sum(r["bytes"] for r in report.values())
+            attempts = max(r["attempts"] for r in report.values())
+            print(f"{label:<22} {wall:>7.3f} {total:>12,} {statuses} (max attempts {attempts})")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
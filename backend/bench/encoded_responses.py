@@ -0,0 +1,72 @@
+"""
+Bytes on the wire and server CPU per request for the static-per-generation endpoints: serialized
+per request with the stdlib encoder (`JSONResponse`, the previous behaviour, mounted here on a
+side app over the same snapshot) vs. precomputed orjson bodies with gzip/brotli variants.
+
+CPU is `time.process_time()` over `--requests` in-process requests, so it includes the test
+client's own share equally for both sides (and, for gzip/br rows, its decompression).
+
+    uv run python -m bench.encoded_responses [--requests 50]
+"""
+
+import argparse, time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from core import naics
+from main import app
+
+PATHS = ["/stats", "/network-analysis", "/naics/codes", "/export/json", "/naics/data"]
+
+
+def _legacy_app(snapshot) -> FastAPI:
+    """The pre-encoding handlers: build the same content and let `JSONResponse` serialize it each time."""
+    app = FastAPI()
+    payloads = {
+        "/stats": lambda: snapshot.stats,
+        "/network-analysis": lambda: snapshot.lookups["relationship_analysis"],
+        "/naics/codes": lambda: {"codes": snapshot.codes.to_list(), "count": len(snapshot.codes)},
+        "/export/json": snapshot.export_lookups,
+        "/naics/data": lambda: naics.NAICSResponse(
+            success=True, message="NAICS data retrieved", data=snapshot.payload()
+        ).model_dump(),
+    }
+    for path, build in payloads.items():
+        app.add_api_route(path, lambda build=build: JSONResponse(content=build()), methods=["GET"])
+    return app
+
+
+def _measure(client: TestClient, path: str, accept_encoding: str, requests: int) -> tuple[int, float]:
+    """(bytes on the wire, CPU ms per request); the first request (which builds the body) is excluded."""
+    headers = {"Accept-Encoding": accept_encoding}
+    size = int(client.get(path, headers=headers).headers["content-length"])  # compressed size, if any
+    start = time.process_time()
+    for _ in range(requests):
+        client.get(path, headers=headers)
+    return size, (time.process_time() - start) / requests * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        snapshot = naics.get_processor().get_snapshot()
+        if snapshot is None:
+            raise SystemExit("No snapshot; run the pipeline first.")
+        legacy = TestClient(_legacy_app(snapshot))
+
+        print(f"\n{'endpoint':<18} {'mode':<22} {'bytes':>10} {'cpu ms/req':>11}")
+        for path in PATHS:
+            rows = [("stdlib per request", *_measure(legacy, path, "identity", args.requests))]
+            for coding in ("identity", "gzip", "br"):
+                rows.append((f"pre-encoded {coding}", *_measure(client, path, coding, args.requests)))
+            for mode, size, cpu in rows:
+                print(f"{path:<18} {mode:<22} {size:>10,} {cpu:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
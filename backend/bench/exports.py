@@ -0,0 +1,74 @@
+"""
+Export time, size and peak Python memory (tracemalloc) for the previous whole-document CSV build
+vs. the batched streamers, at multiples of the NAICS row count. Streamed chunks are discarded as
+they're produced, as a socket write would, so the peak is what one batch costs.
+
+    uv run python -m bench.exports [--scale 1 10] [--chunk-rows 2000]
+"""
+
+import argparse, io, time, tracemalloc
+
+import pandas as pd
+import pyarrow as pa
+
+from core.exports import STREAMERS, export_columns, gzip_stream
+from core.naics import NAICSProcessor
+
+
+def _legacy_csv(records: pa.Table) -> bytes:
+    """The pre-streaming export: every row as a dict, one DataFrame, one StringIO."""
+    rows = []
+    for record in records.to_pylist():
+        related_codes = record.get("related_codes") or []
+        rows.append({
+            "naics_code": record["code"],
+            "description": record.get("description") or "",
+            "sector": record.get("sector") or "",
+            "level": len(record["code"]),
+            "defense_related": bool(record.get("defense_related")),
+            "cross_reference_count": len(related_codes),
+            "related_codes": "|".join(related_codes),
+        })
+    buffer = io.StringIO()
+    pd.DataFrame(rows).to_csv(buffer, index=False)
+    return buffer.getvalue().encode()
+
+
+def _profile(produce) -> tuple[float, int, float]:
+    """(seconds, bytes produced, peak MiB) for a callable returning bytes or an iterator of chunks."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = produce()
+    size = len(result) if isinstance(result, bytes) else sum(len(chunk) for chunk in result)
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, size, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--chunk-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    snapshot = NAICSProcessor().load_snapshot()
+    if snapshot is None:
+        raise SystemExit("No snapshot; run the pipeline first.")
+
+    print(f"\n{'rows':>9} {'export':<22} {'seconds':>8} {'bytes':>13} {'peak MiB':>9}")
+    for scale in args.scale:
+        records = pa.concat_tables([snapshot.records] * scale).combine_chunks()
+        runs = {"csv (whole document)": lambda: _legacy_csv(records)}
+        for format, stream in STREAMERS.items():
+            columns = export_columns(format, records)
+            runs[f"{format} (streamed)"] = lambda s=stream, c=columns: s(records, c, args.chunk_rows)
+        columns = export_columns("csv", records)
+        runs["csv.gz (streamed)"] = lambda: gzip_stream(STREAMERS["csv"](records, columns, args.chunk_rows))
+        for name, produce in runs.items():
+            seconds, size, peak = _profile(produce)
+            print(f"{records.num_rows:>9,} {name:<22} {seconds:>8.3f} {size:>13,} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Latency of trigram fuzzy search over the full resident NAICS code set.
+
+    uv run python -m bench.fuzzy_search [--repeat 500] [--limit 10]
+"""
+
+from statistics import quantiles
+import argparse, time
+
+from core.naics import NAICSProcessor
+from core.search import fuzzy_search, tokenize
+
+QUERIES = [
+    "cyber secuirty",
+    "guided misile",
+    "sofware publishrs",
+    "aircrft manufacturing",
+    "computer systm design",
+    "securty guards",
+    "engneering servces",
+    "ammunitoin",
+    "satelite telecomunications",
+    "reserch and developmnt",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    snapshot = NAICSProcessor().load_snapshot()
+    if snapshot is None:
+        raise SystemExit("No NAICS cache found; run the pipeline first.")
+    print(f"snapshot load + index build: {(time.perf_counter() - start) * 1e3:.0f} ms, {len(snapshot.codes)} codes")
+
+    description_index = snapshot.fuzzy_fields["description"][0]
+    vocab = len(description_index.words)
+    print(f"\n{'query':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'words kept':>12} {'top hit'}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            results = fuzzy_search(snapshot.fuzzy_fields, query, limit=args.limit, threshold=args.threshold)
+            timings.append((time.perf_counter() - t0) * 1e3)
+        p = quantiles(timings, n=100)
+
+        # count-filter effectiveness: vocabulary words surviving pruning vs. the full vocabulary
+        kept = sum(
+            description_index.words.candidates(token, description_index.word_threshold)[0].size
+            for token in tokenize(query)
+        )
+        top = snapshot.codes[results[0][0]]["title"][:40] if results else "-"
+        print(f"{query:<28} {p[49]:>8.3f} {p[94]:>8.3f} {p[98]:>8.3f} {f'{kept}/{vocab}':>12} {top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Defense keyword scoring: the old per-row loop of `k in text` substring checks vs. `KeywordScorer`
+with a plain and with a trie-factored regex alternation (the same whole-word matches), on the NAICS
+descriptions repeated `--scale` times and on taxonomies padded with synthetic keywords to show how each
+grows with keyword count. The substring loop does less (no word boundaries, plurals, weights or
+categories), so it is a floor rather than an equivalent; `TRIE_MIN_KEYWORDS` comes from the other two.
+
+    uv run python -m bench.keyword_scoring [--scale 1 10] [--keywords 2 4 8 35 500 5000] [--repeat 3]
+"""
+
+from statistics import median
+import argparse, random, string, time
+
+import pandas as pd
+
+from core.keywords import DEFENSE_TAXONOMY, KeywordScorer
+from core.naics import NAICSProcessor
+
+
+def _timed(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return median(timings)
+
+
+def _padded_taxonomy(size: int, rng: random.Random) -> dict:
+    """The defense taxonomy cut or padded (with random lowercase words) to `size` keywords in total."""
+    flat = [(category, keyword, weight) for category, keywords in DEFENSE_TAXONOMY.items()
+            for keyword, weight in keywords.items()]
+    taxonomy: dict = {}
+    for category, keyword, weight in flat[:size]:
+        taxonomy.setdefault(category, {})[keyword] = weight
+    existing = {keyword for keywords in taxonomy.values() for keyword in keywords}
+    extra = taxonomy.setdefault("synthetic", {})
+    while len(existing) < size:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+        if word not in existing:
+            existing.add(word)
+            extra[word] = 0.5
+    return taxonomy
+
+
+def _legacy(texts: pd.Series, keywords: list) -> pd.Series:
+    desc_lower = texts.fillna("").str.lower()
+    return desc_lower.apply(lambda txt: sum(k in txt for k in keywords))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--keywords", type=int, nargs="+", default=[2, 4, 8, 35, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = NAICSProcessor()
+    manifest = processor.store.read_manifest()
+    if manifest is None:
+        raise SystemExit("No snapshot found; run the pipeline first.")
+    _, records = processor.store.load(manifest)
+    descriptions = pd.Series(records.column("description").to_pylist())
+
+    rng = random.Random(0)
+    header = f"{'rows':>8} {'keywords':>9} {'legacy s':>9} {'plain s':>9} {'trie s':>9}"
+    print(f"{header} {'trie/plain':>11} {'compile ms':>11}")
+    for scale in args.scale:
+        texts = pd.concat([descriptions] * scale, ignore_index=True)
+        for size in args.keywords:
+            taxonomy = _padded_taxonomy(size, rng)
+            keywords = [keyword for category in taxonomy.values() for keyword in category]
+            t0 = time.perf_counter()
+            trie = KeywordScorer(taxonomy, trie=True)
+            compile_ms = (time.perf_counter() - t0) * 1e3
+            plain = KeywordScorer(taxonomy, trie=False)
+            legacy = _timed(lambda: _legacy(texts, keywords), args.repeat)
+            plain_s = _timed(lambda: plain.score(texts), args.repeat)
+            trie_s = _timed(lambda: trie.score(texts), args.repeat)
+            print(
+                f"{len(texts):>8,} {len(keywords):>9,} {legacy:>9.3f} {plain_s:>9.3f} {trie_s:>9.3f} "
+                f"{plain_s / trie_s:>10.2f}x {compile_ms:>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
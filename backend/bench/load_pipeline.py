@@ -0,0 +1,59 @@
+"""
+End-to-end `process_and_cache` time with source workbooks parsed serially vs. in a process pool,
+on a scratch copy of the bundled workbooks (the real data dir and snapshot are left untouched).
+Every cold run starts from empty stage memos; the warm row reuses the last run's memos.
+
+    uv run python -m bench.load_pipeline [--workers 1 5] [--repeat 3]
+"""
+
+from pathlib import Path
+from statistics import median
+import argparse, shutil, tempfile, time
+
+from core.naics import NAICSProcessor
+
+
+def _scratch_processor(source: NAICSProcessor, root: Path) -> NAICSProcessor:
+    for meta in source.files.values():
+        shutil.copy2(source.data_dir / meta["filename"], root / meta["filename"])
+    processor = NAICSProcessor(root)
+    # time processing only; source revalidation is covered by bench.downloads
+    processor.download_files = lambda: {name: True for name in processor.files}
+    return processor
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = _scratch_processor(NAICSProcessor(), Path(tmp))
+        for workers in args.workers:
+            processor.load_workers = workers
+            sources, pipeline = [], []
+            for i in range(args.repeat):
+                processor.pipeline_dir = Path(tmp) / f"pipeline-{workers}-{i}"
+                sources.append(_timed(processor.load_naics_data))
+                processor.pipeline_dir = Path(tmp) / f"pipeline-{workers}-{i}-e2e"
+                pipeline.append(_timed(processor.process_and_cache))
+            rows.append((f"cold, workers={workers}", median(sources), median(pipeline)))
+        # last run's memos are populated now
+        warm = _timed(processor.load_naics_data)
+        rows.append(("warm stage memos", warm, _timed(processor.process_and_cache)))
+
+    print(f"\n{'mode':<24} {'load_naics_data s':>18} {'pipeline s':>11}")
+    for mode, sources, pipeline in rows:
+        print(f"{mode:<24} {sources:>18.3f} {pipeline:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
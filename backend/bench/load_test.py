@@ -0,0 +1,245 @@
+"""
+Concurrent load on the API with a mixed request profile over /naics/codes, /naics/codes/{code},
+/search-naics, /relationships/{code} and /export/{format}. Each concurrency level runs for `--seconds`
+(after `--warmup`) with that many clients issuing requests back to back; reports throughput, errors and
+p50/p95/p99/max latency per route from log-bucketed (HDR-style) histograms.
+
+By default the app is driven in-process through its ASGI interface (no sockets, no lifespan); with
+`--uvicorn` it is served by a local uvicorn worker process instead, and `--url` targets a server that
+is already running. Both local modes serve a snapshot built from synthetic workbooks (bench.synthetic)
+in a scratch dir, so no census downloads are needed and the real data dir is left untouched.
+
+    uv run python -m bench.load_test [--concurrency 1 8 32] [--seconds 10] [--scale 1] [--uvicorn | --url URL]
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse, asyncio, bisect, math, random, socket, subprocess, sys, tempfile, time
+
+import httpx
+
+from bench.synthetic import NOUNS, VERBS, DEFENSE_WORDS, write_workbooks
+
+# route -> share of requests; roughly a browsing session: lookups and searches, some paging, rare exports
+MIX = {
+    "/naics/codes/{code}": 35,
+    "/naics/codes": 20,
+    "/search-naics": 20,
+    "/relationships/{code}": 20,
+    "/export/{format}": 5,
+}
+EXPORT_FORMATS = ("csv", "json", "parquet", "arrow")
+
+
+class LatencyHistogram:
+    """
+    Latencies in log-spaced buckets, 1% wide from 10us to 100s (HDR-style: constant relative error,
+    fixed memory, mergeable), plus the exact count, sum and max.
+    """
+
+    EDGES = [1e-5 * 1.01**i for i in range(math.ceil(math.log(1e7) / math.log(1.01)) + 1)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(self.EDGES, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the `q`-quantile (never above the observed max)."""
+        if not self.count:
+            return math.nan
+        target, seen = math.ceil(q * self.count), 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= max(target, 1):
+                return min(self.EDGES[min(i, len(self.EDGES) - 1)], self.max)
+        return self.max
+
+
+class RequestMix:
+    """Weighted random requests across `MIX`, with codes and search terms drawn from the served snapshot."""
+
+    def __init__(self, codes: List[str], sectors: List[str], seed: int = 0):
+        self.rng = random.Random(seed)
+        self.codes, self.sectors = codes, sectors
+        self.terms = NOUNS + VERBS + DEFENSE_WORDS
+        self.routes, self.weights = list(MIX), list(MIX.values())
+
+    def next(self) -> tuple[str, str, str, Dict]:
+        """(route, method, path, query params)"""
+        rng = self.rng
+        route = rng.choices(self.routes, self.weights)[0]
+        if route == "/naics/codes/{code}":
+            return route, "GET", f"/naics/codes/{rng.choice(self.codes)}", {}
+        if route == "/naics/codes":
+            params = {"limit": rng.choice((50, 100, 500))}
+            if rng.random() < 0.4:
+                params["sector"] = rng.choice(self.sectors)
+            if rng.random() < 0.2:
+                params["defense_only"] = "true"
+            return route, "GET", "/naics/codes", params
+        if route == "/search-naics":
+            return route, "POST", "/search-naics", {"term": rng.choice(self.terms)}
+        if route == "/relationships/{code}":
+            return route, "GET", f"/relationships/{rng.choice(self.codes)}", {}
+        return route, "GET", f"/export/{rng.choice(EXPORT_FORMATS)}", {}
+
+
+async def _client_loop(client: httpx.AsyncClient, mix: RequestMix, until: float, warm_until: float, stats: Dict):
+    while (start := time.perf_counter()) < until:
+        route, method, path, params = mix.next()
+        try:
+            response = await client.request(method, path, params=params)
+            await response.aread()
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        if start < warm_until:
+            continue
+        histogram, errors = stats.setdefault(route, (LatencyHistogram(), [0]))
+        histogram.record(time.perf_counter() - start)
+        errors[0] += failed
+
+
+async def run_level(client: httpx.AsyncClient, mix: RequestMix, concurrency: int, seconds: float, warmup: float):
+    """Per-route `(histogram, [errors])` of `concurrency` clients over `seconds` after `warmup`."""
+    stats: Dict[str, tuple] = {}
+    warm_until = time.perf_counter() + warmup
+    until = warm_until + seconds
+    await asyncio.gather(*(_client_loop(client, mix, until, warm_until, stats) for _ in range(concurrency)))
+    return stats
+
+
+def _report(concurrency: int, seconds: float, stats: Dict):
+    overall = LatencyHistogram()
+    print(f"\nconcurrency {concurrency}")
+    header = f"{'route':<24} {'requests':>8} {'req/s':>8} {'errors':>7}"
+    print(f"{header} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = [(route, *stats[route]) for route in MIX if route in stats]
+    for route, histogram, errors in rows + [("all", overall, [sum(e[0] for _, _, e in rows)])]:
+        if route != "all":
+            overall.merge(histogram)
+        ms = [histogram.percentile(q) * 1e3 for q in (0.5, 0.95, 0.99)] + [histogram.max * 1e3]
+        line = f"{route:<24} {histogram.count:>8} {histogram.count / seconds:>8.1f} {errors[0]:>7}"
+        print(f"{line} {ms[0]:>8.2f} {ms[1]:>8.2f} {ms[2]:>8.2f} {ms[3]:>8.2f}")
+
+
+def seed_snapshot(root: Path, scale: float, seed: int):
+    """A resident snapshot built from synthetic workbooks in `root`, installed as the app's processor."""
+    from core import naics
+
+    write_workbooks(root, scale, seed)
+    processor = naics.NAICSProcessor(root)
+    processor.process_and_cache(download=False)
+    naics._processor = processor
+    return processor.get_snapshot()
+
+
+def serve(root: Path, scale: float, seed: int, port: int):
+    """`--serve` entry point: the app on a synthetic snapshot under uvicorn, without the refresh scheduler."""
+    import uvicorn
+    from main import app
+
+    seed_snapshot(root, scale, seed)
+    uvicorn.run(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning", access_log=False)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 300):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"uvicorn exited with {process.returncode}")
+            try:
+                if (await client.get("/naics/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise SystemExit(f"uvicorn not ready after {timeout}s")
+
+
+async def _served_codes(client: httpx.AsyncClient) -> tuple[List[str], List[str]]:
+    """Every code the target serves (paged through /naics/codes), and their sectors."""
+    codes, sectors, params = [], set(), {"limit": 5000}
+    while True:
+        page = (await client.get("/naics/codes", params=params)).raise_for_status().json()
+        codes += [record["code"] for record in page["codes"]]
+        sectors.update(record["sector"] for record in page["codes"] if record.get("sector"))
+        if not page["next_cursor"]:
+            return codes, sorted(sectors)
+        params["cursor"] = page["next_cursor"]
+
+
+async def _run(args, root: Path):
+    process: Optional[subprocess.Popen] = None
+    if args.url:
+        transport, base_url = None, args.url
+    elif args.uvicorn:
+        port = _free_port()
+        command = [sys.executable, "-m", "bench.load_test", "--serve", str(root), "--port", str(port)]
+        process = subprocess.Popen(command + ["--scale", str(args.scale), "--seed", str(args.seed)])
+        transport, base_url = None, f"http://127.0.0.1:{port}"
+        await _wait_until_up(base_url, process)
+    else:
+        from main import app
+
+        seed_snapshot(root, args.scale, args.seed)
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+            codes, sectors = await _served_codes(client)
+            print(f"Target {base_url}: {len(codes):,} codes in {len(sectors)} sectors")
+            for concurrency in args.concurrency:
+                mix = RequestMix(codes, sectors, args.seed)
+                stats = await run_level(client, mix, concurrency, args.seconds, args.warmup)
+                _report(concurrency, args.seconds, stats)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--scale", type=float, default=1, help="synthetic snapshot size, in real row counts")
+    parser.add_argument("--seed", type=int, default=0)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--uvicorn", action="store_true", help="serve the app from a local uvicorn process")
+    target.add_argument("--url", help="load an already running server instead")
+    parser.add_argument("--serve", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve, args.scale, args.seed, args.port)
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_run(args, Path(tmp)))
+
+
+if __name__ == "__main__":
+    main()
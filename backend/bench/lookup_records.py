@@ -0,0 +1,67 @@
+"""
+Building the lookup records from the merged frame: the old `iterrows` + recursive `_to_native_py`
+path vs. the columnar builder (`core.records`), at multiples of the NAICS row count. Per-row cost
+should stay flat as rows grow, i.e. both paths scale linearly and the gap is the constant factor.
+
+    uv run python -m bench.lookup_records [--scale 1 10 100] [--repeat 3]
+"""
+
+from statistics import median
+import argparse, time
+
+import pandas as pd
+import pyarrow as pa
+
+from core.naics import NAICSProcessor
+from core.records import native_columns, records_from_columns, table_from_columns
+
+
+def _timed(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return median(timings)
+
+
+def _legacy_records(processor: NAICSProcessor, df: pd.DataFrame) -> list:
+    """The pre-columnar builder: one Series per row, then a recursive walk over every value."""
+    fields = processor.RECORD_FIELDS
+    records = [
+        {name: row.get(column, default) for name, (column, default) in fields.items()} for _, row in df.iterrows()
+    ]
+    return processor._to_native_py(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = NAICSProcessor()
+    base = processor.load_naics_data()
+    fields = processor.RECORD_FIELDS
+
+    columnar = records_from_columns(native_columns(base, fields))
+    assert columnar == _legacy_records(processor, base), "columnar records differ from the legacy builder"
+
+    print(f"\n{'rows':>9} {'path':<28} {'seconds':>9} {'us/row':>8}")
+    for scale in args.scale:
+        df = pd.concat([base] * scale, ignore_index=True)
+        rows = len(df)
+        timings = {
+            "legacy iterrows + walk": _timed(lambda: _legacy_records(processor, df), args.repeat),
+            "columnar records": _timed(lambda: records_from_columns(native_columns(df, fields)), args.repeat),
+            "arrow from_pylist(records)": _timed(
+                lambda: pa.Table.from_pylist(records_from_columns(native_columns(df, fields))), args.repeat
+            ),
+            "arrow from columns": _timed(lambda: table_from_columns(native_columns(df, fields)), args.repeat),
+        }
+        for path, seconds in timings.items():
+            print(f"{rows:>9,} {path:<28} {seconds:>9.3f} {seconds / rows * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
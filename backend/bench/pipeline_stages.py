@@ -0,0 +1,145 @@
+"""
+Per-stage time and peak memory of the NAICS pipeline (loaders, merges, defense analysis, aggregate cube,
+network analysis, lookups) on synthetic census-shaped workbooks (bench.synthetic) at multiples of the
+real row counts. Stages are called directly in pipeline order, each on the previous stages' outputs,
+without memos. Time is the median of `--repeat` runs; peak memory is the tracemalloc peak above what was
+already allocated, traced on one extra run since tracing slows the stage down.
+
+Results go to a JSON file tagged with the commit they were measured at; `--compare` prints the change
+against an earlier file, so runs can be compared across commits. Generated workbooks are kept in
+`--workbooks` and reused by later runs at the same scale.
+
+    uv run python -m bench.pipeline_stages [--scale 1 10 100] [--repeat 3] [--output FILE] [--compare FILE]
+"""
+
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, List
+import argparse, gc, io, json, platform, subprocess, tempfile, time, tracemalloc
+
+import pandas as pd
+
+from bench.synthetic import ensure_workbooks
+from core.naics import NAICSProcessor
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _size(value: Any) -> int:
+    """Rows (frames), records (lookups), cells (cube) or entries of a stage output."""
+    if isinstance(value, dict) and "naics" in value:
+        return len(value["naics"])
+    return len(value) if hasattr(value, "__len__") else 0
+
+
+def _run_stage(fn, args: List[Any], repeat: int) -> tuple[Any, List[float], int]:
+    """Output, wall times of `repeat` runs, and peak traced bytes of one more."""
+    times, quiet = [], io.StringIO()
+    with redirect_stdout(quiet):
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            output = fn(*args)
+            times.append(time.perf_counter() - start)
+            del output
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            output = fn(*args)
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+    return output, times, peak
+
+
+def bench_scale(data_dir: Path, manifest: Dict, repeat: int) -> List[Dict]:
+    """Every pipeline stage on the workbooks in `data_dir`; loaders count their workbook's rows as input."""
+    processor = NAICSProcessor(data_dir)
+    outputs: Dict[str, Any] = {}
+    results = []
+    for stage in processor.build_pipeline().stages.values():
+        args = [outputs[name] for name in stage.inputs]
+        outputs[stage.name], times, peak = _run_stage(stage.fn, args, repeat)
+        results.append({
+            "stage": stage.name,
+            "rows_in": manifest["rows"].get(stage.name.removeprefix("load_"), 0) if not args
+            else max(_size(arg) for arg in args),
+            "rows_out": _size(outputs[stage.name]),
+            "seconds": median(times),
+            "seconds_min": min(times),
+            "peak_mb": peak / 2**20,
+        })
+    return results
+
+
+def _compare(results: List[Dict], base: Dict):
+    previous = {(row["scale"], row["stage"]): row for row in base["results"]}
+    print(f"\nvs. {base['commit'] or '?'}{' (dirty)' if base.get('dirty') else ''} at {base['measured_at']}")
+    print(f"{'scale':>6} {'stage':<24} {'base s':>9} {'now s':>9} {'ratio':>7} {'base MB':>9} {'now MB':>9}")
+    for row in results:
+        old = previous.get((row["scale"], row["stage"]))
+        if old is None:
+            continue
+        ratio = row["seconds"] / old["seconds"] if old["seconds"] else float("nan")
+        line = f"{row['scale']:>5g}x {row['stage']:<24} {old['seconds']:>9.3f} {row['seconds']:>9.3f} {ratio:>6.2f}x"
+        print(f"{line} {old['peak_mb']:>9.1f} {row['peak_mb']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workbooks", type=Path, default=Path(tempfile.gettempdir()) / "synq-synthetic")
+    parser.add_argument("--output", type=Path, help="default: bench/results/pipeline_stages-<commit>.json")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    run = {
+        "benchmark": "pipeline_stages",
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "measured_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "workbooks": {},
+        "results": [],
+    }
+
+    print(f"\n{'scale':>6} {'stage':<24} {'rows in':>9} {'rows out':>9} {'median s':>9} {'min s':>9} {'peak MB':>9}")
+    for scale in args.scale:
+        start = time.perf_counter()
+        data_dir = args.workbooks / f"x{scale:g}-seed{args.seed}"
+        manifest = ensure_workbooks(data_dir, scale, args.seed)
+        run["workbooks"][f"{scale:g}"] = manifest["rows"]
+        print(f"{scale:>5g}x workbooks ready in {time.perf_counter() - start:.1f}s")
+        for row in bench_scale(data_dir, manifest, args.repeat):
+            row = {"scale": scale, **row}
+            run["results"].append(row)
+            line = f"{scale:>5g}x {row['stage']:<24} {row['rows_in']:>9,} {row['rows_out']:>9,}"
+            print(f"{line} {row['seconds']:>9.3f} {row['seconds_min']:>9.3f} {row['peak_mb']:>9.1f}")
+
+    output = args.output or RESULTS_DIR / f"pipeline_stages-{commit or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(run, indent=2))
+    print(f"\nWrote {output}")
+    if args.compare:
+        _compare(run["results"], json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
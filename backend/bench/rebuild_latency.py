@@ -0,0 +1,73 @@
+"""
+Lookup latency (`GET /naics/codes/{code}` through the ASGI app) while the API is idle, while a snapshot
+rebuild runs on a thread inside the API process, and while it runs as a job process (core.jobs).
+Runs on a scratch copy of the bundled workbooks and snapshot; every rebuild starts from empty stage
+memos and skips source revalidation.
+
+    uv run python -m bench.rebuild_latency [--idle-seconds 3]
+"""
+
+from pathlib import Path
+import argparse, shutil, statistics, tempfile, threading, time
+
+from fastapi.testclient import TestClient
+
+from core import jobs, naics
+from main import app
+
+
+def _percentiles(samples: list) -> str:
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1e3
+    return f"{len(samples):>7} {statistics.median(samples) * 1e3:>8.2f} {pick(0.95):>8.2f} {pick(0.99):>8.2f}"
+
+
+def _hammer(client: TestClient, codes: list, running) -> list:
+    latencies, i = [], 0
+    while running():
+        start = time.perf_counter()
+        client.get(f"/naics/codes/{codes[i % len(codes)]}")
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--idle-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = naics.NAICSProcessor()
+        for meta in source.files.values():
+            shutil.copy2(source.data_dir / meta["filename"], root / meta["filename"])
+        shutil.copytree(source.data_dir / "snapshot", root / "snapshot")
+        naics._processor = processor = naics.NAICSProcessor(root)
+        jobs._runner = jobs.JobRunner(root / "jobs")
+
+        rows = []
+        client = TestClient(app)  # no lifespan: the refresh scheduler stays out of the measurements
+        codes = [c["code"] for c in processor.get_snapshot().codes[::50]]
+        deadline = time.perf_counter() + args.idle_seconds
+        rows.append(("idle", _hammer(client, codes, lambda: time.perf_counter() < deadline)))
+
+        processor.pipeline_dir = root / "pipeline-inline"
+        rebuild = threading.Thread(target=processor.process_and_cache, kwargs={"download": False})
+        rebuild.start()
+        rows.append(("rebuild on API thread", _hammer(client, codes, rebuild.is_alive)))
+        rebuild.join()
+
+        params = {"data_dir": str(root), "download": False}
+        shutil.rmtree(root / "pipeline", ignore_errors=True)
+        job = jobs.get_job_runner().submit("rebuild", params)
+        rows.append(("rebuild as job process", _hammer(client, codes, lambda: not job.finished)))
+        job.wait()
+
+    print(f"\n{'while':<24} {'lookups':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for mode, latencies in rows:
+        print(f"{mode:<24} {_percentiles(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
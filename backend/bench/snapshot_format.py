@@ -0,0 +1,63 @@
+"""
+On-disk size and load time of the JSON cache vs. the columnar snapshot (Arrow IPC records +
+NPZ indexes + manifest), plus the cost of a manifest-only freshness check.
+
+    uv run python -m bench.snapshot_format [--repeat 20]
+"""
+
+from statistics import median
+import argparse, json, time
+
+import pyarrow as pa
+
+from core.naics import NAICSProcessor
+
+
+def _timed(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1e3)
+    return median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    processor = NAICSProcessor()
+    if not processor.cache_file.exists():
+        raise SystemExit("No JSON cache found; run the pipeline first.")
+    store = processor.store
+    if store.read_manifest() is None:
+        processor.load_snapshot()  # migrates the JSON cache into the columnar store
+    manifest = store.read_manifest()
+
+    def load_json():
+        with open(processor.cache_file, "r") as f:
+            json.load(f)
+
+    def open_records():
+        pa.ipc.open_file(pa.memory_map(str(store.path(manifest, "records")), "r")).read_all()
+
+    json_bytes = processor.cache_file.stat().st_size
+    columnar_bytes = {name: info["bytes"] for name, info in manifest["files"].items()}
+    print(f"{'artifact':<32} {'bytes':>12}")
+    print(f"{'naics_lookups.json':<32} {json_bytes:>12,}")
+    for name, size in columnar_bytes.items():
+        print(f"{'snapshot/' + manifest['files'][name]['path']:<32} {size:>12,}")
+    data_bytes = columnar_bytes["records"] + columnar_bytes["extras"]
+    print(f"{'snapshot records + extras':<32} {data_bytes:>12,}  ({data_bytes / json_bytes:.0%} of JSON)")
+
+    print(f"\n{'operation':<40} {'median ms':>10}")
+    print(f"{'freshness: parse JSON cache':<40} {_timed(load_json, args.repeat):>10.2f}")
+    print(f"{'freshness: read manifest':<40} {_timed(store.read_manifest, args.repeat):>10.3f}")
+    print(f"{'records: mmap Arrow table':<40} {_timed(open_records, args.repeat):>10.3f}")
+    print(f"{'records + extras: store.load':<40} {_timed(lambda: store.load(manifest), args.repeat):>10.2f}")
+    print(f"{'snapshot: load_snapshot (all indexes)':<40} {_timed(processor.load_snapshot, 3):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Synthetic, census-shaped NAICS source workbooks at multiples of the real row counts, so the pipeline
+can be benchmarked (and served) without the downloads. The five workbooks keep the layouts the
+loaders parse: hyphenated sector ranges (31-33), 5-digit redirects ("See industry description for
+NNNNN0."), trilateral "T" title suffixes, descriptions ending in the cross-reference header, the
+structure sheet's preamble rows, cross-reference text citing other codes, and the SBA table's
+sector/subsector header rows. Deterministic for a given scale and seed.
+
+    uv run python -m bench.synthetic DIR [--scale 10] [--seed 0]
+"""
+
+from pathlib import Path
+from typing import Dict, List
+import argparse, json, random, time
+
+from openpyxl import Workbook
+
+from core.keywords import DEFENSE_TAXONOMY
+from core.naics import NAICSProcessor
+
+GENERATOR_VERSION = 1
+
+# 2022 NAICS descriptions workbook: codes per level below the sectors, and the shares seen in it
+REAL_COUNTS = {3: 96, 4: 308, 5: 692, 6: 1012}
+REDIRECT_SHARE = 0.75  # 5-digit industries redirecting to their sole 6-digit child (522 of 692)
+TRILATERAL_SHARE = 0.38
+EMPTY_DESCRIPTION_SHARE = 0.07
+REAL_XREF_CODES = 1095
+XREF_CODE_SHARE = 0.92  # non-redirecting 5/6-digit codes with cross-references (1095), ~4.2 each (4601)
+XREF_HEADER_SHARE = 0.74  # of those, descriptions ending in the cross-reference header (813)
+DEFENSE_SHARE = 0.35  # descriptions given taxonomy keywords; with vocabulary hits ~58% match any (real 70%)
+SBA_SHARE = 0.98  # 6-digit codes with a size standard, about half in receipts, half in employees
+
+SECTORS = [
+    ("11", "Agriculture, Forestry, Fishing and Hunting"),
+    ("21", "Mining, Quarrying, and Oil and Gas Extraction"),
+    ("22", "Utilities"),
+    ("23", "Construction"),
+    ("31-33", "Manufacturing"),
+    ("42", "Wholesale Trade"),
+    ("44-45", "Retail Trade"),
+    ("48-49", "Transportation and Warehousing"),
+    ("51", "Information"),
+    ("52", "Finance and Insurance"),
+    ("53", "Real Estate and Rental and Leasing"),
+    ("54", "Professional, Scientific, and Technical Services"),
+    ("55", "Management of Companies and Enterprises"),
+    ("56", "Administrative and Support and Waste Management and Remediation Services"),
+    ("61", "Educational Services"),
+    ("62", "Health Care and Social Assistance"),
+    ("71", "Arts, Entertainment, and Recreation"),
+    ("72", "Accommodation and Food Services"),
+    ("81", "Other Services (except Public Administration)"),
+    ("92", "Public Administration"),
+]
+
+NOUNS = (
+    "equipment machinery products materials components parts supplies services goods fixtures devices "
+    "instruments vehicles structures textiles chemicals metals plastics paper glass timber grain "
+    "livestock produce beverages apparel furniture appliances tools engines pumps valves fabrics lumber "
+    "minerals ores fuels coatings adhesives fasteners containers packaging publications recordings"
+).split()
+VERBS = (
+    "manufacturing producing assembling distributing wholesaling retailing repairing installing leasing "
+    "operating providing processing refining mining growing harvesting transporting storing designing "
+    "fabricating finishing inspecting maintaining servicing renting"
+).split()
+FILLER = (
+    "establishments primarily engaged in the of and or for with including such as other related "
+    "generally purchased custom prefabricated industrial commercial residential specialized general"
+).split()
+DEFENSE_WORDS = [keyword for keywords in DEFENSE_TAXONOMY.values() for keyword in keywords]
+XREF_KINDS = {4: "Industry Group", 5: "Industry", 6: "U.S. Industry"}
+CROSS_REFERENCE_HEADER = "Cross-References. Establishments primarily engaged in--"
+
+
+def _level_counts(prefixes: int, scale: float) -> Dict[int, int]:
+    """
+    Codes per level for `prefixes` 2-digit sector prefixes: the real counts times `scale`, capped by the
+    code space (digits 1-9 under each parent) with the shortfall carried down to the next level.
+    Level 6 counts include the `0` children of redirecting 5-digit industries.
+    """
+    counts, parents, carry = {}, prefixes, 0
+    for level in (3, 4, 5):
+        counts[level] = min(round(REAL_COUNTS[level] * scale) + carry, parents * 9)
+        carry += round(REAL_COUNTS[level] * scale) - counts[level]
+        parents = counts[level]
+    wanted = round(REAL_COUNTS[6] * scale) + carry
+    redirects = min(round(REDIRECT_SHARE * parents), max(0, (9 * parents - wanted) // 8))
+    counts[6] = min(wanted, (parents - redirects) * 9 + redirects)
+    counts["redirects"] = redirects
+    return counts
+
+
+def _code_tree(scale: float, rng: random.Random) -> tuple[List[tuple[str, str]], Dict[int, List[str]], set]:
+    """Sector rows (label, title), codes per level, and the redirecting 5-digit codes."""
+    sectors = list(SECTORS)
+    taken = {prefix for label, _ in sectors for prefix in _expand(label)}
+    spare = [str(n) for n in range(10, 100) if str(n) not in taken]
+    target = sum(round(count * scale) for count in REAL_COUNTS.values())
+    while sum(v for k, v in _level_counts(len(taken), scale).items() if k != "redirects") < target and spare:
+        prefix = spare.pop(0)
+        sectors.append((prefix, f"Synthetic Sector {prefix}"))
+        taken.add(prefix)
+
+    counts = _level_counts(len(taken), scale)
+    levels: Dict[int, List[str]] = {2: sorted(taken)}
+    for level in (3, 4, 5):
+        candidates = [parent + digit for parent in levels[level - 1] for digit in "123456789"]
+        levels[level] = sorted(rng.sample(candidates, counts[level]))
+    redirects = set(rng.sample(levels[5], counts["redirects"]))
+    sole_children = [code + "0" for code in sorted(redirects)]
+    candidates = [code + digit for code in levels[5] if code not in redirects for digit in "123456789"]
+    levels[6] = sorted(sole_children + rng.sample(candidates, counts[6] - len(sole_children)))
+    return sectors, levels, redirects
+
+
+def _expand(label: str) -> List[str]:
+    if "-" not in label:
+        return [label]
+    first, last = label.split("-")
+    return [str(n) for n in range(int(first), int(last) + 1)]
+
+
+def _title(rng: random.Random) -> str:
+    return f"{rng.choice(NOUNS).title()} and {rng.choice(NOUNS).title()} {rng.choice(VERBS).title()}"
+
+
+def _description(rng: random.Random, cross_referenced: bool) -> str:
+    if rng.random() < EMPTY_DESCRIPTION_SHARE:
+        return ""
+    words = rng.choices(FILLER + NOUNS + VERBS, k=rng.randint(20, 90))
+    if rng.random() < DEFENSE_SHARE:
+        for keyword in rng.sample(DEFENSE_WORDS, rng.randint(1, 4)):
+            words.insert(rng.randrange(len(words)), keyword)
+    text = f"This industry comprises establishments primarily engaged in {' '.join(words)}."
+    if rng.random() < 0.3:  # a second paragraph, blank lines and runs of spaces like the census text
+        text += "\n\n\n" + f"Illustrative  Examples:\n\n{' '.join(rng.choices(NOUNS, k=rng.randint(5, 25)))}"
+    if cross_referenced and rng.random() < XREF_HEADER_SHARE:
+        text += f"\n\n{CROSS_REFERENCE_HEADER}"
+    return text
+
+
+def _cross_reference(rng: random.Random, codes_by_level: Dict[int, List[str]], titles: Dict[str, str]) -> str:
+    activity = f"{rng.choice(VERBS).capitalize()} {' '.join(rng.choices(FILLER + NOUNS, k=rng.randint(3, 18)))}"
+    roll = rng.random()
+    if roll < 0.05:  # no code cited
+        return f"{activity}--are classified in the {rng.choice(SECTORS)[1]} sector."
+    refs = []
+    for _ in range(2 if roll > 0.95 else 1):
+        level = rng.choice((4, 5, 5, 6, 6, 6))
+        ref = rng.choice(codes_by_level[level])
+        refs.append(f"{XREF_KINDS[level]} {ref}, {titles[ref]}")
+    return f"{activity}--are classified in {'; and '.join(refs)}{rng.choice(';.')}"
+
+
+def _write(path: Path, sheets: Dict[str, List[tuple]]):
+    """Stream rows into a workbook (openpyxl write-only mode), one sheet per entry."""
+    workbook = Workbook(write_only=True)
+    for name, rows in sheets.items():
+        sheet = workbook.create_sheet(name)
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def write_workbooks(data_dir: Path, scale: float = 1, seed: int = 0) -> Dict:
+    """
+    Write the five source workbooks under the file names `NAICSProcessor` expects.\n
+    Returns the manifest (also saved as `synthetic.json`): scale, seed, per-level code counts and rows
+    per workbook.
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    files = NAICSProcessor(data_dir).files
+    rng = random.Random(seed)
+    sectors, levels, redirects = _code_tree(scale, rng)
+
+    # (label, code) in the census' depth-first order; a sector range sits where its first prefix would
+    rows = [(label, _expand(label)[0]) for label, _ in sectors]
+    rows += [(code, code) for level in (3, 4, 5, 6) for code in levels[level]]
+    rows.sort(key=lambda row: row[1])
+    sector_titles = {label: title for label, title in sectors}
+    titles = {label: sector_titles.get(label) or _title(rng) for label, _ in rows}
+    for code in redirects:
+        titles[code + "0"] = titles[code]
+    for label, title in sectors:
+        for prefix in _expand(label):
+            titles.setdefault(prefix, title)
+    trilateral = {label: rng.random() < TRILATERAL_SHARE for label, _ in rows}
+
+    industries = [code for code in levels[5] + levels[6] if code not in redirects]
+    # capped at the real count times `scale`: at large scales few industries redirect, so there are more of them
+    referencing = min(round(XREF_CODE_SHARE * len(industries)), round(REAL_XREF_CODES * scale))
+    cross_referenced = set(rng.sample(industries, referencing))
+
+    descriptions = [("Code", "Title", "Description")]
+    for label, _ in rows:
+        if label in redirects:
+            description = f"See industry description for {label}0."
+        else:
+            description = _description(rng, label in cross_referenced)
+        descriptions.append((label, titles[label] + ("T" if trilateral[label] else ""), description or None))
+
+    codes = [(None, None, None, None, None), ("Seq. No.", "2022 NAICS US   Code", "2022 NAICS US Title")]
+    codes += [(i, label, titles[label]) for i, (label, _) in enumerate(rows, 1)]
+
+    structure = [("2022 NAICS Structure",), ("T = trilateral agreement (United States, Canada, and Mexico)",)]
+    structure.append(("Change Indicator", "2022 NAICS Code", "2022 NAICS Title"))
+    for label, _ in rows:
+        change = rng.choice(("*", "**", "***", "****")) if rng.random() < 0.11 else None
+        suffix = "T" if trilateral[label] else ""
+        structure.append((change, label, titles[label] + suffix + rng.choice(("", "", " "))))
+
+    cross_references = [("Code", "Cross-Reference")]
+    for code in sorted(cross_referenced):
+        for _ in range(min(1 + int(rng.expovariate(1 / 3.7)), 40)):
+            cross_references.append((code, _cross_reference(rng, levels, titles)))
+
+    sba = [("NAICS Codes", "NAICS Industry Description", "Size standards \nin millions of dollars")]
+    sba[0] += ("Size standards in number of employees", "Footnotes")
+    for label, code in rows:
+        if len(code) == 2 and code == _expand(label)[0]:
+            sba.append((None, f"Sector {label} – {titles[label]}", None, None, None))
+        elif len(code) == 3:
+            sba.append((f"Subsector {code} – {titles[code]}", None, None, None, None))
+        elif len(code) == 6 and rng.random() < SBA_SHARE:
+            if rng.random() < 0.51:
+                receipts = f"{rng.choice((2.25, 2.75, 8, 16.5, 22, 34, 41.5)):g}"
+                sba.append((code, titles[code], receipts, None, None))
+            else:
+                employees = str(rng.choice((100, 250, 500, 750, 1000, 1250)))
+                sba.append((code, titles[code], None, employees, None))
+
+    workbooks = {
+        "descriptions": {"tbl_2022_title_description_coun": descriptions},
+        "2_6_digit_codes": {"tbl_2022_title_description_coun": codes},
+        "structure": {"2022 NAICS Structure": structure},
+        "cross_references": {"2022_NAICS_Cross_References": cross_references},
+        "sba_size_standards": {
+            "overview": [("Synthetic SBA table of size standards",)],
+            "table_of_size_standards-all": sba,
+        },
+    }
+    for file_key, sheets in workbooks.items():
+        _write(data_dir / files[file_key]["filename"], sheets)
+
+    manifest = {
+        "generator_version": GENERATOR_VERSION,
+        "scale": scale,
+        "seed": seed,
+        "codes": {str(level): len(codes) for level, codes in levels.items()},
+        "redirects": len(redirects),
+        "rows": {file_key: sum(len(rows) for rows in sheets.values()) for file_key, sheets in workbooks.items()},
+    }
+    (data_dir / "synthetic.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def ensure_workbooks(data_dir: Path, scale: float = 1, seed: int = 0) -> Dict:
+    """The workbooks in `data_dir` if they were generated with the same scale, seed and generator, else new ones."""
+    manifest_path = Path(data_dir) / "synthetic.json"
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        if (manifest["generator_version"], manifest["scale"], manifest["seed"]) == (GENERATOR_VERSION, scale, seed):
+            return manifest
+    return write_workbooks(data_dir, scale, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dir", type=Path)
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = write_workbooks(args.dir, args.scale, args.seed)
+    print(json.dumps(manifest, indent=2))
+    print(f"Wrote {args.dir} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
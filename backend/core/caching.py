@@ -0,0 +1,106 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Optional
+import hashlib
+
+from fastapi import HTTPException, Request
+
+from core.responses import negotiate_coding
+
+
+class CacheValidators:
+    """
+    Per-route HTTP caching policy for generation-versioned data.\n
+    - strong `ETag`: the generation plus a digest of everything that selects the representation
+      (path, query parameters, `Accept`, negotiated content-coding)
+    - `Last-Modified` from when the generation was processed
+    - `If-None-Match` (or, without it, `If-Modified-Since`) that still matches raises a bodiless 304
+    - `Cache-Control: max-age=..., stale-while-revalidate=...`, set per route\n
+    `apply` is meant to run in a route dependency: it either raises the 304 or leaves the headers on
+    `request.state` for `CacheHeadersMiddleware` to add to the 200 the route returns, whatever
+    response class it uses.
+    """
+
+    VARY = "Accept, Accept-Encoding"
+
+    def __init__(self, max_age: int, stale_while_revalidate: int = 0, public: bool = True):
+        directives = ["public" if public else "private", f"max-age={max_age}"]
+        if stale_while_revalidate:
+            directives.append(f"stale-while-revalidate={stale_while_revalidate}")
+        self.cache_control = ", ".join(directives)
+
+    @staticmethod
+    def etag(generation: str, request: Request) -> str:
+        coding = negotiate_coding(request.headers.get("accept-encoding")) or "identity"
+        selector = "\n".join([
+            request.url.path,
+            "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items())),
+            request.headers.get("accept", ""),
+            coding,
+        ])
+        return f'"{generation}-{hashlib.sha256(selector.encode()).hexdigest()[:16]}"'
+
+    @staticmethod
+    def _matches(if_none_match: str, etag: str) -> bool:
+        """Weak comparison, as `If-None-Match` requires: `W/` prefixes are ignored."""
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+    @staticmethod
+    def _not_modified_since(if_modified_since: str, last_modified: float) -> bool:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError, IndexError):
+            return False
+
+    def apply(self, request: Request, generation: str, last_modified: Optional[float] = None):
+        etag = self.etag(generation, request)
+        headers = {"ETag": etag, "Cache-Control": self.cache_control, "Vary": self.VARY}
+        if last_modified is not None:
+            headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = self._matches(if_none_match, etag)
+        else:
+            not_modified = bool(if_modified_since and last_modified is not None) and self._not_modified_since(
+                if_modified_since, last_modified
+            )
+        if not_modified and request.method in ("GET", "HEAD"):
+            raise HTTPException(status_code=304, headers=headers)
+        request.state.cache_headers = headers
+
+
+class CacheHeadersMiddleware:
+    """ASGI middleware adding the headers `CacheValidators.apply` left on the request to its 200 response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                extra: Optional[Dict[str, str]] = scope.get("state", {}).get("cache_headers")
+                if extra:
+                    message = {**message, "headers": _merge_headers(message.get("headers", []), extra)}
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
+
+
+def _merge_headers(raw: List, extra: Dict[str, str]) -> List:
+    """Raw ASGI headers plus `extra`: a route's own values win, except `Vary`, whose values are unioned."""
+    names = {name.lower(): i for i, (name, _) in enumerate(raw)}
+    headers = list(raw)
+    for name, value in extra.items():
+        key = name.lower().encode()
+        if key not in names:
+            headers.append((key, value.encode()))
+        elif key == b"vary":
+            existing = [v.strip() for v in headers[names[key]][1].decode().split(",") if v.strip()]
+            merged = existing + [v for v in (p.strip() for p in value.split(",")) if v not in existing]
+            headers[names[key]] = (key, ", ".join(merged).encode())
+    return headers
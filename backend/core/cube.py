@@ -0,0 +1,201 @@
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+
+LEVEL_DIGITS = {"sector": 2, "subsector": 3, "industry_group": 4, "naics_industry": 5, "national_industry": 6}
+
+DIMENSIONS = ("sector", "level", "defense_related", "score_bucket")
+SCORE_BUCKET_CAP = 10  # defense scores bucketed by whole points, 10+ sharing the last bucket
+
+# measure -> histogram bin edges, shared by every cell so sketches merge by addition;
+# values past the last edge land in the last bin
+MEASURES: Dict[str, np.ndarray] = {
+    "defense_score": np.array([0, 0.25, 0.5, 0.75, 1, 1.5, 2, 2.5, 3, 4, 5, 6, 8, 10, 12, 16, 20, 24, 32], dtype=float),
+    "cross_ref_count": np.array([0, 1, 2, 3, 4, 5, 6, 8, 10, 12, 16, 20, 24, 32, 48, 64, 96, 128], dtype=float),
+}
+
+
+def measure_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Row-level dimensions and measures from a frame of NAICS records (`naics_code` column, hierarchy
+    level names); the measures are the records' own columns, not derived scores.\n
+    - `level`: NAICS hierarchy depth in digits (2 = sector ... 6 = national industry)
+    - `defense_score`, `cross_ref_count`: as analysed, missing values counted as 0
+    - `score_bucket`: defense score rounded down to whole points, capped at `SCORE_BUCKET_CAP`
+    """
+    df = df.copy()
+    if "defense_score" not in df:
+        df["defense_score"] = 0.0
+
+    df["level"] = df["level"].map(LEVEL_DIGITS).fillna(df["naics_code"].str.rstrip("0").str.len().clip(2, 6))
+    df["level"] = df["level"].astype(int)
+    df["defense_related"] = df["defense_related"].fillna(False).astype(bool)
+    df["defense_score"] = df["defense_score"].fillna(0.0).astype(float)
+    df["cross_ref_count"] = df["cross_ref_count"].fillna(0)
+    df["score_bucket"] = np.floor(df["defense_score"]).clip(upper=SCORE_BUCKET_CAP).astype(int)
+    return df
+
+
+def records_measure_frame(records: pa.Table) -> pd.DataFrame:
+    """`measure_frame` of the snapshot's columnar records, reading only the columns it needs."""
+    wanted = ["code", "sector", "level", "cross_ref_count", "defense_related", "defense_score"]
+    df = records.select([c for c in wanted if c in records.column_names]).to_pandas()
+    return measure_frame(df.rename(columns={"code": "naics_code"}))
+
+
+def _sketch_quantiles(hist: np.ndarray, edges: np.ndarray, lo: np.ndarray, hi: np.ndarray, q: float) -> np.ndarray:
+    """Per-row `q`-quantile of binned counts, interpolated linearly inside the bin (clamped to [min, max])."""
+    cumulative = np.cumsum(hist, axis=1)
+    total = cumulative[:, -1]
+    target = q * total
+    bins = (cumulative < target[:, None]).sum(axis=1).clip(max=hist.shape[1] - 1)
+    rows = np.arange(len(hist))
+    below = np.where(bins > 0, cumulative[rows, np.maximum(bins - 1, 0)], 0)
+    in_bin = hist[rows, bins]
+    left = edges[bins]
+    right = np.where(bins + 1 < len(edges), edges[np.minimum(bins + 1, len(edges) - 1)], hi)
+    fraction = np.divide(target - below, in_bin, out=np.zeros(len(hist)), where=in_bin > 0)
+    value = np.clip(left + fraction * (right - left), lo, hi)
+    return np.where(total > 0, value, np.nan)
+
+
+class AggregateCube:
+    """
+    Materialized aggregates of one generation's codes over `DIMENSIONS`
+    (sector x level x defense_related x score bucket).\n
+    Every non-empty cell holds its row count and, per measure in `MEASURES`, the sum, min, max and a
+    fixed-bin histogram. All of these merge across cells (sums, min of mins, histograms added), so any
+    rollup or drill-down over the dimensions, including approximate quantiles, is answered from the
+    cells without touching row-level data. A few hundred cells stand in for every code.
+    """
+
+    def __init__(
+        self,
+        dims: Dict[str, np.ndarray],
+        count: np.ndarray,
+        sums: Dict[str, np.ndarray],
+        mins: Dict[str, np.ndarray],
+        maxs: Dict[str, np.ndarray],
+        hists: Dict[str, np.ndarray],
+        generation: str = "",
+    ):
+        self.dims = dims
+        self.count = count
+        self.sums, self.mins, self.maxs, self.hists = sums, mins, maxs, hists
+        self.generation = generation
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+    @property
+    def total(self) -> int:
+        return int(self.count.sum())
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame, generation: str = "") -> "AggregateCube":
+        """Aggregate a `measure_frame` into cells; one factorize + bincount per statistic, no Python loops."""
+        keys = frame[list(DIMENSIONS)].assign(sector=frame["sector"].fillna(""))
+        cell, uniques = pd.MultiIndex.from_frame(keys).factorize(sort=True)
+        n = len(uniques)
+        dtypes = {"sector": str, "level": np.int8, "defense_related": bool, "score_bucket": np.int8}
+        dims = {
+            dim: np.asarray(uniques.get_level_values(i), dtype=dtypes[dim]) for i, dim in enumerate(DIMENSIONS)
+        }
+        sums, mins, maxs, hists = {}, {}, {}, {}
+        for name, edges in MEASURES.items():
+            values = frame[name].to_numpy(dtype=float)
+            sums[name] = np.bincount(cell, weights=values, minlength=n)
+            mins[name] = np.full(n, np.inf)
+            np.minimum.at(mins[name], cell, values)
+            maxs[name] = np.full(n, -np.inf)
+            np.maximum.at(maxs[name], cell, values)
+            bins = (np.searchsorted(edges, values, side="right") - 1).clip(0, len(edges) - 1)
+            hists[name] = np.bincount(cell * len(edges) + bins, minlength=n * len(edges)).reshape(n, len(edges))
+            hists[name] = hists[name].astype(np.int32)
+        count = np.bincount(cell, minlength=n).astype(np.int64)
+        return cls(dims, count, sums, mins, maxs, hists, generation)
+
+    def _mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+        for dim, value in (where or {}).items():
+            if dim not in self.dims:
+                raise ValueError(f"Unknown dimension '{dim}'; available: {list(DIMENSIONS)}")
+            values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+            mask &= np.isin(self.dims[dim], list(values))
+        return mask
+
+    def rollup(
+        self,
+        by: Sequence[str] = (),
+        where: Optional[Dict[str, Any]] = None,
+        quantiles: Sequence[float] = (),
+    ) -> pd.DataFrame:
+        """
+        Aggregate the cells matching `where` (dimension -> value or list of values) up to `by`.\n
+        One row per group, indexed by `by` (a single `"all"` row when empty), with `count` and per measure
+        `<measure>_sum/_mean/_min/_max` plus `<measure>_p<NN>` for each requested quantile. Groups with an
+        empty sector (codes without one) are left out of sector rollups, as a pandas groupby would.
+        """
+        unknown = [dim for dim in by if dim not in self.dims]
+        if unknown:
+            raise ValueError(f"Unknown dimensions {unknown}; available: {list(DIMENSIONS)}")
+        mask = self._mask(where)
+        if "sector" in by:
+            mask &= self.dims["sector"] != ""
+        cells = np.flatnonzero(mask)
+
+        if by:
+            keys = pd.MultiIndex.from_arrays([self.dims[dim][cells] for dim in by], names=list(by))
+            group, index = keys.factorize(sort=True)
+            index = index.set_names(list(by)) if len(by) > 1 else index.get_level_values(0).rename(by[0])
+        else:
+            group, index = np.zeros(len(cells), dtype=np.int64), pd.Index(["all"])
+        n = len(index)
+
+        count = np.bincount(group, weights=self.count[cells], minlength=n)
+        columns: Dict[str, np.ndarray] = {"count": count.astype(np.int64)}
+        for name, edges in MEASURES.items():
+            total = np.bincount(group, weights=self.sums[name][cells], minlength=n)
+            lo = np.full(n, np.inf)
+            np.minimum.at(lo, group, self.mins[name][cells])
+            hi = np.full(n, -np.inf)
+            np.maximum.at(hi, group, self.maxs[name][cells])
+            columns[f"{name}_sum"] = total
+            columns[f"{name}_mean"] = np.divide(total, count, out=np.full(n, np.nan), where=count > 0)
+            columns[f"{name}_min"], columns[f"{name}_max"] = lo, hi
+            if quantiles:
+                hist = np.zeros((n, len(edges)), dtype=np.int64)
+                np.add.at(hist, group, self.hists[name][cells])
+                for q in quantiles:
+                    columns[f"{name}_p{round(q * 100):02d}"] = _sketch_quantiles(hist, edges, lo, hi, q)
+        return pd.DataFrame(columns, index=index)
+
+    def quantile(self, measure: str, q: float, where: Optional[Dict[str, Any]] = None) -> float:
+        """Approximate `q`-quantile of one measure over the matching cells."""
+        return float(self.rollup((), where, [q])[f"{measure}_p{round(q * 100):02d}"].iloc[0])
+
+    def save(self, path: Path):
+        arrays = {f"dim.{name}": values for name, values in self.dims.items()}
+        arrays.update({"count": self.count, "measures": np.asarray(list(MEASURES), dtype=str)})
+        for name in MEASURES:
+            arrays.update({
+                f"{name}.sum": self.sums[name],
+                f"{name}.min": self.mins[name],
+                f"{name}.max": self.maxs[name],
+                f"{name}.hist": self.hists[name],
+            })
+        np.savez(path, generation=np.asarray(self.generation), **arrays)
+
+    @classmethod
+    def load(cls, path: Path) -> "AggregateCube":
+        with np.load(path, allow_pickle=False) as npz:
+            if npz["measures"].tolist() != list(MEASURES):
+                raise ValueError(f"Cube measures {npz['measures'].tolist()} != {list(MEASURES)}")
+            return cls(
+                {name: npz[f"dim.{name}"] for name in DIMENSIONS},
+                npz["count"],
+                *({name: npz[f"{name}.{stat}"] for name in MEASURES} for stat in ("sum", "min", "max", "hist")),
+                generation=str(npz["generation"]),
+            )
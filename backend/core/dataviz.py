@@ -1,37 +1,57 @@
-from typing import Dict
+from typing import Callable, Dict, Iterable, List, Literal, NamedTuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
 from matplotlib.figure import Figure
+import matplotlib
 import seaborn as sns
 import pandas as pd
-import base64, io
+import pyarrow as pa
+import base64, hashlib, io, os, tempfile, time
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+
+from core.cube import SCORE_BUCKET_CAP, AggregateCube, records_measure_frame
+from core.naics import SNAPSHOT_CACHE, NAICSProcessor, get_processor, require_snapshot, validated
+from core.pipeline import ProgressCallback
+from core.processes import worker_context
+from core.snapshot import NAICSSnapshot
 
 sns.set_theme(style="whitegrid", palette="viridis")
 
-def generate_dataviz(df: pd.DataFrame) -> Dict[str, str]:
-    """Return base64-encoded PNGs keyed by plot name, using seaborn."""
-    plots: Dict[str, str] = {}
+RENDER_VERSION = 5  # bump when plot code changes, to retire cached images
+
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml", "webp": "image/webp"}
+THUMBNAIL_DPI = 40  # dashboard previews: a 14x10in figure comes out ~560px wide
+
+def dataviz_frame(records: pa.Table) -> pd.DataFrame:
+    """Row-level frame the plots draw from: the snapshot records' dimensions and measures (see `measure_frame`)."""
+    return records_measure_frame(records)
+
 
-    # opportunity heatmap
+def opportunity_heatmap_data(df: pd.DataFrame, cube: AggregateCube) -> Dict[str, pd.DataFrame]:
+    pivot = cube.rollup(["sector", "level"])["defense_score_mean"].unstack("level", fill_value=0)
+    return {"pivot": pivot}
+
+
+def plot_opportunity_heatmap(data: Dict[str, pd.DataFrame]) -> Figure:
+    """Average defense score by sector and NAICS level."""
     fig_heat = Figure(figsize=(14, 10))
     ax_heat = fig_heat.subplots()
 
-    pivot = df.pivot_table(
-        values="jv_potential",
-        index="sector",
-        columns="level",
-        aggfunc="mean",
-        fill_value=0,
-    )
     sns.heatmap(
-        pivot,
+        data["pivot"],
         annot=True,
-        fmt=".3f",
+        fmt=".2f",
         cmap="RdYlBu_r",
-        cbar_kws={"label": "Joint Venture Potential Score"},
+        cbar_kws={"label": "Avg Defense Score per Code"},
         linewidths=0.5,
         ax=ax_heat,
     )
     ax_heat.set_title(
-        "Defense Contracting Opportunity Matrix\n(JV Potential by Sector & NAICS Level)",
+        "Defense Contracting Opportunity Matrix\n(Defense Score by Sector & NAICS Level)",
         fontsize=14,
         fontweight="bold",
         pad=20,
@@ -73,16 +93,41 @@ def generate_dataviz(df: pd.DataFrame) -> Dict[str, str]:
         rotation=0,
     )
     fig_heat.tight_layout()
-    plots["opportunity_heatmap"] = _fig_to_base64(fig_heat)
+    return fig_heat
+
+
+def dashboard_data(df: pd.DataFrame, cube: AggregateCube) -> Dict[str, pd.DataFrame]:
+    plot1 = cube.rollup(["level", "defense_related"])["count"].reset_index()
+    defense_sectors = (
+        cube.rollup(["sector"], where={"defense_related": True})
+        .rename(columns={"count": "naics_code", "defense_score_mean": "defense_score"})
+        .loc[:, ["naics_code", "defense_score"]]
+        .sort_values("naics_code", ascending=False)
+        .head(10)
+    )
+    # the high-value filter and the scatter are per code, so they stay on the row-level frame
+    hv = (
+        df[
+            (df["defense_score"] > df["defense_score"].quantile(0.8))
+            & (df["cross_ref_count"] > df["cross_ref_count"].quantile(0.7))
+        ]
+        .groupby("sector")["naics_code"]
+        .count()
+        .head(8)
+    )
+    points = df[["cross_ref_count", "defense_score", "level"]]
+    return {"plot1": plot1, "defense_sectors": defense_sectors, "points": points, "hv": hv.to_frame()}
+
 
-    # 4-panel dashboard
+def plot_dashboard(data: Dict[str, pd.DataFrame]) -> Figure:
+    """4-panel dashboard: defense mix by level, top defense sectors, cross-refs vs defense score, high-value sectors."""
     fig_dash = Figure(figsize=(16, 12))
     axs = fig_dash.subplots(2, 2)
     fig_dash.suptitle("NAICS Defense Contracting Analysis Dashboard", fontsize=16, fontweight="bold")
     ax1, ax2, ax3, ax4 = axs.flatten()
 
     # subplot 1
-    plot1 = df.groupby(["level", "defense_related"]).size().reset_index(name="count")
+    plot1 = data["plot1"]
     sns.barplot(
         data=plot1,
         x="level",
@@ -99,18 +144,9 @@ def generate_dataviz(df: pd.DataFrame) -> Dict[str, str]:
     ax1.legend(title=None, labels=["Commercial", "Defense-Related"])
 
     # subplot 2
-    defense_sectors = (
-        df[df["defense_related"]]
-        .groupby("sector")
-        .agg(
-            naics_code=("naics_code", "count"),
-            jv_potential=("jv_potential", "mean"),
-        )
-        .sort_values("naics_code", ascending=False)
-        .head(10)
-    )
+    defense_sectors = data["defense_sectors"].copy()
     defense_sectors["proportion"] = defense_sectors["naics_code"] / defense_sectors["naics_code"].sum()
-    hue_min, hue_max = defense_sectors["jv_potential"].min(), defense_sectors["jv_potential"].max()
+    hue_min, hue_max = defense_sectors["defense_score"].min(), defense_sectors["defense_score"].max()
 
     sns.barplot(
         data=defense_sectors.reset_index(),
@@ -125,72 +161,77 @@ def generate_dataviz(df: pd.DataFrame) -> Dict[str, str]:
     ax2.set_title("Top 10 Defense Sectors")
     ax2.set_xlabel("Sector Code")
     ax2.set_ylabel("Proportion of Defense Codes")
-    ax2.legend(title="Avg JV Potential", bbox_to_anchor=(1.02, 1), loc="upper left")
+    ax2.legend(title="Avg Defense Score", bbox_to_anchor=(1.02, 1), loc="upper left")
 
     # subplot 3
+    points = data["points"]
     sns.scatterplot(
-        data=df,
-        x="complexity_score",
-        y="jv_potential",
-        hue="defense_keyword_count",
-        size="defense_keyword_count",
+        data=points,
+        x="cross_ref_count",
+        y="defense_score",
+        hue="level",
+        size="level",
         sizes=(20, 200),
         palette="plasma",
         alpha=0.6,
         ax=ax3,
     )
     sns.regplot(
-        data=df,
-        x="complexity_score",
-        y="jv_potential",
+        data=points,
+        x="cross_ref_count",
+        y="defense_score",
         scatter=False,
         color="r",
         line_kws={"linestyle": "--"},
+        seed=0,
         ax=ax3,
     )
-    ax3.set_title("Complexity vs JV Potential\n(Size/Color = Defense Keywords)")
-    ax3.set_xlabel("Complexity Score")
-    ax3.set_ylabel("Joint Venture Potential")
-    ax3.legend(title="Defense Keywords")
+    ax3.set_title("Cross-References vs Defense Score\n(Size/Color = NAICS Level)")
+    ax3.set_xlabel("Cross-References")
+    ax3.set_ylabel("Defense Score")
+    ax3.legend(title="NAICS Level")
 
     # subplot 4
-    hv = (
-        df[
-            (df["jv_potential"] > df["jv_potential"].quantile(0.8))
-            & (df["complexity_score"] > df["complexity_score"].quantile(0.7))
-        ]
-        .groupby("sector")["naics_code"]
-        .count()
-        .head(8)
-    )
+    hv = data["hv"]["naics_code"]
     sns.barplot(x=hv.index, y=hv.values, palette="Set3", errorbar=None, ax=ax4)
-    ax4.set_title("High-Value Opportunity Sectors\n(Top 80% JV Potential + Top 70% Complexity)")
+    ax4.set_title("High-Value Opportunity Sectors\n(Top 20% Defense Score + Top 30% Cross-References)")
     ax4.set_xlabel("Sector")
     ax4.set_ylabel("Count of High-Value NAICS Codes")
 
     fig_dash.tight_layout()
-    plots["dashboard"] = _fig_to_base64(fig_dash)
+    return fig_dash
 
-    # keyword analysis feature
-    fig_kw = Figure(figsize=(16, 8))
-    ax_kw1, ax_kw2 = fig_kw.subplots(1, 2)
 
-    defense_df = df[df["defense_related"]].copy()
+def keyword_analysis_data(df: pd.DataFrame, cube: AggregateCube) -> Dict[str, pd.DataFrame]:
     kw = (
-        defense_df.groupby("defense_keyword_count")
-        .agg(
-            naics_code=("naics_code", "count"),
-            jv_potential=("jv_potential", "mean"),
-            complexity_score=("complexity_score", "mean"),
-        )
+        cube.rollup(["score_bucket"], where={"defense_related": True})
+        .rename_axis("defense_score")
+        .rename(columns={"count": "naics_code", "cross_ref_count_mean": "cross_ref_count"})
+        .loc[:, ["naics_code", "cross_ref_count"]]
         .reset_index()
     )
+    sectors = cube.rollup(["sector"])
+    defense = cube.rollup(["sector"], where={"defense_related": True})["count"]
+    sector_special = pd.DataFrame({
+        "defense_related": defense.reindex(sectors.index, fill_value=0),
+        "naics_code": sectors["count"],
+        "defense_score": sectors["defense_score_mean"],
+    })
+    return {"kw": kw, "sector_special": sector_special}
+
+
+def plot_keyword_analysis(data: Dict[str, pd.DataFrame]) -> Figure:
+    """Defense score impact and sector defense specialisation."""
+    fig_kw = Figure(figsize=(16, 8))
+    ax_kw1, ax_kw2 = fig_kw.subplots(1, 2)
+
+    kw = data["kw"]
     sns.scatterplot(
         data=kw,
-        x="defense_keyword_count",
-        y="complexity_score",
+        x="defense_score",
+        y="cross_ref_count",
         size="naics_code",
-        hue="jv_potential",
+        hue="naics_code",
         sizes=(50, 2500),
         palette="coolwarm",
         edgecolor="black",
@@ -198,24 +239,20 @@ def generate_dataviz(df: pd.DataFrame) -> Dict[str, str]:
         alpha=0.7,
         ax=ax_kw1,
     )
-    ax_kw1.set_title("Defense Keyword Impact Analysis\n(Bubble = Code Count, Color = JV Potential)")
-    ax_kw1.set_xlabel("Defense Keywords Count")
-    ax_kw1.set_ylabel("Average Complexity Score")
+    ax_kw1.set_title("Defense Score Impact Analysis\n(Bubble/Color = Code Count)")
+    ax_kw1.set_xlabel(f"Defense Score, whole points ({SCORE_BUCKET_CAP} = {SCORE_BUCKET_CAP}+)")
+    ax_kw1.set_ylabel("Average Cross-References")
     ax_kw1.grid(True, alpha=0.3)
-    ax_kw1.legend(title="JV Potential", bbox_to_anchor=(1.05, 1), loc="upper left")
+    ax_kw1.legend(title="Codes", bbox_to_anchor=(1.05, 1), loc="upper left")
 
-    sector_special = df.groupby("sector").agg(
-        defense_related=("defense_related", "sum"),
-        naics_code=("naics_code", "count"),
-        jv_potential=("jv_potential", "mean"),
-    )
+    sector_special = data["sector_special"].copy()
     sector_special["defense_ratio"] = sector_special["defense_related"] / sector_special["naics_code"]
     meaningful = sector_special[(sector_special["naics_code"] >= 5) & (sector_special["defense_ratio"] > 0)]
     meaningful = meaningful.sort_values("defense_ratio", ascending=False).head(12)
     sns.barplot(
         y=[f"Sector {s}" for s in meaningful.index],
         x=meaningful["defense_ratio"],
-        hue=meaningful["jv_potential"],
+        hue=meaningful["defense_score"],
         palette="viridis",
         dodge=False,
         errorbar=None,
@@ -223,59 +260,70 @@ def generate_dataviz(df: pd.DataFrame) -> Dict[str, str]:
     )
     ax_kw2.set_xlabel("Defense Specialisation Ratio")
     ax_kw2.set_ylabel("Sector")
-    ax_kw2.set_title("Sector Defense Specialisation\n(Color = Avg JV Potential)")
+    ax_kw2.set_title("Sector Defense Specialisation\n(Color = Avg Defense Score)")
     ax_kw2.grid(True, alpha=0.3, axis="x")
     ax_kw2.get_legend().remove()
 
     fig_kw.tight_layout()
-    plots["keyword_analysis"] = _fig_to_base64(fig_kw)
+    return fig_kw
+
+
+def strategic_matrix_data(df: pd.DataFrame, cube: AggregateCube) -> Dict[str, pd.DataFrame]:
+    means = {"cross_ref_count_mean": "cross_ref_count", "defense_score_mean": "defense_score"}
+    lvl = cube.rollup(["level"]).rename(columns=means)[["cross_ref_count", "defense_score"]]
+    market = (
+        cube.rollup(["sector"])
+        .rename(columns={"count": "naics_code", **means})[["naics_code", "defense_score"]]
+        .nlargest(15, "naics_code")
+    )
+    # the top codes and the connectivity/defense scatter are per code
+    top = df.sort_values(["defense_score", "cross_ref_count"], ascending=False).head(20)
+    top = top[["level", "sector", "defense_score", "cross_ref_count"]]
+    points = df[["cross_ref_count", "defense_score", "level"]]
+    return {"lvl": lvl, "market": market, "top": top, "points": points}
+
 
-    # strategic partnership analysis
+def plot_strategic_matrix(data: Dict[str, pd.DataFrame]) -> Figure:
+    """Strategic partnership & market intelligence: level trends, market size, top codes, connectivity/defense."""
     fig_spm = Figure(figsize=(16, 12))
     sp_axes = fig_spm.subplots(2, 2)
     fig_spm.suptitle("Strategic Partnership & Market Intelligence Dashboard", fontsize=16, fontweight="bold")
     sp1, sp2, sp3, sp4 = sp_axes.flatten()
 
-    lvl = df.groupby("level").agg(
-        complexity_score=("complexity_score", "mean"), jv_potential=("jv_potential", "mean")
-    )
+    lvl = data["lvl"]
     sns.lineplot(
         data=lvl,
         x=lvl.index,
-        y="complexity_score",
+        y="cross_ref_count",
         marker="o",
         linewidth=3,
         markersize=8,
         color="darkblue",
-        label="Complexity",
+        label="Cross-References",
         ax=sp1,
     )
-    sp1.set_ylabel("Complexity Score", color="darkblue")
+    sp1.set_ylabel("Avg Cross-References", color="darkblue")
     sp1_twin = sp1.twinx()
     sns.lineplot(
         data=lvl,
         x=lvl.index,
-        y="jv_potential",
+        y="defense_score",
         marker="s",
         linewidth=3,
         markersize=8,
         color="darkred",
-        label="JV Potential",
+        label="Defense Score",
         ax=sp1_twin,
     )
-    sp1_twin.set_ylabel("JV Potential Score", color="darkred")
-    sp1.set_title("Complexity vs JV Potential by NAICS Level")
+    sp1_twin.set_ylabel("Avg Defense Score", color="darkred")
+    sp1.set_title("Cross-References vs Defense Score by NAICS Level")
     sp1.grid(True, alpha=0.3)
 
-    market = (
-        df.groupby("sector")
-        .agg(naics_code=("naics_code", "count"), jv_potential=("jv_potential", "mean"))
-        .nlargest(15, "naics_code")
-    )
+    market = data["market"]
     sns.barplot(
         x=[f"Sec {i}" for i in market.index],
         y=market["naics_code"],
-        hue=market["jv_potential"],
+        hue=market["defense_score"],
         palette="plasma",
         dodge=False,
         errorbar=None,
@@ -284,20 +332,15 @@ def generate_dataviz(df: pd.DataFrame) -> Dict[str, str]:
     sp2.set_xticklabels(sp2.get_xticklabels(), rotation=45, ha="right")
     sp2.set_ylabel("Total NAICS Codes (Market Size)")
     sp2.set_xlabel("Sector")
-    sp2.set_title("Market Size by Sector\n(Color = JV Potential)")
+    sp2.set_title("Market Size by Sector\n(Color = Avg Defense Score)")
     sp2.get_legend().remove()
 
-    df_tmp = df.copy()
-    df_tmp["opportunity_score"] = (
-        df_tmp["jv_potential"] * df_tmp["complexity_score"] * df_tmp["defense_keyword_count"]
-    )
-    top = df_tmp.nlargest(20, "opportunity_score")
     sns.scatterplot(
-        data=top,
+        data=data["top"],
         x="level",
         y="sector",
-        size="opportunity_score",
-        hue="jv_potential",
+        size="defense_score",
+        hue="cross_ref_count",
         sizes=(50, 2000),
         palette="hot",
         edgecolor="black",
@@ -306,42 +349,250 @@ def generate_dataviz(df: pd.DataFrame) -> Dict[str, str]:
     )
     sp3.set_xlabel("NAICS Level")
     sp3.set_ylabel("Sector Code")
-    sp3.set_title("High-Opportunity Zones\n(Size = Opportunity Score)")
+    sp3.set_title("High-Opportunity Zones\n(Top 20 Codes: Size = Defense Score, Color = Cross-References)")
 
-    risk = 1 - df["complexity_score"]
-    reward = df["jv_potential"]
-    sns.scatterplot(
-        x=risk, y=reward, hue=df["defense_keyword_count"], palette="viridis", s=30, alpha=0.6, ax=sp4
-    )
-    sp4.set_xlabel("Risk Level (1 – Complexity)")
-    sp4.set_ylabel("Reward Potential (JV Score)")
-    sp4.set_title("Risk/Reward Analysis\n(Color = Defense Keywords)")
-    sp4.axhline(y=reward.median(), color="red", linestyle="--", alpha=0.5)
-    sp4.axvline(x=risk.median(), color="red", linestyle="--", alpha=0.5)
+    points = data["points"]
+    connectivity = points["cross_ref_count"]
+    focus = points["defense_score"]
+    sns.scatterplot(x=connectivity, y=focus, hue=points["level"], palette="viridis", s=30, alpha=0.6, ax=sp4)
+    sp4.set_xlabel("Connectivity (Cross-References)")
+    sp4.set_ylabel("Defense Focus (Score)")
+    sp4.set_title("Connectivity vs Defense Focus\n(Color = NAICS Level)")
+    sp4.axhline(y=focus.median(), color="red", linestyle="--", alpha=0.5)
+    sp4.axvline(x=connectivity.median(), color="red", linestyle="--", alpha=0.5)
     sp4.text(
         0.1,
         0.9,
-        "High Risk\nHigh Reward",
+        "Niche\nDefense",
         transform=sp4.transAxes,
         bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.5),
     )
     sp4.text(
         0.7,
         0.9,
-        "Low Risk\nHigh Reward",
+        "Connected\nDefense",
         transform=sp4.transAxes,
         bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.5),
     )
     fig_spm.tight_layout()
-    plots["strategic_matrix"] = _fig_to_base64(fig_spm)
-    return plots
+    return fig_spm
+
+
+class PlotSpec(NamedTuple):
+    """
+    `prepare` reduces the dataviz frame and the snapshot's aggregate cube to just what `draw` needs;
+    only that crosses to a worker.
+    """
+
+    prepare: Callable[[pd.DataFrame, AggregateCube], Dict[str, pd.DataFrame]]
+    draw: Callable[[Dict[str, pd.DataFrame]], Figure]
+
+
+PLOTS: Dict[str, PlotSpec] = {
+    "opportunity_heatmap": PlotSpec(opportunity_heatmap_data, plot_opportunity_heatmap),
+    "dashboard": PlotSpec(dashboard_data, plot_dashboard),
+    "keyword_analysis": PlotSpec(keyword_analysis_data, plot_keyword_analysis),
+    "strategic_matrix": PlotSpec(strategic_matrix_data, plot_strategic_matrix),
+}
 
 
-def _fig_to_base64(fig) -> str:
-    """Convert seaborn figure to base64 string for download"""
+def frame_hash(df: pd.DataFrame) -> str:
+    """Content hash of a frame (values, index and column names), independent of where it came from."""
+    digest = hashlib.sha256(",".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def render_plot(name: str, data: Dict[str, pd.DataFrame], format: str = "png", dpi: int = 300) -> bytes:
+    """Render one plot from its prepared aggregates to image bytes."""
+    fig = PLOTS[name].draw(data)
     buffer = io.BytesIO()
-    fig.savefig(buffer, format="png", dpi=300, bbox_inches="tight", facecolor="white", edgecolor="none")
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.getvalue()).decode()
-    buffer.close()
-    return img_base64
+    fig.savefig(buffer, format=format, dpi=dpi, bbox_inches="tight", facecolor="white", edgecolor="none")
+    return buffer.getvalue()
+
+
+def _render_job(name: str, data: Dict[str, pd.DataFrame], format: str, dpi: int) -> tuple[bytes, float]:
+    """Process pool entry point: `(image bytes, seconds)`."""
+    start = time.perf_counter()
+    return render_plot(name, data, format, dpi), time.perf_counter() - start
+
+
+class DatavizRenderer:
+    """
+    Renders plots in a process pool and caches the images on disk.\n
+    - cache key: hash of the input frame, plot name, format, dpi, `RENDER_VERSION` and matplotlib version
+    - files are written atomically as `<plot>.<key16>.<format>`; only the newest `keep` per plot survive
+    - only missed plots are prepared, each computing just its own aggregates
+    - misses for several plots render in parallel (one figure per worker); a single miss, `workers <= 1`
+      or a pool that can't start renders inline
+    """
+
+    def __init__(self, cache_dir: Path, workers: Optional[int] = None, keep: int = 8):
+        self.cache_dir = cache_dir
+        self.workers = workers if workers is not None else min(len(PLOTS), os.cpu_count() or 1)
+        self.keep = keep
+        self.stats: Dict[str, Dict] = {}  # last call's per-plot cache hit/miss and seconds
+
+    def key(self, frame_key: str, name: str, format: str, dpi: int) -> str:
+        parts = [frame_key, name, format, str(dpi), str(RENDER_VERSION), matplotlib.__version__]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def path(self, name: str, key: str, format: str) -> Path:
+        return self.cache_dir / f"{name}.{key[:16]}.{format}"
+
+    def _store(self, path: Path, image: bytes):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{path.name}.", suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(image)
+            os.replace(tmp, path)
+            name = path.name.split(".", 1)[0]
+            cached = sorted(self.cache_dir.glob(f"{name}.*.*"), key=lambda p: p.stat().st_mtime, reverse=True)
+            for stale in cached[self.keep :]:
+                stale.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Warning: Failed to cache plot {path.name}: {e}")
+
+    def render(
+        self,
+        df: pd.DataFrame,
+        names: Optional[Iterable[str]] = None,
+        format: str = "png",
+        dpi: int = 300,
+        frame_key: Optional[str] = None,
+        cube: Optional[AggregateCube] = None,
+    ) -> Dict[str, bytes]:
+        """
+        Image bytes per plot name (default: every plot), from the cache where possible.
+
+        `cube` is the frame's aggregate cube (built from `df` on a miss when not given).
+        """
+        names = list(PLOTS) if names is None else list(names)
+        frame_key = frame_key or frame_hash(df)
+        images, missing, self.stats = {}, [], {}
+        for name in names:
+            start = time.perf_counter()
+            path = self.path(name, self.key(frame_key, name, format, dpi), format)
+            try:
+                images[name] = path.read_bytes()
+                self.stats[name] = {"cached": True, "seconds": time.perf_counter() - start}
+            except FileNotFoundError:
+                missing.append(name)
+
+        if missing and cube is None:
+            cube = AggregateCube.build(df)
+        prepared = {name: PLOTS[name].prepare(df, cube) for name in missing}
+        rendered = self._render_pool(prepared, format, dpi) if len(missing) > 1 and self.workers > 1 else {}
+        for name in missing:
+            if name not in rendered:
+                rendered[name] = _render_job(name, prepared[name], format, dpi)
+            image, seconds = rendered[name]
+            images[name] = image
+            self._store(self.path(name, self.key(frame_key, name, format, dpi), format), image)
+            self.stats[name] = {"cached": False, "seconds": seconds}
+        return {name: images[name] for name in names}
+
+    def _render_pool(self, prepared: Dict[str, Dict], format: str, dpi: int) -> Dict[str, tuple]:
+        workers = min(self.workers, len(prepared))
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context()) as pool:
+                futures = {name: pool.submit(_render_job, name, data, format, dpi) for name, data in prepared.items()}
+                return {name: future.result() for name, future in futures.items()}
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Warning: Process pool unavailable ({e}), rendering plots inline.")
+            return {}
+
+
+_renderers: Dict[Path, DatavizRenderer] = {}  # image cache dir -> renderer
+_frames: Dict[str, tuple[pd.DataFrame, str]] = {}  # generation -> (frame, frame hash), newest only
+
+
+def get_renderer(data_dir: Optional[Path] = None) -> DatavizRenderer:
+    """Renderer caching images under `data_dir` (default: the global processor's) in `dataviz/`"""
+    cache_dir = Path(data_dir or get_processor().data_dir) / "dataviz"
+    if cache_dir not in _renderers:
+        _renderers[cache_dir] = DatavizRenderer(cache_dir)
+    return _renderers[cache_dir]
+
+
+def snapshot_frame(snapshot: NAICSSnapshot) -> tuple[pd.DataFrame, str]:
+    """The dataviz frame and its hash for a snapshot, built once per generation."""
+    cached = _frames.get(snapshot.generation)
+    if cached is None:
+        df = dataviz_frame(snapshot.records)
+        cached = (df, frame_hash(df))
+        _frames.clear()
+        _frames[snapshot.generation] = cached
+    return cached
+
+
+def render_dataviz_job(
+    progress: ProgressCallback,
+    format: str = "png",
+    dpi: int = 300,
+    plots: Optional[List[str]] = None,
+    data_dir: Optional[str] = None,
+) -> Dict:
+    """Job process: render plots of the current snapshot into the shared on-disk image cache, one at a time"""
+    names = list(PLOTS) if plots is None else plots
+    unknown = [name for name in names if name not in PLOTS]
+    if unknown or format not in MEDIA_TYPES:
+        raise ValueError(f"Unknown plots {unknown} or format '{format}'; available: {list(PLOTS)}, {list(MEDIA_TYPES)}")
+    processor = NAICSProcessor(data_dir)
+    snapshot = processor.load_snapshot()
+    if snapshot is None:
+        raise ValueError("NAICS data not processed yet")
+    df, frame_key = snapshot_frame(snapshot)
+    renderer, rendered = get_renderer(processor.data_dir), {}
+    for name in names:
+        progress(name, "running")
+        image = renderer.render(df, [name], format, dpi, frame_key, snapshot.cube)[name]
+        rendered[name] = {**renderer.stats[name], "bytes": len(image)}
+        progress(name, "cached" if renderer.stats[name]["cached"] else "done")
+    return {"generation": snapshot.generation, "format": format, "dpi": dpi, "plots": rendered}
+
+
+def generate_dataviz(df: pd.DataFrame, renderer: Optional[DatavizRenderer] = None) -> Dict[str, str]:
+    """Return base64-encoded PNGs keyed by plot name, using seaborn."""
+    images = (renderer or get_renderer()).render(df)
+    return {name: base64.b64encode(image).decode() for name, image in images.items()}
+
+
+router = APIRouter(tags=["dataviz"])
+
+
+@router.get("/dataviz", dependencies=[validated(SNAPSHOT_CACHE)])
+async def get_dataviz(snapshot: NAICSSnapshot = Depends(require_snapshot)):
+    """Every plot as a base64 PNG (300 dpi), rendered in parallel once per generation and cached on disk"""
+    renderer = get_renderer()
+
+    def render() -> Dict[str, str]:
+        df, frame_key = snapshot_frame(snapshot)
+        images = renderer.render(df, frame_key=frame_key, cube=snapshot.cube)
+        return {name: base64.b64encode(image).decode() for name, image in images.items()}
+
+    plots = await run_in_threadpool(render)
+    return JSONResponse(content={"generation": snapshot.generation, "plots": plots})
+
+
+@router.get("/dataviz/{plot_name}", dependencies=[validated(SNAPSHOT_CACHE)])
+async def get_dataviz_plot(
+    plot_name: str,
+    format: Literal["png", "svg", "webp"] = "png",
+    dpi: int = Query(300, ge=20, le=600),
+    thumbnail: bool = Query(False, description=f"Low-resolution preview ({THUMBNAIL_DPI} dpi); overrides `dpi`"),
+    snapshot: NAICSSnapshot = Depends(require_snapshot),
+):
+    """One plot as raw image bytes; only that plot's aggregates are computed, and only on a cache miss"""
+    if plot_name not in PLOTS:
+        raise HTTPException(status_code=404, detail=f"Unknown plot '{plot_name}'; available: {list(PLOTS)}")
+    renderer = get_renderer()
+    dpi = THUMBNAIL_DPI if thumbnail else dpi
+
+    def render() -> bytes:
+        df, frame_key = snapshot_frame(snapshot)
+        return renderer.render(df, [plot_name], format, dpi, frame_key, snapshot.cube)[plot_name]
+
+    image = await run_in_threadpool(render)
+    return Response(content=image, media_type=MEDIA_TYPES[format])
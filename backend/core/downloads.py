@@ -0,0 +1,152 @@
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import asyncio, json, os, random, tempfile, time
+
+import httpx
+
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class SourceDownloader:
+    """
+    Concurrent, conditional source downloads over one pooled async HTTP client.\n
+    - at most `max_concurrency` transfers in flight
+    - bodies are streamed in chunks to a temp file next to the target, then atomically renamed
+    - `ETag`/`Last-Modified` are kept in a `<file>.meta.json` sidecar and replayed as
+      `If-None-Match`/`If-Modified-Since`, so an unchanged source costs a 304
+    - connection errors and 408/425/429/5xx are retried with jittered exponential backoff
+    - if a refresh fails but a previous copy exists, that copy is kept and reported as `stale`
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        timeout: float = 30.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        chunk_size: int = 1 << 16,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.chunk_size = chunk_size
+        self.transport = transport  # e.g. `httpx.MockTransport` for offline runs
+
+    @staticmethod
+    def sidecar(path: Path) -> Path:
+        return path.with_name(f"{path.name}.meta.json")
+
+    def _validators(self, path: Path, url: str) -> Dict[str, str]:
+        """Conditional request headers for an existing copy of `path`."""
+        if not path.exists():
+            return {}
+        try:
+            with open(self.sidecar(path), "r") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            meta = {}
+        if meta.get("url") not in (None, url):  # source moved; validators belong to the old one
+            meta = {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        # without a sidecar, the copy's own mtime is the best Last-Modified we have
+        last_modified = meta.get("last_modified") or formatdate(path.stat().st_mtime, usegmt=True)
+        headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _write_sidecar(self, path: Path, url: str, response: httpx.Response, size: int):
+        meta = {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "bytes": size,
+            "fetched_at": time.time(),
+        }
+        tmp = self.sidecar(path).with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, self.sidecar(path))
+
+    async def _stream_to(self, response: httpx.Response, path: Path) -> int:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return size
+
+    async def fetch(self, client: httpx.AsyncClient, url: str, path: Path) -> Dict:
+        """Fetch one source, returning `{status, bytes, seconds, attempts[, error]}`."""
+        start = time.perf_counter()
+        headers = self._validators(path, url)
+        error = None
+        for attempt in range(1, self.retries + 2):
+            try:
+                async with client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304:
+                        status, size = "not_modified", 0
+                    elif response.status_code in RETRY_STATUS and attempt <= self.retries:
+                        raise httpx.HTTPStatusError("retryable", request=response.request, response=response)
+                    else:
+                        response.raise_for_status()
+                        size = await self._stream_to(response, path)
+                        self._write_sidecar(path, url, response, size)
+                        status = "downloaded"
+                seconds = time.perf_counter() - start
+                return {"status": status, "bytes": size, "seconds": seconds, "attempts": attempt}
+            except httpx.HTTPStatusError as e:
+                error = f"HTTP {e.response.status_code}"
+                if e.response.status_code not in RETRY_STATUS:
+                    break
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+            except OSError as e:  # local write failure; retrying won't help
+                error = f"{type(e).__name__}: {e}"
+                break
+            if attempt <= self.retries:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * (0.5 + random.random()))
+
+        return {
+            "status": "stale" if path.exists() else "failed",
+            "bytes": 0,
+            "seconds": time.perf_counter() - start,
+            "attempts": attempt,
+            "error": error,
+        }
+
+    async def fetch_all(self, sources: Dict[str, Tuple[str, Path]]) -> Dict[str, Dict]:
+        """Fetch `{name: (url, path)}` concurrently over one connection pool."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency
+        )
+
+        async def bounded(client: httpx.AsyncClient, url: str, path: Path) -> Dict:
+            async with semaphore:
+                return await self.fetch(client, url, path)
+
+        async with httpx.AsyncClient(
+            timeout=self.timeout, limits=limits, follow_redirects=True, transport=self.transport
+        ) as client:
+            results = await asyncio.gather(*(bounded(client, url, path) for url, path in sources.values()))
+        return dict(zip(sources, results))
+
+    def download(self, sources: Dict[str, Tuple[str, Path]]) -> Dict[str, Dict]:
+        """Blocking entry point; safe to call from inside a running event loop (runs on its own thread)."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_all(sources))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.fetch_all(sources)).result()
@@ -0,0 +1,114 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import io, zlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_CHUNK_ROWS = 2000
+
+# flat CSV column -> how to derive it from one records batch (as a DataFrame)
+CSV_COLUMNS: Dict[str, Callable[[pd.DataFrame], pd.Series]] = {
+    "naics_code": lambda df: df["code"],
+    "description": lambda df: df["description"].fillna(""),
+    "sector": lambda df: df["sector"].fillna(""),
+    "level": lambda df: df["code"].str.len(),
+    "defense_related": lambda df: df["defense_related"].fillna(False).astype(bool),
+    "cross_reference_count": lambda df: df["related_codes"].map(lambda codes: 0 if codes is None else len(codes)),
+    "related_codes": lambda df: df["related_codes"].map(lambda codes: "" if codes is None else "|".join(codes)),
+}
+CSV_SOURCES = ["code", "description", "sector", "defense_related", "related_codes"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose buffered bytes are handed off (and released) on each `drain`."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def export_columns(format: str, records: pa.Table) -> List[str]:
+    return list(CSV_COLUMNS) if format == "csv" else records.column_names
+
+
+def select_columns(format: str, records: pa.Table, columns: Optional[str]) -> List[str]:
+    """Validated column list from a comma-separated `columns` query value (default: every column)."""
+    available = export_columns(format, records)
+    if not columns:
+        return available
+    selected = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = [c for c in selected if c not in available]
+    if unknown:
+        raise ValueError(f"Unknown columns {unknown}; available: {available}")
+    return selected
+
+
+def stream_csv(records: pa.Table, columns: List[str], chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """The flat CSV export, one batch of rows at a time (header with the first batch)."""
+    sources = [name for name in CSV_SOURCES if name in records.column_names]
+    header = True
+    for batch in records.select(sources).to_batches(max_chunksize=chunk_rows):
+        df = batch.to_pandas()
+        out = pd.DataFrame({name: CSV_COLUMNS[name](df) for name in columns})
+        yield out.to_csv(index=False, header=header).encode()
+        header = False
+    if header:  # no rows: still a valid CSV with its header
+        yield pd.DataFrame(columns=columns).to_csv(index=False).encode()
+
+
+def stream_parquet(records: pa.Table, columns: List[str], chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Parquet file of the selected record columns, one row group per batch, flushed as written."""
+    table = records.select(columns)
+    sink = _DrainableSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), table.schema, compression="zstd") as writer:
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()  # footer
+
+
+def stream_arrow(records: pa.Table, columns: List[str], chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Arrow IPC stream of the selected record columns, one message per batch."""
+    table = records.select(columns)
+    sink = _DrainableSink()
+    with pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()  # end-of-stream marker
+
+
+STREAMERS = {"csv": stream_csv, "parquet": stream_parquet, "arrow": stream_arrow}
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip-compress a byte stream incrementally; memory stays at one chunk plus the deflate window."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
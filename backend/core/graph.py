@@ -0,0 +1,164 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
+import pandas as pd
+import numpy as np
+
+Direction = Literal["out", "in", "both"]
+
+
+class CrossRefGraph:
+    """
+    Compact directed cross-reference graph.\n
+    Nodes are integer-indexed NAICS codes; edges `code -> referenced code` are stored as CSR arrays in
+    both directions (`out_*` for references made, `in_*` for references received), so neighborhood
+    queries are array slices instead of dict/set walks.
+    """
+
+    def __init__(
+        self,
+        nodes: np.ndarray,
+        out_indptr: np.ndarray,
+        out_indices: np.ndarray,
+        in_indptr: np.ndarray,
+        in_indices: np.ndarray,
+        generation: str = "",
+    ):
+        self.nodes = nodes
+        self.out_indptr, self.out_indices = out_indptr, out_indices
+        self.in_indptr, self.in_indices = in_indptr, in_indices
+        self.generation = generation
+        self.node_index: Dict[str, int] = {code: i for i, code in enumerate(nodes.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return int(self.out_indices.size)
+
+    @staticmethod
+    def _csr(rows: np.ndarray, cols: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return indptr, cols[order].astype(np.int32)
+
+    @classmethod
+    def from_edges(
+        cls,
+        src: Iterable[str],
+        dst: Iterable[str],
+        nodes: Iterable[str] = (),
+        generation: str = "",
+    ) -> "CrossRefGraph":
+        """Build from parallel source/target code arrays; `nodes` adds isolated codes to the index."""
+        src, dst = np.asarray(src, dtype=object), np.asarray(dst, dtype=object)
+        extra = np.asarray(list(nodes), dtype=object)
+
+        # factorize over every code seen, sorted so node order (and persisted arrays) are deterministic
+        codes, labels = pd.factorize(np.concatenate([src, dst, extra]), sort=True)
+        n = len(labels)
+        s, d = codes[: len(src)], codes[len(src) : len(src) + len(dst)]
+
+        # drop self-loops and duplicate edges
+        keep = s != d
+        edges = np.unique(np.stack([s[keep], d[keep]], axis=1), axis=0).reshape(-1, 2)
+        out_indptr, out_indices = cls._csr(edges[:, 0], edges[:, 1], n)
+        in_indptr, in_indices = cls._csr(edges[:, 1], edges[:, 0], n)
+        return cls(np.asarray(labels, dtype=str), out_indptr, out_indices, in_indptr, in_indices, generation)
+
+    @classmethod
+    def from_related_codes(
+        cls,
+        df: pd.DataFrame,
+        code_col: str = "naics_code",
+        refs_col: str = "related_codes",
+        generation: str = "",
+    ) -> "CrossRefGraph":
+        """Build from a frame holding a list-of-codes column (explode + factorize, no Python loops)."""
+        edges = df[[code_col, refs_col]].explode(refs_col).dropna()
+        return cls.from_edges(edges[code_col], edges[refs_col], nodes=df[code_col], generation=generation)
+
+    @classmethod
+    def from_records(cls, records: List[Dict], generation: str = "") -> "CrossRefGraph":
+        df = pd.DataFrame({
+            "naics_code": [r["code"] for r in records],
+            "related_codes": [r.get("related_codes") or [] for r in records],
+        })
+        return cls.from_related_codes(df, generation=generation)
+
+    def save(self, path: Path):
+        np.savez(
+            path,
+            nodes=self.nodes,
+            out_indptr=self.out_indptr,
+            out_indices=self.out_indices,
+            in_indptr=self.in_indptr,
+            in_indices=self.in_indices,
+            generation=np.asarray(self.generation),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "CrossRefGraph":
+        with np.load(path, allow_pickle=False) as npz:
+            return cls(
+                npz["nodes"],
+                npz["out_indptr"],
+                npz["out_indices"],
+                npz["in_indptr"],
+                npz["in_indices"],
+                str(npz["generation"]),
+            )
+
+    def _indices(self, codes: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.node_index[c] for c in codes if c in self.node_index), dtype=np.int64)
+
+    @staticmethod
+    def _gather(frontier: np.ndarray, indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """Concatenate the CSR rows of every frontier node without a Python loop."""
+        starts, ends = indptr[frontier], indptr[frontier + 1]
+        lens = ends - starts
+        total = int(lens.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int32)
+        offsets = np.repeat(starts - (np.cumsum(lens) - lens), lens)
+        return indices[np.arange(total) + offsets]
+
+    def _neighbors(self, frontier: np.ndarray, direction: Direction) -> np.ndarray:
+        if direction == "out":
+            return self._gather(frontier, self.out_indptr, self.out_indices)
+        if direction == "in":
+            return self._gather(frontier, self.in_indptr, self.in_indices)
+        return np.concatenate([
+            self._gather(frontier, self.out_indptr, self.out_indices),
+            self._gather(frontier, self.in_indptr, self.in_indices),
+        ])
+
+    def degree(self, code: str) -> Optional[Dict[str, int]]:
+        idx = self.node_index.get(code)
+        if idx is None:
+            return None
+        return {
+            "out_degree": int(self.out_indptr[idx + 1] - self.out_indptr[idx]),
+            "in_degree": int(self.in_indptr[idx + 1] - self.in_indptr[idx]),
+        }
+
+    def within_hops(self, codes: Iterable[str], hops: int = 1, direction: Direction = "out") -> Dict[str, int]:
+        """
+        Breadth-first expansion from a seed set, returning `{code: hop distance}` for every node
+        reachable within `hops` (seeds are distance 0). Each hop is one vectorized CSR gather.
+        """
+        seeds = np.unique(self._indices(codes))
+        dist = np.full(len(self.nodes), -1, dtype=np.int32)
+        dist[seeds] = 0
+        frontier = seeds
+        for hop in range(1, hops + 1):
+            if frontier.size == 0:
+                break
+            reached = np.unique(self._neighbors(frontier, direction))
+            frontier = reached[dist[reached] < 0]
+            dist[frontier] = hop
+
+        found = np.flatnonzero(dist >= 0)
+        found = found[np.argsort(dist[found], kind="stable")]
+        return dict(zip(self.nodes[found].tolist(), dist[found].tolist()))
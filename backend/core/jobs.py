@@ -0,0 +1,352 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+import importlib, multiprocessing, os, shutil, signal, threading, traceback, uuid
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, ConfigDict, Field
+
+from core.processes import worker_context
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+@dataclass(frozen=True)
+class Task:
+    """
+    A kind of job: `target` is `"module:function"`, imported in the job process and called as
+    `fn(progress, **params)` with `progress(stage, event)` reporting back to the API process.\n
+    - `single_flight`: submitting while one is queued or running returns that job instead
+    - `artifacts`: the job gets an `output_dir`; a result `artifact` (file name) in it is downloadable
+    - `on_success`: `"module:function"` called with the job in the API process before waiters wake
+    """
+
+    target: str
+    single_flight: bool = False
+    artifacts: bool = False
+    on_success: Optional[str] = None
+
+
+def _resolve(target: str):
+    module, name = target.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+TASKS: Dict[str, Task] = {
+    "rebuild": Task("core.naics:rebuild_snapshot_job", single_flight=True, on_success="core.naics:install_rebuild"),
+    "dataviz": Task("core.dataviz:render_dataviz_job"),
+    "export": Task("core.naics:export_job", artifacts=True),
+}
+
+
+class JobError(RuntimeError):
+    """A job that failed or was cancelled, raised by `Job.wait`."""
+
+
+@dataclass(eq=False)
+class Job:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    status: JobStatus = "queued"
+    submitted_at: float = field(default_factory=lambda: datetime.now().timestamp())
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stages: Dict[str, str] = field(default_factory=dict)  # stage -> last event, in order first seen
+    result: Any = None
+    error: Optional[str] = None
+    output_dir: Optional[Path] = None
+    cancel_requested: bool = False
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+    _process: Optional[multiprocessing.process.BaseProcess] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """Block until the job ends; its result, or `JobError` if it failed or was cancelled."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Job {self.id} still {self.status} after {timeout}s")
+        if self.status != "succeeded":
+            raise JobError(f"Job {self.id} ({self.kind}) {self.status}: {self.error or 'no result'}")
+        return self.result
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "seconds": None if self.started_at is None else (self.finished_at or datetime.now().timestamp())
+            - self.started_at,
+            "stages": self.stages,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def _job_main(target: str, params: Dict[str, Any], conn, niceness: int):
+    """Job process entry point: own process group (so cancelling reaps its pools too), lower CPU priority."""
+    if hasattr(os, "setpgid"):
+        os.setpgid(0, 0)
+    try:
+        os.nice(niceness)
+    except (AttributeError, OSError):
+        pass
+    try:
+        result = _resolve(target)(lambda stage, event: conn.send(("progress", stage, event)), **params)
+        conn.send(("succeeded", result))
+    except Exception as e:
+        traceback.print_exc()
+        conn.send(("failed", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class JobRunner:
+    """
+    Local, broker-less runner for heavy work (snapshot rebuilds, plot rendering, large exports).\n
+    - every job runs in its own process (forkserver, niced), at most `max_workers` at a time, so the
+      API process keeps its CPU for reads; a supervisor thread per job relays progress and the result
+    - `cancel` kills a running job's process group, or drops a queued job before it starts
+    - the newest `keep` finished jobs are remembered (older ones, and their artifacts, are dropped)
+    """
+
+    def __init__(self, artifacts_dir: Path, max_workers: int = 1, keep: int = 50, niceness: int = 10):
+        self.artifacts_dir = artifacts_dir
+        self.max_workers = max_workers
+        self.keep = keep
+        self.niceness = niceness
+        self._slots = threading.Semaphore(max_workers)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None) -> Job:
+        if kind not in TASKS:
+            raise ValueError(f"Unknown job kind '{kind}'; available: {list(TASKS)}")
+        task, params = TASKS[kind], dict(params or {})
+        with self._lock:
+            if task.single_flight:
+                for job in self._jobs.values():
+                    if job.kind == kind and job.params == params and not job.finished:
+                        return job
+            job = Job(id=uuid.uuid4().hex[:16], kind=kind, params=params)
+            if task.artifacts:
+                job.output_dir = self.artifacts_dir / job.id
+            self._jobs[job.id] = job
+            self._prune()
+        threading.Thread(target=self._supervise, args=(job, task), name=f"job-{job.id}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        return sorted(self._jobs.values(), key=lambda job: job.submitted_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        with self._lock:
+            job.cancel_requested = True
+            process = job._process
+        if process is not None and process.pid is not None:
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except (AttributeError, ProcessLookupError, PermissionError):
+                process.terminate()
+        return job
+
+    def shutdown(self):
+        """Cancel everything still queued or running (on app shutdown)."""
+        for job in list(self._jobs.values()):
+            self.cancel(job.id)
+
+    def _supervise(self, job: Job, task: Task):
+        with self._slots:
+            with self._lock:
+                if job.cancel_requested:
+                    return self._finish(job, "cancelled")
+                try:
+                    receiver, sender = self._start(job, task)
+                except Exception as e:  # fork/spawn failure, EMFILE, ENOMEM...: fail the job, don't strand waiters
+                    traceback.print_exc()
+                    job.error = f"Job process failed to start: {type(e).__name__}: {e}"
+                    return self._finish(job, "failed")
+                job.status, job.started_at = "running", datetime.now().timestamp()
+            sender.close()
+            print(f"Job {job.id} ({job.kind}) started.")
+
+            outcome, payload = "failed", "job process exited without a result"
+            try:
+                while True:
+                    message = receiver.recv()
+                    if message[0] == "progress":
+                        job.stages[message[1]] = message[2]
+                        continue
+                    outcome, payload = message
+                    break
+            except EOFError:
+                pass
+            finally:
+                receiver.close()
+                job._process.join()
+            if job.cancel_requested and outcome != "succeeded":
+                outcome, payload = "cancelled", "cancelled"
+            if outcome == "succeeded":
+                job.result = payload
+                try:
+                    if task.on_success:
+                        _resolve(task.on_success)(job)
+                except Exception as e:
+                    traceback.print_exc()
+                    outcome, job.error = "failed", f"{type(e).__name__}: {e}"
+            else:
+                job.error = payload
+            self._finish(job, outcome)
+
+    def _start(self, job: Job, task: Task):
+        """Start the job's process; the (receiver, sender) ends of its result pipe."""
+        params = dict(job.params)
+        if job.output_dir is not None:
+            job.output_dir.mkdir(parents=True, exist_ok=True)
+            params["output_dir"] = str(job.output_dir)
+        context = worker_context()
+        receiver, sender = context.Pipe(duplex=False)
+        try:
+            job._process = context.Process(
+                target=_job_main, args=(task.target, params, sender, self.niceness), name=f"job-{job.id}"
+            )
+            job._process.start()
+        except Exception:
+            receiver.close()
+            sender.close()
+            job._process = None
+            raise
+        return receiver, sender
+
+    def _finish(self, job: Job, status: JobStatus):
+        job.status, job.finished_at = status, datetime.now().timestamp()
+        job._done.set()
+        print(f"Job {job.id} ({job.kind}) {status}.")
+
+    def _prune(self):
+        finished = [job for job in self.jobs() if job.finished]
+        for stale in finished[self.keep :]:
+            del self._jobs[stale.id]
+            if stale.output_dir is not None:
+                shutil.rmtree(stale.output_dir, ignore_errors=True)
+
+
+_runner: Optional[JobRunner] = None
+
+
+def get_job_runner() -> JobRunner:
+    global _runner
+    if _runner is None:
+        _runner = JobRunner(Path(__file__).resolve().parent / "data" / "jobs")
+    return _runner
+
+
+class RebuildParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    download: bool = True
+
+
+class DatavizParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    format: Literal["png", "svg", "webp"] = "png"
+    dpi: int = Field(300, ge=20, le=600)
+    plots: Optional[List[str]] = None
+
+
+class ExportParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    format: Literal["csv", "parquet", "arrow"] = "parquet"
+    columns: Optional[str] = None
+    gzip: bool = False
+
+
+class RebuildRequest(BaseModel):
+    kind: Literal["rebuild"]
+    params: RebuildParams = RebuildParams()
+
+
+class DatavizRequest(BaseModel):
+    kind: Literal["dataviz"]
+    params: DatavizParams = DatavizParams()
+
+
+class ExportRequest(BaseModel):
+    kind: Literal["export"]
+    params: ExportParams = ExportParams()
+
+
+# what a client may set per job kind; anything else (including `data_dir`) is a 422
+JobRequest = Annotated[Union[RebuildRequest, DatavizRequest, ExportRequest], Field(discriminator="kind")]
+
+
+router = APIRouter(tags=["jobs"])
+
+
+def _job_or_404(job_id: str) -> Job:
+    job = get_job_runner().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """Queue a rebuild, dataviz render or export in a job process; poll `/jobs/{id}` for progress"""
+    from core.naics import get_processor  # core.naics submits jobs itself, so not at module level
+
+    # jobs always read and write the serving processor's data dir; clients can't point them elsewhere
+    params = {**request.params.model_dump(), "data_dir": str(get_processor().data_dir)}
+    try:
+        job = get_job_runner().submit(request.kind, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.to_dict()
+
+
+@router.get("/jobs")
+async def list_jobs():
+    """Recent jobs, newest first"""
+    return {"jobs": [job.to_dict() for job in get_job_runner().jobs()]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, stage-level progress and result of a job"""
+    return _job_or_404(job_id).to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (a no-op once it has finished)"""
+    _job_or_404(job_id)
+    return get_job_runner().cancel(job_id).to_dict()
+
+
+@router.get("/jobs/{job_id}/artifact")
+async def get_job_artifact(job_id: str):
+    """Download the file a finished job produced (e.g. an export)"""
+    job = _job_or_404(job_id)
+    artifact = (job.result or {}).get("artifact") if isinstance(job.result, dict) else None
+    if job.status != "succeeded" or job.output_dir is None or not artifact:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} has no artifact ({job.status})")
+    path = job.output_dir / Path(artifact).name
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=f"Artifact of job {job_id} is gone")
+    return FileResponse(path, media_type=job.result.get("media_type"), filename=path.name)
@@ -0,0 +1,150 @@
+from typing import Dict, Iterable, List, Optional
+import hashlib, json, re
+
+import numpy as np
+import pandas as pd
+
+# below this many keywords a plain alternation beats the trie-factored regex (bench.keyword_scoring)
+TRIE_MIN_KEYWORDS = 12
+
+# a text is defense-related only if it matches a keyword weighing at least this; the generic words
+# (the 0.25-0.5 "support", "service", "development"...) add to its score but never qualify it alone
+DEFENSE_MIN_WEIGHT = 1.0
+# the weight of one core defense keyword ("missile", "weapon", "military"...): scores from here are high
+HIGH_DEFENSE_SCORE = 3.0
+
+# category -> keyword -> weight; keywords are singular, matched as whole words with an optional plural "s"/"es"
+DEFENSE_TAXONOMY: Dict[str, Dict[str, float]] = {
+    "weapons": {"missile": 3.0, "weapon": 3.0, "ammunition": 3.0, "radar": 2.0},
+    "military": {"defense": 3.0, "military": 3.0, "naval": 3.0, "marine": 1.0},
+    "aerospace": {"aerospace": 2.0, "aircraft": 2.0, "aviation": 2.0, "space": 1.5},
+    "intelligence": {"intelligence": 2.0, "surveillance": 2.0, "cybersecurity": 2.0, "security": 1.0},
+    "technology": {
+        "communication": 1.0,
+        "electronic": 1.0,
+        "computer": 1.0,
+        "software": 1.0,
+        "system": 0.5,
+        "technology": 0.5,
+    },
+    "engineering": {"research": 1.0, "development": 0.5, "engineering": 1.0, "testing": 0.5},
+    "services": {
+        "consulting": 0.25,
+        "professional": 0.25,
+        "manufacturing": 0.25,
+        "training": 0.25,
+        "logistics": 0.5,
+        "maintenance": 0.25,
+        "repair": 0.25,
+        "support": 0.25,
+        "service": 0.25,
+    },
+}
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex alternation for `words` factored into a character trie, so matching at each position walks
+    one branch instead of trying every keyword in turn (scales to thousands of keywords). A space in a
+    keyword matches any run of whitespace.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of word
+
+    def build(node: Dict) -> str:
+        ends = "" in node
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child) for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if ends else body
+
+    return build(trie)
+
+
+class KeywordScorer:
+    """
+    Weighted, categorized keyword matching over a text column with one compiled regex.\n
+    Each text is scanned once (`str.findall`); hits are then counted per category and weighted in
+    bulk. A keyword counts once per text however often it occurs, and only as a whole word
+    (optionally pluralized), so "space" no longer matches "workspace". The regex is a trie-factored
+    alternation from `TRIE_MIN_KEYWORDS` keywords up (`trie=None`), where it is the faster of the two.
+    A text is `related` when one of its keywords weighs at least `min_weight`.
+    """
+
+    def __init__(
+        self,
+        taxonomy: Dict[str, Dict[str, float]],
+        trie: Optional[bool] = None,
+        min_weight: float = DEFENSE_MIN_WEIGHT,
+    ):
+        self.taxonomy = taxonomy
+        self.min_weight = min_weight
+        self.categories = list(taxonomy)
+        self.keywords: List[str] = []
+        keyword_category, weights = [], []
+        for ci, (category, keywords) in enumerate(taxonomy.items()):
+            for keyword, weight in keywords.items():
+                keyword = " ".join(keyword.lower().split())
+                if keyword in self.keywords:
+                    raise ValueError(f"Keyword {keyword!r} appears in more than one category")
+                self.keywords.append(keyword)
+                keyword_category.append(ci)
+                weights.append(weight)
+        self._keyword_ids = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self._multiword = any(" " in keyword for keyword in self.keywords)
+        self._keyword_category = np.array(keyword_category, dtype=np.int64)
+        self._weights = np.array(weights, dtype=np.float64)
+        self.trie = len(self.keywords) >= TRIE_MIN_KEYWORDS if trie is None else trie
+        if self.trie:  # longest alternative wins at each position via the trie's greedy optional branches
+            alternation = trie_pattern(self.keywords)
+        else:  # longest first, for the same longest-match result
+            longest_first = sorted(self.keywords, key=len, reverse=True)
+            alternation = "|".join(re.escape(keyword).replace(r"\ ", r"\s+") for keyword in longest_first)
+        self.pattern = re.compile(rf"\b({alternation})(?:e?s)?\b")
+
+    def __repr__(self) -> str:
+        """Stable fingerprint of the taxonomy and pattern, so memoized stages see configuration changes."""
+        config = json.dumps({"taxonomy": self.taxonomy, "min_weight": self.min_weight}, sort_keys=True)
+        digest = hashlib.sha256(f"{config}\n{self.pattern.pattern}".encode()).hexdigest()[:16]
+        return f"KeywordScorer({digest})"
+
+    def matches(self, text: Optional[str]) -> List[str]:
+        """Distinct keywords found in one text, in order of first occurrence."""
+        hits = (" ".join(hit.split()) for hit in self.pattern.findall((text or "").lower()))
+        return list(dict.fromkeys(hits))
+
+    def score(self, texts: pd.Series) -> pd.DataFrame:
+        """
+        Per text: `keyword_count` (distinct keywords), weighted `score`, `related` (a keyword of at least
+        `min_weight` matched) and one distinct-keyword count column per category, aligned to `texts.index`.
+        """
+        # positional index, so hits map back to rows even when `texts.index` has duplicate labels
+        hits = texts.reset_index(drop=True).fillna("").str.lower().str.findall(self.pattern).explode().dropna()
+        if self._multiword:  # "guided\n missile" -> "guided missile"
+            hits = hits.str.split().str.join(" ")
+
+        # distinct (row, keyword) pairs, packed into one integer each for a flat unique
+        width = len(self.keywords)
+        rows = hits.index.to_numpy(dtype=np.int64)
+        pairs = np.unique(rows * width + hits.map(self._keyword_ids).to_numpy(dtype=np.int64))
+        rows, keyword_ids = np.divmod(pairs, width)
+
+        n = len(texts)
+        counts = np.zeros((n, len(self.categories)), dtype=np.int64)
+        np.add.at(counts, (rows, self._keyword_category[keyword_ids]), 1)
+        scores = np.bincount(rows, weights=self._weights[keyword_ids], minlength=n)
+        strongest = np.zeros(n)
+        np.maximum.at(strongest, rows, self._weights[keyword_ids])
+
+        result = pd.DataFrame(counts, index=texts.index, columns=self.categories)
+        result.insert(0, "keyword_count", counts.sum(axis=1))
+        result.insert(1, "score", np.round(scores, 4))
+        result.insert(2, "related", strongest >= self.min_weight)
+        return result
@@ -0,0 +1,108 @@
+from typing import Dict
+import time
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.routing import Match
+
+# pipeline: last run of each stage (in this process, or in the rebuild job whose snapshot it loaded)
+STAGE_SECONDS = Gauge(
+    "naics_pipeline_stage_seconds", "Duration of the last run of a pipeline stage", ["stage", "action"]
+)
+STAGE_ROWS = Gauge("naics_pipeline_stage_rows", "Rows output by the last run of a pipeline stage", ["stage"])
+STAGE_RUNS = Counter("naics_pipeline_stage_runs_total", "Pipeline stage executions", ["stage", "action"])
+
+# resident snapshot
+CACHE_LOOKUPS = Counter(
+    "naics_snapshot_cache_total", "Snapshot cache lookups, by result (hit, miss, expired)", ["result"]
+)
+SNAPSHOT_AGE = Gauge("naics_snapshot_age_seconds", "Seconds since the resident snapshot was processed")
+
+# HTTP, per route template
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency until the response body is sent",
+    ["method", "route", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests being served", ["method", "route"])
+
+
+def record_pipeline(stats: Dict[str, Dict]):
+    """Per-stage metrics from a pipeline run's `stats` (`Pipeline.stats`, or as reported by a rebuild job)."""
+    for stage, stat in stats.items():
+        STAGE_SECONDS.labels(stage, stat["action"]).set(stat["seconds"])
+        STAGE_RUNS.labels(stage, stat["action"]).inc()
+        if stat.get("rows") is not None:
+            STAGE_ROWS.labels(stage).set(stat["rows"])
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every request and counting those in flight, labelled by route template
+    (`/naics/codes/{naics_code}`, not the raw path, so series stay bounded).\n
+    - a path's route is resolved once and remembered (up to `max_paths` paths, then the memo restarts)
+    - labelled children are cached too, so a request costs two dict lookups, a gauge inc/dec and an observe
+    """
+
+    def __init__(self, app, max_paths: int = 10000):
+        self.app = app
+        self.max_paths = max_paths
+        self._routes: Dict[tuple, str] = {}
+        self._in_progress: Dict[tuple, Gauge] = {}
+        self._latency: Dict[tuple, Histogram] = {}
+
+    def _route(self, scope) -> str:
+        key = (scope["method"], scope["path"])
+        route = self._routes.get(key)
+        if route is None:
+            fallback = "unmatched"
+            for candidate in scope["app"].router.routes:
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    route = candidate.path
+                    break
+                if match == Match.PARTIAL and fallback == "unmatched":  # path matches, method doesn't (405)
+                    fallback = candidate.path
+            route = route or fallback
+            if len(self._routes) >= self.max_paths:
+                self._routes.clear()
+            self._routes[key] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        method, route = scope["method"], self._route(scope)
+        in_progress = self._in_progress.get((method, route))
+        if in_progress is None:
+            in_progress = self._in_progress[(method, route)] = REQUESTS_IN_PROGRESS.labels(method, route)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            key = (method, route, status)
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = REQUEST_SECONDS.labels(method, route, str(status))
+            latency.observe(time.perf_counter() - start)
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus exposition of the pipeline, snapshot cache and HTTP metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,13 +1,39 @@
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Literal, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
+import pyarrow as pa
 import pandas as pd
 import numpy as np
-import requests, warnings, json, io
-
-from fastapi import APIRouter, HTTPException, Response
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+import orjson
+import threading, warnings, json, os, time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from core.caching import CacheValidators
+from core.cube import DIMENSIONS, AggregateCube, measure_frame
+from core.downloads import SourceDownloader
+from core.exports import MEDIA_TYPES, STREAMERS, gzip_stream, select_columns
+from core.graph import CrossRefGraph
+from core.jobs import RebuildParams, get_job_runner
+from core.keywords import DEFENSE_TAXONOMY, HIGH_DEFENSE_SCORE, KeywordScorer
+from core.metrics import CACHE_LOOKUPS, SNAPSHOT_AGE, record_pipeline
+from core.pagination import CursorError, decode_cursor, encode_cursor, filter_fingerprint
+from core.search import BM25Index, fuzzy_search, reciprocal_rank_fusion
+from core.snapshot import NAICSSnapshot, generation_for
+from core.pipeline import Pipeline, ProgressCallback, Stage
+from core.processes import worker_context
+from core.refresh import RefreshCoordinator
+from core.records import RecordFields, native_columns, records_from_columns, table_from_columns
+from core.responses import encoded_response
+from core.storage import SnapshotStore, file_sha256, frame_from_ipc, frame_to_ipc
+from core.vectors import DenseIndex
 
 warnings.filterwarnings("ignore")
 
@@ -40,6 +66,23 @@ def zero_pad(code):
     return s.ljust(6, "0") if s.isdigit() else None
 
 
+class HopQuery(BaseModel):
+    codes: List[str]
+    hops: int = 1
+    direction: Literal["out", "in", "both"] = "both"
+
+
+class VectorQuery(BaseModel):
+    vector: List[float]
+    limit: int = 10
+    mode: Literal["exact", "ivf"] = "exact"
+    nprobe: int = Field(8, ge=1)  # IVF lists scanned per query, clamped to the index's list count
+    q: Optional[str] = None  # optional lexical query, fused with the vector ranking via RRF
+    lexical: List[Literal["bm25", "fuzzy"]] = ["bm25"]
+    depth: int = 100  # candidates taken from each ranking before fusion
+    rrf_k: int = 60
+
+
 class NAICSResponse(BaseModel):
     success: bool
     message: str
@@ -48,34 +91,84 @@ class NAICSResponse(BaseModel):
 
 
 class NAICSProcessor:
-    def __init__(self):
-        core_dir = Path(__file__).resolve().parent
-        self.data_dir = core_dir / "data"
+    # file key -> loader; each returns one cleaned DataFrame, so it can be cached and sent between processes
+    LOADERS = {
+        "2_6_digit_codes": "_load_2_6_digit_codes",
+        "descriptions": "_load_descriptions",
+        "structure": "_load_structure",
+        "cross_references": "_load_cross_references",
+        "sba_size_standards": "_load_sba_size_standards",
+    }
+    # code record field -> (merged frame column, default if the column is missing)
+    RECORD_FIELDS: RecordFields = {
+        "code": ("naics_code", None),
+        "title": ("title", ""),
+        "description": ("description", None),
+        "level": ("level", None),
+        "sector": ("sector", None),
+        "trilateral": ("trilateral", False),
+        "size_standard_metric": ("size_standard_metric", None),
+        "size_standard_max": ("size_standard_max", None),
+        "related_codes": ("related_codes", None),
+        "cross_ref_count": ("cross_ref_count", None),
+        "defense_related": ("defense_related", None),
+        "defense_keyword_count": ("defense_keyword_count", None),
+        "defense_score": ("defense_score", None),
+        "defense_categories": ("defense_categories", None),
+        "validated": ("validated", True),
+        "change_indicator": ("change_indicator", None),
+        "source": ("source", None),
+    }
+
+    def __init__(self, data_dir: Optional[Path] = None):
+        self.data_dir = Path(data_dir) if data_dir else Path(__file__).resolve().parent / "data"
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
         self.files = {
             "2_6_digit_codes": {
                 "url": "https://www.census.gov/naics/2022NAICS/2-6%20digit_2022_Codes.xlsx",
                 "filename": "2-6 digit_2022_Codes.xlsx",
+                "parse_version": 1,
             },
             "descriptions": {
                 "url": "https://www.census.gov/naics/2022NAICS/2022_NAICS_Descriptions.xlsx",
                 "filename": "2022_NAICS_Descriptions.xlsx",
+                "parse_version": 1,
             },
             "structure": {
                 "url": "https://www.census.gov/naics/2022NAICS/2022_NAICS_Structure.xlsx",
                 "filename": "2022_NAICS_Structure.xlsx",
+                "parse_version": 1,
             },
             "cross_references": {
                 "url": "https://www.census.gov/naics/2022NAICS/2022_NAICS_Cross_References.xlsx",
                 "filename": "2022_NAICS_Cross_References.xlsx",
+                "parse_version": 1,
             },
             "sba_size_standards": {
                 "url": "https://data.sba.gov/dataset/c17e8870-fa85-48a4-8887-9a51b7503711/resource/2f56c7b6-715f-41f5-a470-2ee124af146a/download/sba-table-of-size-standards_effective-march-17-2023_v0.xlsx",
                 "filename": "sba-table-of-size-standards_effective-march-17-2023_v0.xlsx",
+                "parse_version": 1,
             },
         }
-        self.cache_file = self.data_dir / "naics_lookups.json"
+        self.cache_file = self.data_dir / "naics_lookups.json"  # legacy JSON cache; read only to migrate it
+        self.store = SnapshotStore(self.data_dir / "snapshot")  # columnar snapshot the serving path loads
+        self.embeddings_file = self.data_dir / "naics_embeddings.npy"  # optional, rows in snapshot code order
+        # per-stage memos (see `build_pipeline`); bump a file's `parse_version` when its loader's output
+        # changes in a way the loader's own code hash can't see
+        self.pipeline_dir = self.data_dir / "pipeline"
+        self.pipeline_stats: Dict[str, Dict] = {}  # last run's per-stage action, seconds, reason and rows
+        self.load_workers = min(len(self.files), os.cpu_count() or 1)  # parsing processes, <= 1 is serial
+        self.downloader = SourceDownloader()
+        self.download_report: Dict[str, Dict] = {}  # last run's per-file status, bytes, seconds, attempts
+        # weighted defense taxonomy; swap in another scorer to re-score (its fingerprint keys the stage memo)
+        self.keyword_scorer = KeywordScorer(DEFENSE_TAXONOMY)
+
+        # resident snapshot, swapped atomically on rebuild or manifest change
+        self._snapshot: Optional[NAICSSnapshot] = None
+        self._snapshot_lock = threading.Lock()
+        self._mtime_checked_at = 0.0
+        self.mtime_check_interval = 5.0  # seconds between manifest mtime checks
 
         # cleanup functions
         self.zero_pad = zero_pad
@@ -97,11 +190,17 @@ class NAICSProcessor:
             return None
         return obj
 
-    def _load_valid_cache(self) -> dict | None:
-        """Loads data from the cache file if it exists, is valid, has not expired, and meets dataviz requirements."""
+    @property
+    def ready(self) -> bool:
+        """True once a snapshot and its derived lookups are resident in memory."""
+        return self._snapshot is not None
+
+    def _read_cache_file(self) -> tuple[dict, float] | None:
+        """Read and parse the cache file, returning `(data, mtime)` or None if missing/invalid."""
         if not self.cache_file.exists():
             return None
         try:
+            mtime = self.cache_file.stat().st_mtime
             with open(self.cache_file, "r") as f:
                 cached_data = json.load(f)
 
@@ -109,75 +208,257 @@ class NAICSProcessor:
             if not isinstance(cached_data, dict):
                 print("Cache is malformed. Reprocessing.")
                 return None
-
-            # expired check
-            if datetime.now().timestamp() - cached_data.get("timestamp", 0) > 604800:
-                print("Cache has expired. Reprocessing.")
-                return None
-            print("Returning valid data from cache.")
-            return cached_data
+            return cached_data, mtime
         except (json.JSONDecodeError, FileNotFoundError):
             print("Cache is corrupted or missing. Reprocessing.")
             return None
 
-    def process_and_cache(self) -> Dict:
-        """Performs full data processing pipeline and caches the result."""
-        download_status = self.download_files()
+    def _load_artifact(self, loader, path: Path):
+        """Load an index persisted alongside the snapshot (graph, BM25, embeddings), if any."""
+        if not path.exists():
+            return None
+        try:
+            return loader(path)
+        except Exception as e:
+            print(f"Warning: Failed to load {path.name}: {e}")
+            return None
+
+    def _source_hashes(self) -> Dict[str, str]:
+        """SHA-256 of each downloaded source workbook, recorded in the snapshot manifest."""
+        hashes = {}
+        for name, file_info in self.files.items():
+            file_path = self.data_dir / file_info["filename"]
+            if file_path.exists():
+                hashes[name] = file_sha256(file_path)
+        return hashes
+
+    def _install_snapshot(
+        self,
+        data: dict,
+        mtime: float,
+        graph: CrossRefGraph | None = None,
+        bm25: BM25Index | None = None,
+        records: pa.Table | None = None,
+        cube: AggregateCube | None = None,
+    ) -> NAICSSnapshot:
+        """Build a snapshot off to the side, then swap it in with a single reference assignment."""
+        dense = self._load_artifact(DenseIndex.load, self.embeddings_file)
+        snapshot = NAICSSnapshot.from_cache(
+            data, mtime, graph=graph, bm25=bm25, dense=dense, records=records, cube=cube
+        )
+        return self._swap_snapshot(snapshot)
+
+    def _swap_snapshot(self, snapshot: NAICSSnapshot) -> NAICSSnapshot:
+        with self._snapshot_lock:
+            self._snapshot = snapshot
+            self._mtime_checked_at = datetime.now().timestamp()
+        print(f"Snapshot {snapshot.generation} resident ({len(snapshot.codes)} codes).")
+        return snapshot
+
+    def _migrate_json_cache(self) -> NAICSSnapshot | None:
+        """Convert a legacy JSON cache into the columnar snapshot store, then serve it."""
+        cached = self._read_cache_file()
+        if cached is None:
+            return None
+        data, _ = cached
+        print(f"Migrating {self.cache_file.name} to columnar snapshot.")
+        dense = self._load_artifact(DenseIndex.load, self.embeddings_file)
+        snapshot = NAICSSnapshot.from_cache(data, dense=dense)
+        try:
+            artifacts = {"graph": snapshot.graph, "bm25": snapshot.bm25, "cube": snapshot.cube}
+            self.store.write(data, snapshot.records, {k: v for k, v in artifacts.items() if v is not None}, {})
+        except Exception as e:
+            print(f"Warning: Failed to write snapshot: {e}")
+        return self._swap_snapshot(replace(snapshot, mtime=self.store.manifest_mtime()))
+
+    def load_snapshot(self) -> NAICSSnapshot | None:
+        """(Re)load the resident snapshot from the columnar store, regardless of expiry."""
+        manifest = self.store.read_manifest()
+        if manifest is None:
+            return self._migrate_json_cache()
+        mtime = self.store.manifest_mtime()
+        try:
+            data, records = self.store.load(manifest)
+        except (OSError, KeyError, pa.ArrowInvalid, json.JSONDecodeError) as e:
+            print(f"Snapshot {manifest.get('generation')} is unreadable ({e}). Falling back to JSON cache.")
+            return self._migrate_json_cache()
+
+        artifacts = {
+            name: self._load_artifact(loader, self.store.path(manifest, name))
+            for name, loader in (("graph", CrossRefGraph.load), ("bm25", BM25Index.load), ("cube", AggregateCube.load))
+            if name in manifest["files"]
+        }
+        return self._install_snapshot(data, mtime, records=records, **artifacts)
+
+    def get_snapshot(self) -> NAICSSnapshot | None:
+        """Return the resident snapshot, reloading it if the manifest was rewritten out-of-process."""
+        snapshot = self._snapshot
+        now = datetime.now().timestamp()
+        if snapshot is not None and now - self._mtime_checked_at < self.mtime_check_interval:
+            return snapshot
+
+        self._mtime_checked_at = now
+        mtime = self.store.manifest_mtime()
+        if snapshot is None or (mtime and mtime != snapshot.mtime):
+            return self.load_snapshot() or snapshot
+        return snapshot
+
+    def process_and_cache(
+        self,
+        progress: Optional[ProgressCallback] = None,
+        download: bool = True,
+        install: bool = True,
+    ) -> Dict:
+        """
+        Performs full data processing pipeline, caches the result and swaps in a new snapshot.
+
+        `download=False` rebuilds from the workbooks already on disk; `install=False` only writes the
+        snapshot store (for a job process, whose caller loads it from there).
+        """
+        if progress:
+            progress("download", "running")
+        if download:
+            download_status = self.download_files()
+        else:
+            download_status = {name: (self.data_dir / info["filename"]).exists() for name, info in self.files.items()}
+        if progress:
+            progress("download", "done")
         if not all(download_status.values()):
             raise Exception(f"Failed to download files: {download_status}")
 
-        df = self.load_naics_data()
-        lookups = self.generate_lookups(df)
+        outputs = self.run_pipeline(["defense_analysis", "aggregate_cube", "lookups"], progress)
+        df, lookups = outputs["defense_analysis"], outputs["lookups"]
 
-        # cache and return results
+        # cache and return results; stamped here since the lookups stage may be served from its memo
+        timestamp = datetime.now().timestamp()
+        metadata = {**lookups.get("metadata", {}), "processed_at": datetime.fromtimestamp(timestamp).isoformat()}
+        lookups = {**lookups, "metadata": metadata}
         result = {
             "lookups": lookups,
             "download_status": download_status,
-            "timestamp": datetime.now().timestamp(),
-            "expires_at": datetime.now().timestamp() + 604800,  # 7-day expiry
+            "timestamp": timestamp,
+            "expires_at": timestamp + 604800,  # 7-day expiry
         }
+        generation = generation_for(timestamp)
+        graph = CrossRefGraph.from_related_codes(df, generation=generation)
+        bm25 = BM25Index.build(
+            {
+                "title": df["title"].fillna("").tolist(),
+                "description": df["description"].fillna("").tolist(),
+                "cross_refs": df["xref_text"].tolist(),
+            },
+            generation=generation,
+        )
+        cube = outputs["aggregate_cube"]
+        cube.generation = generation
+        records = table_from_columns(native_columns(df, self.RECORD_FIELDS))
+        artifacts = {"graph": graph, "bm25": bm25, "cube": cube}
         try:
-            print(f"New cache file: {self.cache_file}")
-            with open(self.cache_file, "w") as f:
-                json.dump(result, f, indent=2)
+            # the manifest is replaced last, so readers only ever see a complete generation
+            manifest = self.store.write(result, records, artifacts, self._source_hashes())
+            print(f"New snapshot: {self.store.root / manifest['generation']}")
         except Exception as e:
-            print(f"Warning: Failed to write to cache: {e}")
+            print(f"Warning: Failed to write snapshot: {e}")
+
+        # pin the snapshot to the manifest on disk now so the mtime check doesn't swap it back out
+        if install:
+            self._install_snapshot(result, self.store.manifest_mtime(), records=records, **artifacts)
         print("✔ Lookup map processing complete.")
         return result
 
     def download_files(self) -> Dict[str, bool]:
-        """Download only essential NAICS files for lookup generation"""
-        results = {}
-        for name, file_info in self.files.items():
-            url = file_info["url"]
-            filename = file_info["filename"]
-            file_path = self.data_dir / filename
+        """Download (or revalidate) only essential NAICS files for lookup generation"""
+        sources = {name: (info["url"], self.data_dir / info["filename"]) for name, info in self.files.items()}
+        self.download_report = self.downloader.download(sources)
 
-            # check for existing copy
-            if file_path.exists():
-                results[name] = True
-                continue
-            try:  # download from source
-                response = requests.get(url, timeout=30)
-                response.raise_for_status()
-                with open(file_path, "wb") as f:
-                    f.write(response.content)
-                results[name] = True
-            except Exception as e:
-                results[name] = False
-                print(f"Failed to download {filename}: {e}")
+        results = {}
+        for name, report in self.download_report.items():
+            results[name] = report["status"] != "failed"
+            filename = self.files[name]["filename"]
+            if report["status"] == "downloaded":
+                print(f"Downloaded {filename}: {report['bytes']:,} bytes in {report['seconds']:.2f}s.")
+            elif report["status"] == "not_modified":
+                print(f"{filename}: not modified.")
+            elif report["status"] == "stale":
+                print(f"Failed to refresh {filename} ({report['error']}), keeping existing copy.")
+            else:
+                print(f"Failed to download {filename}: {report['error']}")
         return results
 
     def load_naics_data(self):
         """Load, process, and merge all NAICS data"""
-        descript_df = self._load_descriptions()  # core descriptions
-        codes_df = self._load_2_6_digit_codes()  # 2-6 digit NAICS codes for validation
-        struct_df = self._load_structure()  # detailed hierarchy and metadata
-        xref_map, xref_df = self._load_cross_references()  # cross references for relationship mapping
-        sba_df = self._load_sba_size_standards()
+        return self.run_pipeline(["defense_analysis"])["defense_analysis"]
 
-        df = self._merge_naics_data(descript_df, codes_df, struct_df, xref_map, xref_df, sba_df)
-        return df
+    def build_pipeline(self) -> Pipeline:
+        """
+        Processing DAG from source workbooks to lookups. Every stage is memoized by its inputs and
+        code, so e.g. a new SBA workbook only re-runs its loader, the size standards merge and below.
+        """
+        stages = [
+            Stage(
+                f"load_{file_key}",
+                partial(getattr(self, self.LOADERS[file_key]), file_key),
+                sources=(self.data_dir / meta["filename"],),
+                version=meta["parse_version"],
+                parallel=True,
+            )
+            for file_key, meta in self.files.items()
+        ]
+        census = ("load_descriptions", "load_2_6_digit_codes", "load_structure", "load_cross_references")
+        size_standards = ("merge_naics", "load_sba_size_standards")
+        stages += [
+            Stage("merge_naics", self._merge_naics_data, census),
+            Stage("merge_size_standards", self._merge_size_standards, size_standards),
+            Stage(
+                "defense_analysis",
+                partial(self._add_defense_analysis, self.keyword_scorer),
+                ("merge_size_standards",),
+            ),
+            Stage("aggregate_cube", self._build_aggregate_cube, ("defense_analysis",)),
+            Stage("network_analysis", self._analyze_cross_ref_networks, ("defense_analysis", "aggregate_cube")),
+            Stage("lookups", self.generate_lookups, ("defense_analysis", "network_analysis")),
+        ]
+        parallel = self._run_loaders_in_pool if self.load_workers > 1 else None
+        return Pipeline(stages, self.pipeline_dir, parallel=parallel)
+
+    def run_pipeline(self, targets: List[str], progress: Optional[ProgressCallback] = None) -> Dict:
+        pipeline = self.build_pipeline()
+        outputs = pipeline.run(targets, progress)
+        self.pipeline_stats = pipeline.stats
+        record_pipeline(pipeline.stats)
+        print(pipeline.report())
+        return outputs
+
+    def plan_pipeline(self) -> List[Dict]:
+        """Dry run of a refresh against the workbooks on disk: which stages would execute, and why."""
+        plan = self.build_pipeline().plan(["defense_analysis", "lookups"])
+        print(Pipeline.format_plan(plan))
+        return plan
+
+    def _run_loaders_in_pool(self, stages: List[Stage]) -> Dict[str, tuple[pd.DataFrame, float]]:
+        """
+        Parse source workbooks in a process pool of `load_workers` processes, each frame returned to the
+        parent as an Arrow IPC buffer. Returns nothing (the pipeline then runs them serially) if the
+        pool cannot start.
+        """
+        try:
+            context = worker_context()
+            workers = min(self.load_workers, len(stages))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                futures = {
+                    stage.name: pool.submit(_parse_source, str(self.data_dir), stage.fn.args[0])
+                    for stage in stages
+                }
+                parsed = {name: future.result() for name, future in futures.items()}
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Warning: Process pool unavailable ({e}), loading sources serially.")
+            return {}
+        return {name: (frame_from_ipc(buffer), seconds) for name, (buffer, seconds) in parsed.items()}
+
+    def _parse_source(self, file_key: str) -> tuple[pd.DataFrame, float]:
+        start = time.perf_counter()
+        df = getattr(self, self.LOADERS[file_key])(file_key)
+        return df, time.perf_counter() - start
 
     def _find_col(self, df: pd.DataFrame, matches: List[str], fallback_idx: int):
         """Helper function to find first column whose name contains any of `matches` (case-insensitive)."""
@@ -421,11 +702,24 @@ class NAICSProcessor:
 
         return pd.DataFrame()
 
-    def _load_cross_references(self, file_key: str = "cross_references"):
+    def _split_cross_references(self, xref_text: pd.DataFrame):
         """
-        Load NAICS Industry Cross-References excel sheet to build:
+        Split parsed NAICS Industry Cross-References into:
         - relationship mapping (code -> list of related codes)
-        - complete cross-reference bullet texts missing from descriptions\n
+        - complete cross-reference bullet texts missing from descriptions
+        """
+        if xref_text.empty:
+            return {}, xref_text
+
+        # list columns come back from Arrow (cache, worker buffers) as arrays
+        pairs = zip(xref_text["naics_code"], xref_text["related_codes"])
+        mapping = {code: list(refs) for code, refs in pairs if len(refs)}
+        return mapping, xref_text.drop(columns="related_codes")
+
+    def _load_cross_references(self, file_key: str = "cross_references") -> pd.DataFrame:
+        """
+        Load NAICS Industry Cross-References excel sheet into one row per code with its bullet text
+        and `related_codes` list (see `_split_cross_references`).\n
         cols: `Code` | `Cross-Reference`
         """
         meta = self.files[file_key]
@@ -434,7 +728,7 @@ class NAICSProcessor:
 
         if not file_path.exists():
             print("Warning: Cross-references file not found, skipping...")
-            return {}, pd.DataFrame()
+            return pd.DataFrame()
 
         df = pd.read_excel(file_path, dtype=str).rename(columns=str.lower)
 
@@ -443,7 +737,7 @@ class NAICSProcessor:
         xref_col = self._find_col(df, ["cross"], 1)
         if not code_col or not xref_col:
             print("Warning: Required columns not found in cross-references")
-            return {}, pd.DataFrame()
+            return pd.DataFrame()
 
         # standardize to zero-padded NAICS codes
         df["naics_code"] = df[code_col].apply(self.zero_pad)
@@ -453,17 +747,13 @@ class NAICSProcessor:
 
         # extract all potential NAICS (4-6 digit) codes from reference text
         naics_regex = r"\b(\d{4,6})\b"
-        df["ref_codes"] = (
-            df["ref_text"].str.findall(naics_regex).apply(lambda codes: [self.zero_pad(c) for c in codes])
-        )
+        df["ref_codes"] = df["ref_text"].str.findall(naics_regex)
 
-        mapping = {}
-        for naics_code, group in df.groupby("naics_code"):
-            all_refs = set()
-            for ref_list in group["ref_codes"]:
-                all_refs.update(ref_list)
-            all_refs.discard(naics_code)  # remove self-references
-            mapping[naics_code] = sorted(all_refs)
+        # one row per (code, referenced code) edge, right-padded like `zero_pad`, minus self-references
+        edges = df[["naics_code", "ref_codes"]].explode("ref_codes").dropna()
+        edges["ref_codes"] = edges["ref_codes"].str.ljust(6, "0")
+        edges = edges[edges["ref_codes"] != edges["naics_code"]].drop_duplicates()
+        mapping = edges.sort_values("ref_codes").groupby("naics_code")["ref_codes"].agg(list).to_dict()
 
         # build full cross-reference text for descriptions, grouping bullets for each NAICS
         xref_text = (
@@ -472,10 +762,12 @@ class NAICSProcessor:
             .reset_index()
             .rename(columns={"ref_text": "xref_bullets"})
         )
+        related = xref_text["naics_code"].map(mapping)
+        xref_text["related_codes"] = related.apply(lambda x: x if isinstance(x, list) else [])
         xref_text["source"] = meta["url"]
 
         print(f"{filename}: loaded {len(mapping)} total references.")
-        return mapping, xref_text
+        return xref_text
 
     def _append_cross_reference_bullets(self, descript_df: pd.DataFrame, crossref_df: pd.DataFrame):
         """
@@ -487,10 +779,10 @@ class NAICSProcessor:
             crossref_df: DataFrame with naics_code and xref_bullets columns
 
         Returns:
-            DataFrame with updated descriptions
+            DataFrame with updated descriptions and the raw bullets kept as `xref_text` (for retrieval)
         """
         if crossref_df.empty:
-            return descript_df
+            return descript_df.assign(xref_text="")
 
         df = descript_df.copy()
 
@@ -509,7 +801,8 @@ class NAICSProcessor:
             df.loc[should_append, "description"] + "\n" + df.loc[should_append, "xref_bullets"]
         )
 
-        df = df.drop(columns=["xref_bullets"])  # clean up temporary column
+        df = df.rename(columns={"xref_bullets": "xref_text"})
+        df["xref_text"] = df["xref_text"].fillna("")
 
         appended_count = should_append.sum()
         if appended_count > 0:
@@ -522,11 +815,11 @@ class NAICSProcessor:
         descript_df: pd.DataFrame,
         codes_df: pd.DataFrame,
         structure_df: pd.DataFrame,
-        cross_refs: Dict[str, list],
-        xref_df: pd.DataFrame,
-        sba_df: pd.DataFrame,
+        xref_text: pd.DataFrame,
     ):
-        """Merge all NAICS data sources into comprehensive dataset"""
+        """Merge the census NAICS sources (descriptions, codes, structure, cross-references) into one dataset"""
+        cross_refs, xref_df = self._split_cross_references(xref_text)
+
         # FIRST: appending missing cross-reference bullet texts to descriptions
         df = self._append_cross_reference_bullets(descript_df, xref_df)
 
@@ -557,12 +850,6 @@ class NAICSProcessor:
             ]
             df["has_change_indicator"] = False if not change_cols else ~df[change_cols].isna().all(axis=1)
 
-        # SBA size standards
-        if not sba_df.empty:
-            df = df.merge(sba_df, on="naics_code", how="left")
-        else:
-            df[["size_standard_metric", "size_standard_max"]] = None
-
         # sector info
         df["sector"] = df["naics_code"].str.rstrip("0").str[:2]
 
@@ -572,73 +859,38 @@ class NAICSProcessor:
         )
         df["cross_ref_count"] = df["related_codes"].str.len()
         df["has_cross_refs"] = df["cross_ref_count"] > 0
+        return df
 
-        # add defense analysis with enhanced keywords
-        defense_keywords = [
-            "defense",
-            "military",
-            "aerospace",
-            "aircraft",
-            "missile",
-            "radar",
-            "cybersecurity",
-            "security",
-            "intelligence",
-            "surveillance",
-            "communication",
-            "electronics",
-            "computer",
-            "software",
-            "systems",
-            "research",
-            "development",
-            "engineering",
-            "consulting",
-            "professional",
-            "weapons",
-            "ammunition",
-            "naval",
-            "marine",
-            "aviation",
-            "space",
-            "technology",
-            "manufacturing",
-            "testing",
-            "training",
-            "logistics",
-            "maintenance",
-            "repair",
-            "support",
-            "services",
-        ]
-        desc_lower = df["description"].fillna("").str.lower()
-        df["defense_keyword_count"] = desc_lower.apply(lambda txt: sum(k in txt for k in defense_keywords))
-        df["defense_related"] = df["defense_keyword_count"] > 0
+    def _merge_size_standards(self, df: pd.DataFrame, sba_df: pd.DataFrame):
+        """Attach SBA size standards to the merged NAICS dataset"""
+        if not sba_df.empty:
+            return df.merge(sba_df, on="naics_code", how="left")
+        df = df.copy()
+        df[["size_standard_metric", "size_standard_max"]] = None
+        return df
+
+    def _add_defense_analysis(self, scorer: KeywordScorer, df: pd.DataFrame):
+        """
+        Score descriptions against the weighted defense taxonomy in one vectorized pass.\n
+        - `defense_keyword_count`: distinct taxonomy keywords matched (whole words)
+        - `defense_score`: sum of matched keyword weights, what rankings, buckets and plots go by
+        - `defense_related`: a keyword of at least `DEFENSE_MIN_WEIGHT` matched, so generic words such as
+          "support services" alone don't make a code defense-related
+        - `defense_categories`: distinct matches per taxonomy category
+        """
+        df = df.copy()
+        scores = scorer.score(df["description"])
+        df["defense_keyword_count"] = scores["keyword_count"]
+        df["defense_score"] = scores["score"]
+        df["defense_related"] = scores["related"]
+        df["defense_categories"] = scores[scorer.categories].to_dict("records")
 
         return df
 
-    def generate_lookups(self, df: pd.DataFrame):
+    def generate_lookups(self, df: pd.DataFrame, relationship_analysis: Optional[Dict] = None):
         """Generate comprehensive, aggregation of NAICS code data as Python-native, lookup dictionary."""
-        naics_data = [
-            {
-                "code": row["naics_code"],
-                "title": row.get("title", ""),
-                "description": row["description"],
-                "level": row["level"],
-                "sector": row["sector"],
-                "trilateral": row.get("trilateral", False),
-                "size_standard_metric": row.get("size_standard_metric"),
-                "size_standard_max": row.get("size_standard_max"),
-                "related_codes": row["related_codes"],
-                "cross_ref_count": row["cross_ref_count"],
-                "defense_related": row["defense_related"],
-                "defense_keyword_count": row["defense_keyword_count"],
-                "validated": row.get("validated", True),
-                "change_indicator": row.get("change_indicator", None),
-                "source": row.get("source", None),
-            }
-            for _, row in df.iterrows()
-        ]
+        # converted once per column, then zipped into records; no per-row Series or recursive walk
+        naics_data = records_from_columns(native_columns(df, self.RECORD_FIELDS))
 
         # industry sector info with enhanced labels
         sectors = {
@@ -672,74 +924,93 @@ class NAICSProcessor:
         indexes = {
             "defense_codes": df.loc[df["defense_related"], "naics_code"].tolist(),
             "codes_with_cross_refs": df.loc[df["has_cross_refs"], "naics_code"].tolist(),
-            "high_defense_codes": df.loc[df["defense_keyword_count"] >= 3, "naics_code"].tolist(),
+            "high_defense_codes": df.loc[df["defense_score"] >= HIGH_DEFENSE_SCORE, "naics_code"].tolist(),
         }
         metadata = {
             "total_codes": int(len(df)),
             "defense_count": int(df["defense_related"].sum()),
             "avg_cross_refs": float(df["cross_ref_count"].mean()),
-            "sectors": sectors,
-            "processed_at": datetime.now().isoformat(),
+            "sectors": sectors,  # `processed_at` is stamped per run by `process_and_cache`, not memoized
         }
 
-        return self._to_native_py({
+        if relationship_analysis is None:
+            relationship_analysis = self._analyze_cross_ref_networks(df)
+        return {
             "naics": naics_data,  # array of complete objects
             "indexes": indexes,  # fast lookup arrays
             "metadata": metadata,  # summary stats
-            "relationship_analysis": self._analyze_cross_ref_networks(df),
-        })
+            "relationship_analysis": relationship_analysis,
+        }
+
+    def _build_aggregate_cube(self, df: pd.DataFrame) -> AggregateCube:
+        """Sector x level x defense x score-bucket aggregates of the analysed codes (see `AggregateCube`)."""
+        columns = ["naics_code", "sector", "level", "cross_ref_count", "defense_related", "defense_score"]
+        return AggregateCube.build(measure_frame(df[[c for c in columns if c in df.columns]]))
 
-    def _analyze_cross_ref_networks(self, df: pd.DataFrame) -> Dict:
-        """Analyze cross-reference networks for strategic insights"""
+    def _analyze_cross_ref_networks(self, df: pd.DataFrame, cube: Optional[AggregateCube] = None) -> Dict:
+        """Analyze cross-reference networks for strategic insights; sector rollups come from the cube"""
         # find most connected codes (potential hub industries)
         top_connected = df.nlargest(10, "cross_ref_count")[
             ["naics_code", "description", "cross_ref_count", "defense_related"]
         ].to_dict("records")
-
-        # find sectors with highest cross-ref density
-        sector_cross_refs = (
-            df.groupby("sector")
-            .agg({"cross_ref_count": ["mean", "sum", "count"], "defense_related": "sum"})
-            .round(2)
-        )
-
-        sector_analysis = []
-        for sector in sector_cross_refs.index:
-            sector_analysis.append({
-                "sector": sector,
-                "avg_cross_refs": sector_cross_refs.loc[sector, ("cross_ref_count", "mean")],
-                "total_cross_refs": sector_cross_refs.loc[sector, ("cross_ref_count", "sum")],
-                "code_count": sector_cross_refs.loc[sector, ("cross_ref_count", "count")],
-                "defense_codes": sector_cross_refs.loc[sector, ("defense_related", "sum")],
-            })
-
-        # sort by cross-ref density
-        sector_analysis = sorted(sector_analysis, key=lambda x: x["avg_cross_refs"], reverse=True)
-
-        # find potential partnership clusters
-        defense_clusters = (
-            df[df["defense_related"]]
-            .groupby("sector")
-            .agg({"naics_code": "count", "cross_ref_count": "mean"})
-            .sort_values("cross_ref_count", ascending=False)
-            .head(5)
-            .to_dict("index")
-        )
-
-        return {
-            "most_connected_codes": top_connected,
-            "sector_connectivity": sector_analysis[:15],  # Top 15 most connected sectors
-            "defense_partnership_clusters": defense_clusters,
-            "network_stats": {
-                "total_relationships": df["cross_ref_count"].sum(),
-                "avg_connections_per_code": df["cross_ref_count"].mean(),
-                "max_connections": df["cross_ref_count"].max(),
-                "codes_with_no_refs": len(df[df["cross_ref_count"] == 0]),
-            },
+        cube = cube if cube is not None else self._build_aggregate_cube(df)
+        # small summary of numpy aggregates; the only part of the lookups still walked recursively
+        return self._to_native_py(network_analysis(cube, top_connected))
+
+
+def network_analysis(cube: AggregateCube, most_connected: List[Dict]) -> Dict:
+    """Cross-reference network summary from the aggregate cube, around the precomputed hub codes"""
+    sectors = cube.rollup(["sector"])
+    defense = cube.rollup(["sector"], where={"defense_related": True})
+    defense_counts = defense["count"].reindex(sectors.index, fill_value=0)
+
+    # find sectors with highest cross-ref density
+    sector_analysis = [
+        {
+            "sector": sector,
+            "avg_cross_refs": round(float(row.cross_ref_count_mean), 2),
+            "total_cross_refs": int(row.cross_ref_count_sum),
+            "code_count": int(row.count),
+            "defense_codes": int(defense_counts[sector]),
         }
+        for sector, row in zip(sectors.index, sectors.itertuples(index=False))
+    ]
+    # sort by cross-ref density
+    sector_analysis = sorted(sector_analysis, key=lambda x: x["avg_cross_refs"], reverse=True)
+
+    # find potential partnership clusters
+    defense_clusters = (
+        defense.rename(columns={"count": "naics_code", "cross_ref_count_mean": "cross_ref_count"})
+        [["naics_code", "cross_ref_count"]]
+        .sort_values("cross_ref_count", ascending=False)
+        .head(5)
+        .astype(object)
+        .to_dict("index")
+    )
+
+    totals = cube.rollup().iloc[0]
+    return {
+        "most_connected_codes": most_connected,
+        "sector_connectivity": sector_analysis[:15],  # Top 15 most connected sectors
+        "defense_partnership_clusters": defense_clusters,
+        "network_stats": {
+            "total_relationships": int(totals["cross_ref_count_sum"]),
+            "avg_connections_per_code": float(totals["cross_ref_count_mean"]),
+            "max_connections": int(totals["cross_ref_count_max"]),
+            "codes_with_no_refs": int(cube.hists["cross_ref_count"][:, 0].sum()),  # first bin is exactly 0
+        },
+    }
 
 
 _processor = None  # global processor instance
+_refresher = None  # global refresh coordinator
+
+
+def _parse_source(data_dir: str, file_key: str) -> tuple[bytes, float]:
+    """Process pool entry point: parse one source workbook, returning its frame as an Arrow IPC buffer."""
+    processor = NAICSProcessor(Path(data_dir))
+    df, seconds = processor._parse_source(file_key)
+    return frame_to_ipc(df), seconds
 
 
 def get_processor() -> NAICSProcessor:
@@ -750,76 +1021,290 @@ def get_processor() -> NAICSProcessor:
     return _processor
 
 
+def rebuild_snapshot_job(progress: ProgressCallback, data_dir: Optional[str] = None, download: bool = True) -> Dict:
+    """Job process: run the pipeline and write a new snapshot generation (the API process then loads it)"""
+    processor = NAICSProcessor(data_dir)
+    result = processor.process_and_cache(progress, download=download, install=False)
+    metadata = result["lookups"].get("metadata", {})
+    return {
+        "generation": generation_for(result["timestamp"]),
+        "total_codes": metadata.get("total_codes"),
+        "defense_count": metadata.get("defense_count"),
+        "expires_at": result["expires_at"],
+        "pipeline": processor.pipeline_stats,
+    }
+
+
+def install_rebuild(job):
+    """API process, after a rebuild job: swap in the generation it wrote (and its stage metrics)"""
+    record_pipeline(job.result.get("pipeline", {}))
+    get_processor().load_snapshot()
+
+
+def export_job(
+    progress: ProgressCallback,
+    output_dir: str,
+    format: str = "parquet",
+    columns: Optional[str] = None,
+    gzip: bool = False,
+    data_dir: Optional[str] = None,
+) -> Dict:
+    """Job process: write a csv/parquet/arrow export of the current snapshot into `output_dir`"""
+    if format not in STREAMERS:
+        raise ValueError("Format must be 'csv', 'parquet' or 'arrow'")
+    progress("load", "running")
+    snapshot = NAICSProcessor(data_dir).load_snapshot()
+    if snapshot is None:
+        raise ValueError("NAICS data not processed yet")
+    selected = select_columns(format, snapshot.records, columns)
+    progress("load", "done")
+
+    progress("write", "running")
+    chunks = STREAMERS[format](snapshot.records, selected)
+    artifact = f"comprehensive_naics_data.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        chunks, artifact, media_type = gzip_stream(chunks), f"{artifact}.gz", "application/gzip"
+    size = 0
+    with open(Path(output_dir) / artifact, "wb") as f:
+        for chunk in chunks:
+            size += f.write(chunk)
+    progress("write", "done")
+    return {"generation": snapshot.generation, "artifact": artifact, "media_type": media_type, "bytes": size}
+
+
+REBUILD_TIMEOUT = 3600.0  # seconds a refresh waits on its rebuild job before cancelling it
+
+
+def _rebuild_as_job(timeout: float = REBUILD_TIMEOUT) -> Dict:
+    """
+    Rebuild the global processor's data dir in a job and wait for it; a job still running after
+    `timeout` is cancelled (TimeoutError)
+    """
+    runner = get_job_runner()
+    # the same params a client's rebuild gets, so the two share one single-flight job
+    job = runner.submit("rebuild", {**RebuildParams().model_dump(), "data_dir": str(get_processor().data_dir)})
+    try:
+        return job.wait(timeout)
+    except TimeoutError:
+        runner.cancel(job.id)
+        raise
+
+
+def get_refresher() -> RefreshCoordinator:
+    """Get or create the coordinator for rebuilds of the global processor's snapshot, run as jobs"""
+    global _refresher
+    if _refresher is None:
+        _refresher = RefreshCoordinator(_rebuild_as_job)
+    return _refresher
+
+
+def _snapshot_age() -> float:
+    """Seconds since the resident snapshot was processed (scrape time only; NaN without one)"""
+    snapshot = _processor._snapshot if _processor is not None else None
+    return float("nan") if snapshot is None else datetime.now().timestamp() - snapshot.timestamp
+
+
+SNAPSHOT_AGE.set_function(_snapshot_age)
+
+
+def snapshot_expires_at() -> float | None:
+    """Expiry of the resident snapshot (picking up another worker's rebuild), for the refresh scheduler"""
+    snapshot = get_processor().get_snapshot()
+    return None if snapshot is None else snapshot.expires_at
+
+
+def current_snapshot() -> NAICSSnapshot | None:
+    """Dependency resolving the resident snapshot, if any; resolved once per request and shared"""
+    return get_processor().get_snapshot()
+
+
+def require_snapshot(snapshot: NAICSSnapshot | None = Depends(current_snapshot)) -> NAICSSnapshot:
+    """Dependency resolving the resident snapshot for read endpoints"""
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="NAICS data not processed yet")
+    return snapshot
+
+
+# data changes at most weekly; clients may serve a stale copy while they revalidate with If-None-Match
+SNAPSHOT_CACHE = CacheValidators(max_age=3600, stale_while_revalidate=86400)
+SEARCH_CACHE = CacheValidators(max_age=300, stale_while_revalidate=3600)
+
+
+def validated(policy: CacheValidators, skip: Optional[Callable[[Request, NAICSSnapshot], bool]] = None):
+    """
+    Route dependency applying `policy` against the request's snapshot generation.\n
+    Answers a matching conditional request with 304 before the route runs; `skip(request, snapshot)`
+    opts a request out (e.g. one that will rebuild the snapshot).
+    """
+
+    def dependency(request: Request, snapshot: NAICSSnapshot | None = Depends(current_snapshot)):
+        if snapshot is not None and not (skip and skip(request, snapshot)):
+            policy.apply(request, snapshot.generation, snapshot.last_modified)
+
+    return Depends(dependency)
+
+
+def _rebuilds(request: Request, snapshot: NAICSSnapshot) -> bool:
+    """`/naics/data` requests that will wait for a rebuild rather than serve the resident generation"""
+    return request.query_params.get("force_refresh", "").lower() in ("1", "true")
+
+
 router = APIRouter(tags=["naics"])
 
 
-@router.get("/naics/codes")
+@router.get("/naics/ready")
+async def get_naics_ready(snapshot: NAICSSnapshot | None = Depends(current_snapshot)):
+    """Readiness probe: 200 once the snapshot and its derived lookups are warm, 503 otherwise"""
+    if snapshot is None:
+        return JSONResponse(status_code=503, content={"ready": False})
+    return JSONResponse(
+        content={
+            "ready": True,
+            "generation": snapshot.generation,
+            "total_codes": len(snapshot.codes),
+            "expired": snapshot.expired,
+        }
+    )
+
+
+def _ndjson_lines(codes: List[Dict], positions, chunk_bytes: int = 1 << 16):
+    """Serialize records one per line lazily, flushing in ~64 KiB chunks rather than one write per record."""
+    buffer, size = [], 0
+    for position in positions:
+        line = orjson.dumps(codes[position]) + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+@router.get("/naics/codes", dependencies=[validated(SNAPSHOT_CACHE)])
 async def get_naics_codes(
+    request: Request,
     defense_only: bool = False,
     sector: Optional[str] = None,
     min_cross_refs: int = 0,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    snapshot: NAICSSnapshot = Depends(require_snapshot),
 ):
-    """Get array of NAICS code objects with optional filters"""
-    try:
-        processor = get_processor()
-        if not processor.cache_file.exists():
-            raise HTTPException(status_code=404, detail="NAICS data not processed yet")
-
-        with open(processor.cache_file, "r") as f:
-            data = json.load(f)
+    """
+    Get NAICS code objects in code order, with optional filters.\n
+    - `limit` pages the result; pass the returned `next_cursor` back as `cursor` for the next page
+    - cursors hold the last code served, so they stay valid across snapshot generations (the page
+      after resumes at the next code); `generation_changed` flags a cursor from an older generation
+    - a cursor issued for different filters, or a malformed one, is a 400
+    - `Accept: application/x-ndjson` streams one record per line, with `X-Next-Cursor`,
+      `X-Generation` and `X-Generation-Changed` headers in place of the envelope
+    """
+    filters = filter_fingerprint({"defense_only": defense_only, "sector": sector, "min_cross_refs": min_cross_refs})
+    after, generation_changed = None, False
+    if cursor:
+        try:
+            token = decode_cursor(cursor, filters)
+        except CursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        after, generation_changed = token["after"], token.get("gen") != snapshot.generation
+
+    ndjson = "application/x-ndjson" in request.headers.get("accept", "")
+    filtered = defense_only or sector or min_cross_refs > 0
+    if not (filtered or limit or cursor or ndjson):  # the full listing is the same bytes all generation
+        return encoded_response(
+            request,
+            snapshot.encoded.get(
+                "codes",
+                lambda: {
+                    "codes": [snapshot.codes[position] for position in snapshot.pager.positions()],
+                    "count": len(snapshot.codes),
+                    "next_cursor": None,
+                    "generation": snapshot.generation,
+                    "generation_changed": False,
+                },
+            ),
+        )
 
-        codes = data.get("lookups", {}).get("codes", [])
+    try:
+        codes = snapshot.codes
+        where = None
+        if filtered:
+
+            def where(position: int) -> bool:
+                c = codes[position]
+                return (
+                    (not defense_only or bool(c.get("defense_related")))
+                    and (not sector or c.get("sector") == sector)
+                    and (min_cross_refs <= 0 or (c.get("cross_ref_count") or 0) >= min_cross_refs)
+                )
 
-        if defense_only:
-            codes = [c for c in codes if c.get("defense_related")]
-        if sector:
-            codes = [c for c in codes if c.get("sector") == sector]
-        if min_cross_refs > 0:
-            codes = [c for c in codes if c.get("cross_ref_count", 0) >= min_cross_refs]
+        next_cursor = None
+        if limit is None:
+            positions = snapshot.pager.positions(after, where)
+        else:
+            positions, more = snapshot.pager.page(limit, after, where)
+            if more:
+                next_cursor = encode_cursor(codes[positions[-1]]["code"], snapshot.generation, filters)
+
+        if ndjson:
+            headers = {"X-Generation": snapshot.generation, "X-Generation-Changed": str(generation_changed).lower()}
+            if next_cursor:
+                headers["X-Next-Cursor"] = next_cursor
+            return StreamingResponse(
+                _ndjson_lines(codes, positions), media_type="application/x-ndjson", headers=headers
+            )
 
-        return JSONResponse(content={"codes": codes, "count": len(codes)})
+        page = [codes[position] for position in positions]
+        return JSONResponse(
+            content={
+                "codes": page,
+                "count": len(page),
+                "next_cursor": next_cursor,
+                "generation": snapshot.generation,
+                "generation_changed": generation_changed,
+            }
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/naics/codes/{naics_code}")
-async def get_naics_code_detail(naics_code: str):
+@router.get("/naics/codes/{naics_code}", dependencies=[validated(SNAPSHOT_CACHE)])
+async def get_naics_code_detail(naics_code: str, snapshot: NAICSSnapshot = Depends(require_snapshot)):
     """Get single NAICS code with full details"""
-    try:
-        processor = get_processor()
-        if not processor.cache_file.exists():
-            raise HTTPException(status_code=404, detail="NAICS data not processed yet")
+    code_data = snapshot.by_code.get(naics_code)
+    if not code_data:
+        raise HTTPException(status_code=404, detail=f"NAICS code {naics_code} not found")
+    return JSONResponse(content=code_data)
 
-        with open(processor.cache_file, "r") as f:
-            data = json.load(f)
-
-        codes = data.get("lookups", {}).get("codes", [])
-        code_data = next((c for c in codes if c["code"] == naics_code), None)
-
-        if not code_data:
-            raise HTTPException(status_code=404, detail=f"NAICS code {naics_code} not found")
-        return JSONResponse(content=code_data)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/naics/data", dependencies=[validated(SNAPSHOT_CACHE, skip=_rebuilds)])
+async def get_naics_data(
+    request: Request, force_refresh: bool = False, snapshot: NAICSSnapshot | None = Depends(current_snapshot)
+):
+    """
+    Get comprehensive NAICS data aggregated in a lookup map.
 
-@router.get("/naics/data")
-async def get_naics_data(force_refresh: bool = False):
-    """Get comprehensive NAICS data aggregated in a lookup map."""
+    An expired snapshot is served as-is while a rebuild runs in the background; only `force_refresh`
+    or having no snapshot at all waits, on the single in-flight rebuild.
+    """
+    CACHE_LOOKUPS.labels("miss" if snapshot is None else "expired" if snapshot.expired else "hit").inc()
     try:
-        processor = get_processor()
-        data = None if force_refresh else processor._load_valid_cache()
-
-        if data is None:
-            data = processor.process_and_cache()
-
-        return NAICSResponse(
-            success=True,
-            message="NAICS data retrieved",
-            data=data,
+        refresher = get_refresher()
+        if force_refresh or snapshot is None:
+            await refresher.refresh("force_refresh" if force_refresh else "no snapshot")
+            snapshot = await run_in_threadpool(get_processor().get_snapshot)
+        elif snapshot.expired:
+            refresher.trigger("expired")
+
+        # the first request of a generation serializes and compresses the full payload, off the event loop
+        body = await run_in_threadpool(
+            snapshot.encoded.get,
+            "naics-data",
+            lambda: NAICSResponse(success=True, message="NAICS data retrieved", data=snapshot.payload()).model_dump(),
         )
+        return encoded_response(request, body)
     except Exception as e:
         import traceback
 
@@ -827,37 +1312,38 @@ async def get_naics_data(force_refresh: bool = False):
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
-@router.get("/stats")
-async def get_naics_stats():
-    """Get NAICS processing statistics"""
-    try:
-        processor = get_processor()
-        if not processor.cache_file.exists():
-            raise HTTPException(status_code=404, detail="NAICS data not processed yet. Call /process first.")
-        with open(processor.cache_file, "r") as f:
-            data = json.load(f)
+@router.get("/naics/data/status")
+async def get_naics_data_status(snapshot: NAICSSnapshot | None = Depends(current_snapshot)):
+    """Snapshot refresh status: whether a rebuild is running, the last one's duration and error, the next one"""
+    return {
+        "generation": snapshot.generation if snapshot else None,
+        "expires_at": snapshot.expires_at if snapshot else None,
+        "expired": snapshot.expired if snapshot else None,
+        **get_refresher().status(),
+    }
 
-        return JSONResponse(content=data.get("lookups", {}).get("stats", {}))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
+@router.get("/naics/data/plan")
+async def get_naics_data_plan():
+    """Dry run of a refresh: which pipeline stages would execute (or be served from memo), and why."""
+    plan = await run_in_threadpool(get_processor().plan_pipeline)
+    return {"stages": plan, "would_run": [row["stage"] for row in plan if row["action"] == "run"]}
 
-@router.get("/relationships/{naics_code}")
-async def get_naics_relationships(naics_code: str):
-    """Get cross-reference relationships for a specific NAICS code"""
-    try:
-        processor = get_processor()
-        if not processor.cache_file.exists():
-            raise HTTPException(status_code=404, detail="NAICS data not processed yet")
 
-        with open(processor.cache_file, "r") as f:
-            data = json.load(f)
+@router.get("/stats", dependencies=[validated(SNAPSHOT_CACHE)])
+async def get_naics_stats(request: Request, snapshot: NAICSSnapshot = Depends(require_snapshot)):
+    """Get NAICS processing statistics"""
+    return encoded_response(request, snapshot.encoded.get("stats", lambda: snapshot.stats))
+
 
-        lookups = data.get("lookups", {})
-        cross_refs = lookups.get("cross_references", {})
-        code_to_desc = lookups.get("code_to_description", {})
+@router.get("/relationships/{naics_code}", dependencies=[validated(SNAPSHOT_CACHE)])
+async def get_naics_relationships(naics_code: str, snapshot: NAICSSnapshot = Depends(require_snapshot)):
+    """Get cross-reference relationships for a specific NAICS code"""
+    try:
+        cross_refs = snapshot.cross_references
+        code_to_desc = snapshot.code_to_description
 
-        if naics_code not in cross_refs:
+        if not cross_refs.get(naics_code):
             return JSONResponse(
                 content={
                     "naics_code": naics_code,
@@ -888,63 +1374,140 @@ async def get_naics_relationships(naics_code: str):
         raise HTTPException(status_code=500, detail=f"Failed to get relationships: {str(e)}")
 
 
-@router.get("/network-analysis")
-async def get_network_analysis():
-    """Get cross-reference network analysis for strategic insights"""
-    try:
-        processor = get_processor()
+def _hop_nodes(snapshot: NAICSSnapshot, distances: Dict[str, int]) -> List[Dict]:
+    return [
+        {
+            "naics_code": code,
+            "title": snapshot.by_code.get(code, {}).get("title", "Unknown"),
+            "distance": distance,
+        }
+        for code, distance in distances.items()
+    ]
 
-        if not processor.cache_file.exists():
-            raise HTTPException(status_code=404, detail="NAICS data not processed yet")
 
-        with open(processor.cache_file, "r") as f:
-            data = json.load(f)
+@router.get("/relationships/{naics_code}/degree", dependencies=[validated(SNAPSHOT_CACHE)])
+async def get_naics_degree(naics_code: str, snapshot: NAICSSnapshot = Depends(require_snapshot)):
+    """Get in/out cross-reference degree for a specific NAICS code"""
+    degree = snapshot.graph.degree(naics_code)
+    if degree is None:
+        raise HTTPException(status_code=404, detail=f"NAICS code {naics_code} not found")
+    return JSONResponse(content={"naics_code": naics_code, **degree})
 
-        relationship_analysis = data.get("lookups", {}).get("relationship_analysis", {})
 
-        if not relationship_analysis:
-            raise HTTPException(status_code=404, detail="No relationship analysis available")
+@router.get("/relationships/{naics_code}/neighborhood", dependencies=[validated(SNAPSHOT_CACHE)])
+async def get_naics_neighborhood(
+    naics_code: str,
+    hops: int = Query(2, ge=1, le=6),
+    direction: Literal["out", "in", "both"] = "out",
+    snapshot: NAICSSnapshot = Depends(require_snapshot),
+):
+    """Get every code within `hops` cross-reference steps of a NAICS code"""
+    if naics_code not in snapshot.graph.node_index:
+        raise HTTPException(status_code=404, detail=f"NAICS code {naics_code} not found")
+    distances = snapshot.graph.within_hops([naics_code], hops, direction)
+    distances.pop(naics_code, None)
+    return JSONResponse(
+        content={
+            "naics_code": naics_code,
+            "hops": hops,
+            "direction": direction,
+            "neighbors": _hop_nodes(snapshot, distances),
+            "count": len(distances),
+        }
+    )
+
+
+@router.post("/relationships/within-hops")
+async def get_naics_within_hops(query: HopQuery, snapshot: NAICSSnapshot = Depends(require_snapshot)):
+    """Get codes within N cross-reference hops of a set of codes (e.g. a company's NAICS portfolio)"""
+    if not 1 <= query.hops <= 6:
+        raise HTTPException(status_code=422, detail="hops must be between 1 and 6")
+    unknown = [c for c in query.codes if c not in snapshot.graph.node_index]
+    distances = snapshot.graph.within_hops(query.codes, query.hops, query.direction)
+    for code in query.codes:
+        distances.pop(code, None)
+    return JSONResponse(
+        content={
+            "codes": query.codes,
+            "unknown_codes": unknown,
+            "hops": query.hops,
+            "direction": query.direction,
+            "neighbors": _hop_nodes(snapshot, distances),
+            "count": len(distances),
+        }
+    )
 
-        return JSONResponse(content=relationship_analysis)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get network analysis: {str(e)}")
+@router.get("/network-analysis", dependencies=[validated(SNAPSHOT_CACHE)])
+async def get_network_analysis(request: Request, snapshot: NAICSSnapshot = Depends(require_snapshot)):
+    """Get cross-reference network analysis for strategic insights"""
+    relationship_analysis = snapshot.lookups.get("relationship_analysis", {})
 
+    if not relationship_analysis or snapshot.cube is None:
+        raise HTTPException(status_code=404, detail="No relationship analysis available")
 
-@router.post("/search-naics")
-async def get_naics_term(term: str):
-    """Search NAICS codes by description keyword"""
-    try:
-        processor = get_processor()
+    def build() -> Dict:
+        return network_analysis(snapshot.cube, relationship_analysis.get("most_connected_codes", []))
 
-        if not processor.cache_file.exists():
-            raise HTTPException(status_code=404, detail="NAICS data not processed yet")
+    return encoded_response(request, snapshot.encoded.get("network-analysis", build))
 
-        with open(processor.cache_file, "r") as f:
-            data = json.load(f)
 
-        lookups = data.get("lookups", {})
-        code_to_desc = lookups.get("code_to_description", {})
-        cross_refs = lookups.get("cross_references", {})
+@router.get("/naics/aggregates", dependencies=[validated(SNAPSHOT_CACHE)])
+async def get_naics_aggregates(
+    by: str = Query("", description=f"Comma-separated dimensions to group by: {', '.join(DIMENSIONS)}"),
+    sector: Optional[List[str]] = Query(None),
+    level: Optional[List[int]] = Query(None, description="NAICS level in digits (2-6)"),
+    defense_related: Optional[bool] = None,
+    score_bucket: Optional[List[int]] = Query(None, description="Defense score, rounded down (10 = 10 or more)"),
+    quantiles: str = Query("0.5,0.9", description="Comma-separated quantiles in (0, 1), from the cube's sketches"),
+    snapshot: NAICSSnapshot = Depends(require_snapshot),
+):
+    """Rollups and drill-downs over the snapshot's aggregate cube; no row-level data is read"""
+    if snapshot.cube is None:
+        raise HTTPException(status_code=404, detail="No aggregates available")
+    group_by = [dim.strip() for dim in by.split(",") if dim.strip()]
+    filters = {"sector": sector, "level": level, "defense_related": defense_related, "score_bucket": score_bucket}
+    where = {dim: value for dim, value in filters.items() if value is not None}
+    try:
+        qs = [float(q) for q in quantiles.split(",") if q.strip()]
+        if any(not 0 < q < 1 for q in qs):
+            raise ValueError(f"Quantiles must be in (0, 1), got {qs}")
+        frame = snapshot.cube.rollup(group_by, where, qs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    frame = frame.reset_index(drop=not group_by)
+    return JSONResponse(
+        content={
+            "generation": snapshot.generation,
+            "by": group_by,
+            "where": where,
+            "groups": json.loads(frame.to_json(orient="records")),
+        }
+    )
+
+
+@router.post("/search-naics")
+async def get_naics_term(term: str, snapshot: NAICSSnapshot = Depends(require_snapshot)):
+    """Search NAICS codes by description keyword or phrase"""
+    try:
+        code_to_desc = snapshot.code_to_description
+        cross_refs = snapshot.cross_references
 
-        # enhanced search implementation
+        # phrase lookup against the snapshot's inverted index
         matches = {}
         related_matches = {}
-        search_term = term.lower()
-
-        # direct description search
-        for code, description in code_to_desc.items():
-            if search_term in description.lower():
-                matches[code] = {
-                    "description": description,
-                    "match_type": "direct",
-                    "related_codes": cross_refs.get(code, []),
-                }
+        for code in snapshot.search_index.search_ids(term):
+            matches[code] = {
+                "description": code_to_desc[code],
+                "match_type": "direct",
+                "related_codes": cross_refs.get(code, []),
+            }
 
-        # cross reference search - find codes related to matches
+        # cross reference search - codes pointing at a match, via the precomputed reverse adjacency
         for matched_code in matches.keys():
-            for code, related_codes in cross_refs.items():
-                if matched_code in related_codes and code not in matches:
+            for code in snapshot.referenced_by.get(matched_code, []):
+                if code not in matches:
                     related_matches[code] = {
                         "description": code_to_desc.get(code, "Unknown"),
                         "match_type": "related",
@@ -963,54 +1526,143 @@ async def get_naics_term(term: str):
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
-@router.get("/export/{format}")
-async def export_naics_data(format: str):
-    """Export comprehensive NAICS data in CSV or JSON format"""
+@router.post("/search-naics/fuzzy")
+async def get_naics_fuzzy(
+    term: str,
+    limit: int = Query(10, ge=1, le=100),
+    threshold: float = Query(0.2, ge=0.0, le=1.0),
+    snapshot: NAICSSnapshot = Depends(require_snapshot),
+):
+    """Typo-tolerant NAICS search over titles and descriptions, ranked by trigram similarity"""
     try:
-        processor = get_processor()
-
-        if not processor.cache_file.exists():
-            raise HTTPException(status_code=404, detail="NAICS data not processed yet")
-
-        with open(processor.cache_file, "r") as f:
-            data = json.load(f)
-
-        lookups = data.get("lookups", {})
-
-        if format.lower() == "json":
-            return JSONResponse(content=lookups)
-
-        elif format.lower() == "csv":
-            # convert to comprehensive CSV format
-            code_to_desc = lookups.get("code_to_description", {})
-            code_to_sector = lookups.get("code_to_sector", {})
-            cross_refs = lookups.get("cross_references", {})
-            defense_codes = set(lookups.get("defense_codes", []))
-
-            rows = []
-            for code, description in code_to_desc.items():
-                related_codes = cross_refs.get(code, [])
-                rows.append({
-                    "naics_code": code,
-                    "description": description,
-                    "sector": code_to_sector.get(code, ""),
-                    "level": len(code),
-                    "defense_related": code in defense_codes,
-                    "cross_reference_count": len(related_codes),
-                    "related_codes": "|".join(related_codes) if related_codes else "",
-                })
-
-            df = pd.DataFrame(rows)
-            csv_buffer = io.StringIO()
-            df.to_csv(csv_buffer, index=False)
-
-            return Response(
-                content=csv_buffer.getvalue(),
-                media_type="text/csv",
-                headers={"Content-Disposition": "attachment; filename=comprehensive_naics_data.csv"},
-            )
+        results = fuzzy_search(snapshot.fuzzy_fields, term, limit=limit, threshold=threshold)
+        matches = [
+            {
+                "naics_code": snapshot.codes[doc]["code"],
+                "title": snapshot.codes[doc].get("title"),
+                "score": round(score, 4),
+                "matched_field": field,
+            }
+            for doc, score, field in results
+        ]
+        return JSONResponse(content={"search_term": term, "matches": matches, "count": len(matches)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
-        else:
-            raise HTTPException(status_code=400, detail="Format must be 'json' or 'csv'")
+
+@router.get("/naics/search/bm25", dependencies=[validated(SEARCH_CACHE)])
+async def get_naics_bm25(
+    q: str,
+    limit: int = Query(10, ge=1, le=200),
+    k1: float = Query(1.2, ge=0.0),
+    b: float = Query(0.75, ge=0.0, le=1.0),
+    title_weight: float = Query(BM25Index.DEFAULT_WEIGHTS["title"], ge=0.0),
+    description_weight: float = Query(BM25Index.DEFAULT_WEIGHTS["description"], ge=0.0),
+    cross_refs_weight: float = Query(BM25Index.DEFAULT_WEIGHTS["cross_refs"], ge=0.0),
+    snapshot: NAICSSnapshot = Depends(require_snapshot),
+):
+    """BM25-ranked NAICS codes with raw scores, for fusion with vector (ANN) candidates"""
+    try:
+        weights = {"title": title_weight, "description": description_weight, "cross_refs": cross_refs_weight}
+        results = snapshot.bm25.search(q, limit=limit, k1=k1, b=b, weights=weights)
+        return JSONResponse(
+            content={
+                "query": q,
+                "results": [
+                    {
+                        "naics_code": snapshot.codes[doc]["code"],
+                        "title": snapshot.codes[doc].get("title"),
+                        "score": round(score, 6),
+                    }
+                    for doc, score in results
+                ],
+                "count": len(results),
+                "params": {"k1": k1, "b": b, "weights": weights},
+            }
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
+@router.post("/naics/search/vector")
+async def get_naics_vector(query: VectorQuery, snapshot: NAICSSnapshot = Depends(require_snapshot)):
+    """Cosine top-k over local NAICS embeddings, optionally fused with lexical rankings (hybrid)"""
+    if snapshot.dense is None:
+        raise HTTPException(status_code=404, detail="No NAICS embeddings loaded")
+    if not 1 <= query.limit <= 200 or not 1 <= query.depth <= 1000:
+        raise HTTPException(status_code=422, detail="limit must be 1-200 and depth 1-1000")
+    try:
+        depth = max(query.depth, query.limit)
+        vector_hits = snapshot.dense.search(query.vector, limit=depth, mode=query.mode, nprobe=query.nprobe)[0]
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    rankings = {"vector": [doc for doc, _ in vector_hits]}
+    if query.q:
+        if "bm25" in query.lexical:
+            rankings["bm25"] = [doc for doc, _ in snapshot.bm25.search(query.q, limit=depth)]
+        if "fuzzy" in query.lexical:
+            rankings["fuzzy"] = [doc for doc, _, _ in fuzzy_search(snapshot.fuzzy_fields, query.q, limit=depth)]
+
+    if len(rankings) > 1:
+        ranked = reciprocal_rank_fusion(rankings.values(), k=query.rrf_k, limit=query.limit)
+    else:
+        ranked = vector_hits[: query.limit]
+    positions = {name: {doc: rank for rank, doc in enumerate(docs, 1)} for name, docs in rankings.items()}
+    return JSONResponse(
+        content={
+            "mode": query.mode,
+            "fused": len(rankings) > 1,
+            "results": [
+                {
+                    "naics_code": snapshot.codes[doc]["code"],
+                    "title": snapshot.codes[doc].get("title"),
+                    "score": round(score, 6),
+                    "ranks": {name: ranks.get(doc) for name, ranks in positions.items()},
+                }
+                for doc, score in ranked
+            ],
+        }
+    )
+
+
+@router.get("/export/{format}", dependencies=[validated(SNAPSHOT_CACHE)])
+async def export_naics_data(
+    request: Request,
+    format: str,
+    columns: Optional[str] = None,
+    gzip: bool = False,
+    snapshot: NAICSSnapshot = Depends(require_snapshot),
+):
+    """
+    Export comprehensive NAICS data as JSON, CSV, Parquet or an Arrow IPC stream.\n
+    - `csv`, `parquet` and `arrow` are streamed in row batches from the snapshot's columnar records,
+      so memory is bounded by the batch, not the dataset
+    - `columns`: comma-separated subset (CSV: its flat columns; parquet/arrow: record fields)
+    - `gzip`: compress the stream (served as a `.gz` attachment)
+    - `json` is the full lookups document, pre-encoded per generation (compressed via Accept-Encoding)
+    """
+    format = format.lower()
+    if format == "json":
+        if columns or gzip:
+            raise HTTPException(status_code=400, detail="columns and gzip apply to csv, parquet and arrow")
+        body = await run_in_threadpool(snapshot.encoded.get, "export-json", snapshot.export_lookups)
+        return encoded_response(request, body)
+    if format not in STREAMERS:
+        raise HTTPException(status_code=400, detail="Format must be 'json', 'csv', 'parquet' or 'arrow'")
+
+    try:
+        selected = select_columns(format, snapshot.records, columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    chunks = STREAMERS[format](snapshot.records, selected)
+    filename = f"comprehensive_naics_data.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        chunks, filename, media_type = gzip_stream(chunks), f"{filename}.gz", "application/gzip"
+    return StreamingResponse(
+        (chunk for chunk in chunks if chunk),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -0,0 +1,65 @@
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+import base64, bisect, hashlib, json
+
+
+class CursorError(ValueError):
+    """A cursor that can't be decoded, or was issued for a different query."""
+
+
+def filter_fingerprint(filters: Dict) -> str:
+    """Short, order-independent hash of the query's filters; a cursor is only valid for the same filters."""
+    return hashlib.sha256(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def encode_cursor(after: str, generation: str, filters: str) -> str:
+    """Opaque, URL-safe token: the last key served, plus the generation and filters it was served under."""
+    raw = json.dumps({"after": after, "gen": generation, "f": filters}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, filters: str) -> Dict:
+    """Decoded `{after, gen, f}`; raises `CursorError` if malformed or issued for other filters."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        token = json.loads(raw)
+        if not isinstance(token, dict) or not isinstance(token.get("after"), str):
+            raise ValueError("missing key")
+    except ValueError as e:  # binascii.Error and JSONDecodeError are ValueErrors
+        raise CursorError(f"Malformed cursor: {e}") from e
+    if token.get("f") != filters:
+        raise CursorError("Cursor was issued for different filters")
+    return token
+
+
+class KeysetPager:
+    """
+    Keyset pagination over records in ascending key order.\n
+    The page boundary is the last key served, not an offset, so a cursor stays meaningful when a new
+    generation adds or drops records: the next page resumes at the first key after it, with no
+    duplicates or gaps among the records the two generations share.
+    """
+
+    def __init__(self, keys: Sequence[str], order: Sequence[int]):
+        self.order = order  # record positions in ascending key order
+        self.sorted_keys = [keys[i] for i in order]
+
+    @classmethod
+    def build(cls, keys: Sequence[str]) -> "KeysetPager":
+        return cls(keys, sorted(range(len(keys)), key=keys.__getitem__))
+
+    def positions(self, after: Optional[str] = None, where: Optional[Callable[[int], bool]] = None) -> Iterator[int]:
+        """Lazily yield record positions with key > `after` that satisfy `where`, in key order."""
+        start = 0 if after is None else bisect.bisect_right(self.sorted_keys, after)
+        for i in range(start, len(self.order)):
+            position = self.order[i]
+            if where is None or where(position):
+                yield position
+
+    def page(self, limit: int, after: Optional[str] = None, where=None) -> tuple[List[int], bool]:
+        """At most `limit` positions, and whether more matches follow them."""
+        page = []
+        for position in self.positions(after, where):
+            if len(page) == limit:
+                return page, True
+            page.append(position)
+        return page, False
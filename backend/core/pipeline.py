@@ -0,0 +1,396 @@
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import hashlib, inspect, json, os, re, time
+
+import pandas as pd
+import pyarrow as pa
+
+from core.cube import AggregateCube
+from core.storage import file_sha256
+
+# (stage name, event) where event is "cached", "running" or "done"
+ProgressCallback = Callable[[str, str], None]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One named pipeline step: `fn(*outputs of inputs)`.\n
+    `sources` are files whose bytes feed the stage; `parallel` marks source-only stages that may be
+    handed to the pipeline's `parallel` runner in one batch. The code hash covers `fn`, its partial
+    arguments and every project function, class and module constant it reaches (see `_code_closure`).
+    `version` is bumped by hand for what that can't see: library upgrades, files read outside
+    `sources`, and state reached only through instance attributes. When unsure, bump it: a stale
+    memo is silently wrong, a spurious re-run only costs time.
+    """
+
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    sources: Tuple[Path, ...] = ()
+    version: int = 1
+    parallel: bool = False
+
+    def code_hash(self) -> str:
+        args = repr(self.fn.args) if isinstance(self.fn, partial) else ""
+        code = "\n".join(_code_closure(self.fn))
+        return hashlib.sha256(f"{self.version}\n{args}\n{code}".encode()).hexdigest()[:16]
+
+
+# module constants a stage may read, hashed by value alongside the code that names them
+_CONSTANT_TYPES = (str, bytes, int, float, bool, tuple, list, dict, set, frozenset, re.Pattern, type(None))
+
+
+def _constant(value: Any) -> str:
+    """Deterministic text for a module constant (sets sorted, so string hash seeds don't change it)."""
+    def fallback(v: Any):
+        return sorted(v, key=repr) if isinstance(v, (set, frozenset)) else repr(v)
+
+    try:
+        return json.dumps(value, sort_keys=True, default=fallback)
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def _code_closure(fn: Callable) -> List[str]:
+    """
+    Source of `fn` plus, transitively, of the project functions and classes it names and the values of
+    the module constants it reads, in a stable order.\n
+    - names are resolved as module globals and, for methods, as attributes of their class
+    - "project" is the top-level package `fn` is defined in, so e.g. pandas upgrades are not seen
+    - classes (including those of partial arguments) are hashed whole, with everything they reach
+    """
+    root = fn.func if isinstance(fn, partial) else fn
+    package = (getattr(root, "__module__", None) or "").split(".")[0]
+    seen, whole, parts = set(), set(), []
+
+    def ours(obj: Any) -> bool:
+        return bool(package) and (getattr(obj, "__module__", None) or "").split(".")[0] == package
+
+    def source(obj: Any) -> str:
+        try:
+            return inspect.getsource(obj)
+        except (OSError, TypeError):
+            return getattr(obj, "__qualname__", repr(obj))
+
+    def resolve(name: str, scope: Dict, owner: Optional[type]):
+        if owner is not None:
+            value = inspect.getattr_static(owner, name, None)
+            if value is not None:
+                visit(value, owner)
+                if isinstance(value, _CONSTANT_TYPES) and ("attr", owner, name) not in seen:
+                    seen.add(("attr", owner, name))
+                    parts.append(f"{owner.__qualname__}.{name} = {_constant(value)}")
+                return
+        if name not in scope:
+            return
+        value = scope[name]
+        if inspect.isfunction(value) or inspect.isclass(value):
+            visit(value, None)
+        elif isinstance(value, _CONSTANT_TYPES) and ("global", id(scope), name) not in seen:
+            seen.add(("global", id(scope), name))
+            parts.append(f"{name} = {_constant(value)}")
+
+    def visit(obj: Any, owner: Optional[type]):
+        if isinstance(obj, partial):
+            visit(obj.func, owner)
+            for arg in (*obj.args, *obj.keywords.values()):
+                if not inspect.isclass(arg) and ours(type(arg)):
+                    visit(type(arg), None)
+            return
+        if inspect.ismethod(obj):
+            obj, owner = obj.__func__, obj.__self__ if inspect.isclass(obj.__self__) else type(obj.__self__)
+        if isinstance(obj, (staticmethod, classmethod)):
+            obj = obj.__func__
+        if isinstance(obj, property):
+            for accessor in (obj.fget, obj.fset):
+                if accessor is not None:
+                    visit(accessor, owner)
+            return
+        if not (inspect.isfunction(obj) or inspect.isclass(obj)) or not ours(obj) or id(obj) in seen:
+            return
+        seen.add(id(obj))
+        if owner not in whole:  # a method of a class hashed whole is already in its source
+            parts.append(source(obj))
+        if inspect.isclass(obj):
+            whole.add(obj)
+            for base in obj.__mro__[1:]:
+                visit(base, None)
+            for member in vars(obj).values():
+                visit(member, obj)
+            return
+        codes = [obj.__code__]
+        while codes:  # nested functions, lambdas and comprehensions carry their own names
+            code = codes.pop()
+            codes.extend(const for const in code.co_consts if inspect.iscode(const))
+            for name in code.co_names:
+                resolve(name, obj.__globals__, owner)
+
+    visit(fn, None)
+    return parts or [source(root)]
+
+
+# memo file suffix by stage output type; anything else is recomputed on every run rather than pickled
+MEMO_FORMATS = {"arrow": pd.DataFrame, "npz": AggregateCube, "json": dict}
+_JSON_COLUMNS = b"pipeline.json_columns"
+
+
+def _memo_format(value: Any) -> Optional[str]:
+    return next((suffix for suffix, kind in MEMO_FORMATS.items() if type(value) is kind), None)
+
+
+def _write_frame(path: Path, df: pd.DataFrame):
+    """
+    DataFrame as an Arrow IPC file. Object columns holding lists or dicts (related codes, defense
+    categories) are stored as JSON text so they come back as the same Python values rather than
+    as numpy arrays or key-unified structs.
+    """
+    json_columns = [
+        name for name in df.columns
+        if df[name].dtype == object and df[name].map(lambda v: isinstance(v, (list, dict))).any()
+    ]
+    encoded = df.assign(**{name: df[name].map(json.dumps) for name in json_columns})
+    table = pa.Table.from_pandas(encoded)
+    table = table.replace_schema_metadata({**table.schema.metadata, _JSON_COLUMNS: json.dumps(json_columns).encode()})
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_frame(path: Path) -> pd.DataFrame:
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+        df = table.to_pandas()
+    for name in json.loads(table.schema.metadata.get(_JSON_COLUMNS, b"[]")):
+        df[name] = df[name].map(json.loads)
+    return df
+
+
+def _rows(value: Any) -> Optional[int]:
+    """Row count of a frame-like stage output (None for lookups, indexes and the like)."""
+    shape = getattr(value, "shape", None)
+    return int(shape[0]) if shape else None
+
+
+class Pipeline:
+    """
+    DAG of stages, each memoized on disk by a hash of its source file bytes, its inputs' keys and
+    its code version, so only stages downstream of a change re-run.\n
+    `plan()` is the dry run: per stage, whether it would run or be served from its memo, and why.
+    `run()` executes the plan, loading memoized outputs only where a re-running stage needs them.
+    """
+
+    def __init__(
+        self,
+        stages: Iterable[Stage],
+        cache_dir: Path,
+        parallel: Optional[Callable[[List[Stage]], Dict[str, Tuple[Any, float]]]] = None,
+    ):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = cache_dir
+        self.parallel = parallel  # runs a batch of parallel stages, returning {name: (output, seconds)}
+        self.order = self._topological_order()
+        self.stats: Dict[str, Dict] = {}
+
+    def _topological_order(self) -> List[str]:
+        order, state = [], {}
+
+        def visit(name: str, path: Tuple[str, ...]):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Pipeline cycle: {' -> '.join(path + (name,))}")
+            if name not in self.stages:
+                raise ValueError(f"Stage {path[-1]!r} depends on unknown stage {name!r}")
+            state[name] = "visiting"
+            for dep in self.stages[name].inputs:
+                visit(dep, path + (name,))
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, ())
+        return order
+
+    def _ancestors(self, targets: Optional[Iterable[str]]) -> List[str]:
+        if targets is None:
+            return list(self.order)
+        wanted, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in wanted:
+                wanted.add(name)
+                stack.extend(self.stages[name].inputs)
+        return [name for name in self.order if name in wanted]
+
+    def _memo_path(self, name: str, key: str) -> Optional[Path]:
+        """The memo file for `name` at `key`, whichever format it was written in, or None."""
+        for suffix in MEMO_FORMATS:
+            path = self.cache_dir / f"{name}.{key[:16]}.{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    def _last_components(self, name: str) -> Optional[Dict]:
+        try:
+            with open(self.cache_dir / f"{name}.json", "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    @staticmethod
+    def _why(components: Dict, last: Optional[Dict]) -> str:
+        if last is None:
+            return "never run"
+        reasons = []
+        if last.get("code") != components["code"]:
+            reasons.append("code or version changed")
+        last_sources = last.get("sources", {})
+        changed = [Path(p).name for p, h in components["sources"].items() if last_sources.get(p) != h]
+        if changed:
+            reasons.append(f"source changed: {', '.join(changed)}")
+        reran = [n for n, k in components["inputs"].items() if last.get("inputs", {}).get(n) != k]
+        if reran:
+            reasons.append(f"input re-runs: {', '.join(reran)}")
+        return "; ".join(reasons) or "memo missing"
+
+    def plan(self, targets: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Dry run: `[{stage, action: "run" | "cached", reason, key}]` in execution order."""
+        return [{k: v for k, v in row.items() if k != "components"} for row in self._plan(targets)]
+
+    def _plan(self, targets: Optional[Iterable[str]]) -> List[Dict]:
+        keys, rows = {}, []
+        for name in self._ancestors(targets):
+            stage = self.stages[name]
+            components = {
+                "code": stage.code_hash(),
+                "sources": {str(p): file_sha256(p) if p.exists() else None for p in stage.sources},
+                "inputs": {dep: keys[dep] for dep in stage.inputs},
+            }
+            keys[name] = hashlib.sha256(json.dumps(components, sort_keys=True).encode()).hexdigest()
+            # stages reading a missing source never memoize; their loaders decide how to handle it
+            missing = any(h is None for h in components["sources"].values())
+            if not missing and self._memo_path(name, keys[name]) is not None:
+                action, reason = "cached", "inputs and code unchanged"
+            else:
+                action = "run"
+                reason = "source missing" if missing else self._why(components, self._last_components(name))
+            rows.append(
+                {"stage": name, "action": action, "reason": reason, "key": keys[name], "components": components}
+            )
+        return rows
+
+    def _load(self, name: str, key: str) -> Any:
+        path = self._memo_path(name, key)
+        if path is None:
+            raise FileNotFoundError(f"no memo for {name} at {key[:16]}")
+        if path.suffix == ".arrow":
+            return _read_frame(path)
+        if path.suffix == ".npz":
+            return AggregateCube.load(path)
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _save(self, name: str, key: str, components: Dict, value: Any):
+        suffix = _memo_format(value)
+        if suffix is None:
+            print(f"Warning: Stage {name} returned {type(value).__name__}, which is not memoized")
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{name}.{key[:16]}.{suffix}"
+            tmp = path.with_name(f"{path.name}.tmp")
+            if suffix == "arrow":
+                _write_frame(tmp, value)
+            elif suffix == "npz":
+                with open(tmp, "wb") as f:  # a file object, so numpy doesn't append its own .npz
+                    value.save(f)
+            else:
+                with open(tmp, "w") as f:
+                    json.dump(value, f)
+            os.replace(tmp, path)
+            with open(self.cache_dir / f"{name}.json", "w") as f:
+                json.dump(components, f, indent=2)
+            # older memos of this stage, including pickles from before memos were typed files
+            for stale in self.cache_dir.glob(f"{name}.*.*"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        except Exception as e:
+            print(f"Warning: Failed to memoize stage {name}: {e}")
+
+    def run(self, targets: Optional[Iterable[str]] = None, progress: Optional[ProgressCallback] = None) -> Dict:
+        """Execute the plan for `targets` (default: every stage), returning the outputs that were needed."""
+        targets = list(targets) if targets is not None else list(self.order)
+        plan = {row["stage"]: row for row in self._plan(targets)}
+        notify = progress or (lambda stage, event: None)
+
+        # only outputs of targets and of inputs to re-running stages are ever materialized
+        needed = set(targets)
+        for name in reversed(list(plan)):
+            if name in needed and plan[name]["action"] == "run":
+                needed.update(self.stages[name].inputs)
+
+        self.stats = {}
+        outputs = {}
+        batch = [
+            self.stages[name]
+            for name, row in plan.items()
+            if name in needed and row["action"] == "run" and self.stages[name].parallel
+        ]
+        if self.parallel is not None and len(batch) > 1:
+            for stage in batch:
+                notify(stage.name, "running")
+            for name, (value, seconds) in self.parallel(batch).items():
+                self._finish(plan[name], value, seconds, outputs, notify)
+
+        for name in plan:
+            if name in needed:
+                self._materialize(name, plan, outputs, notify)
+        return outputs
+
+    def _materialize(self, name: str, plan: Dict[str, Dict], outputs: Dict, notify: ProgressCallback):
+        if name in outputs:
+            return
+        row = plan[name]
+        start = time.perf_counter()
+        if row["action"] == "cached":
+            try:
+                outputs[name] = self._load(name, row["key"])
+                seconds = time.perf_counter() - start
+                self.stats[name] = {"action": "cached", "seconds": seconds, "rows": _rows(outputs[name])}
+                notify(name, "cached")
+                return
+            except Exception as e:  # unreadable memo: recompute, materializing inputs the plan skipped
+                print(f"Warning: Failed to load memo for stage {name}: {e}")
+                row = {**row, "reason": "memo unreadable"}
+        stage = self.stages[name]
+        for dep in stage.inputs:
+            self._materialize(dep, plan, outputs, notify)
+        notify(name, "running")
+        start = time.perf_counter()
+        value = stage.fn(*(outputs[dep] for dep in stage.inputs))
+        self._finish(row, value, time.perf_counter() - start, outputs, notify)
+
+    def _finish(self, row: Dict, value: Any, seconds: float, outputs: Dict, notify: ProgressCallback):
+        name = row["stage"]
+        outputs[name] = value
+        if row["reason"] != "source missing":
+            self._save(name, row["key"], row["components"], value)
+        self.stats[name] = {"action": "run", "seconds": seconds, "reason": row["reason"], "rows": _rows(value)}
+        notify(name, "done")
+
+    @staticmethod
+    def format_plan(plan: List[Dict]) -> str:
+        width = max([len(row["stage"]) for row in plan] + [5])
+        lines = [f"{'stage':<{width}} {'action':<7} reason"]
+        lines += [f"{row['stage']:<{width}} {row['action']:<7} {row['reason']}" for row in plan]
+        return "\n".join(lines)
+
+    def report(self) -> str:
+        lines = [f"{'stage':<24} {'action':>7} {'seconds':>8}"]
+        for name, stat in self.stats.items():
+            lines.append(f"{name:<24} {stat['action']:>7} {stat['seconds']:>8.3f}")
+        ran = sum(stat["action"] == "run" for stat in self.stats.values())
+        lines.append(f"pipeline: {ran} stages ran, {len(self.stats) - ran} served from memo")
+        return "\n".join(lines)
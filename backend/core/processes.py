@@ -0,0 +1,21 @@
+import multiprocessing
+
+# modules imported once by the forkserver, so every worker forked from it starts with them loaded:
+# core.naics (pandas, pyarrow: source loaders, rebuild/export jobs) and core.dataviz (matplotlib, seaborn:
+# plot rendering). There is one forkserver per process and the first context to start it fixes its
+# preload, so every pool and job process shares this list.
+FORKSERVER_PRELOAD = ["core.naics", "core.dataviz"]
+
+
+def worker_context():
+    """
+    Multiprocessing context for worker processes (source loaders, plot renderers, jobs).\n
+    Never plain-fork a process running server threads. A forkserver (where available) imports
+    `FORKSERVER_PRELOAD` once and forks workers from it, instead of every spawned worker re-importing
+    pandas et al.; elsewhere, spawn.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(FORKSERVER_PRELOAD)
+    return context
@@ -0,0 +1,102 @@
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# output field -> (source column, default when the column is absent)
+RecordFields = Dict[str, Tuple[str, Any]]
+
+
+def native_column(series: pd.Series) -> List:
+    """
+    One column as a list of Python-native values, converted once for the whole column.\n
+    - numpy ints/bools (no missing values possible): `tolist()`
+    - floats, nullable extension dtypes and objects: NaN/NA/NaT become None
+    - object cells (e.g. lists of related codes) are passed through as-is, so they must already be native
+    """
+    if series.dtype.kind in "biu" and isinstance(series.dtype, np.dtype):
+        return series.tolist()
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def native_columns(df: pd.DataFrame, fields: RecordFields) -> Dict[str, List]:
+    """Column-oriented output: `{field: values}`, with absent columns filled by their default."""
+    n = len(df)
+    return {
+        name: native_column(df[column]) if column in df.columns else [default] * n
+        for name, (column, default) in fields.items()
+    }
+
+
+def records_from_columns(columns: Dict[str, List]) -> List[Dict]:
+    """Row-oriented output: one dict per row, keys in field order."""
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def table_from_columns(columns: Dict[str, List]) -> pa.Table:
+    """Arrow table of the same columns, without going through per-row dicts."""
+    return pa.Table.from_pydict(columns)
+
+
+class LazyRecords(Sequence):
+    """
+    Read-only sequence of record dicts over an Arrow table, materialized a block of rows at a time on first
+    access and kept, so a memory-mapped table is only copied into Python objects for rows actually served.\n
+    - `rows`: already materialized records (e.g. straight from the pipeline), served as-is
+    - `column(name)`: one column as Python values, without building the row dicts
+    - `to_list()`: every record (materializing what's left), for full-payload responses
+    """
+
+    def __init__(self, table: pa.Table, rows: Optional[List[Dict]] = None, block_size: int = 256):
+        self.table = table
+        self.block_size = block_size
+        self._rows: List[Optional[Dict]] = list(rows) if rows is not None else [None] * table.num_rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        row = self._rows[index]
+        if row is None:
+            index = index + len(self) if index < 0 else index
+            start = index - index % self.block_size
+            block = self.table.slice(start, self.block_size).to_pylist()
+            self._rows[start : start + len(block)] = block  # racing readers build equal blocks; last one wins
+            row = block[index - start]
+        return row
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self[i] for i in range(len(self)))
+
+    def column(self, name: str, default: Any = None) -> List:
+        if name in self.table.column_names:
+            return self.table.column(name).to_pylist()
+        return [default] * len(self)
+
+    def to_list(self) -> List[Dict]:
+        return [self[i] for i in range(len(self))]
+
+
+class RecordsByKey(Mapping):
+    """`{key: record}` view over `LazyRecords`, resolving a key to its position and the record on demand."""
+
+    def __init__(self, records: LazyRecords, keys: List):
+        self.records = records
+        self.positions = {key: position for position, key in enumerate(keys)}
+
+    def __getitem__(self, key) -> Dict:
+        return self.records[self.positions[key]]
+
+    def __contains__(self, key) -> bool:
+        return key in self.positions
+
+    def __iter__(self) -> Iterator:
+        return iter(self.positions)
+
+    def __len__(self) -> int:
+        return len(self.positions)
@@ -0,0 +1,102 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+import asyncio, random, threading, time, traceback
+
+
+class RefreshCoordinator:
+    """
+    Single-flight rebuilds of the resident snapshot, run off the event loop.\n
+    - one rebuild at a time, called from a dedicated thread; callers arriving while it runs share it
+    - `trigger` starts (or joins) a rebuild and returns at once, for serving stale data meanwhile;
+      `refresh` awaits it
+    - `schedule` is a lifespan task rebuilding `lead` seconds (minus up to `jitter`) before expiry, so
+      requests never pay pipeline cost and workers sharing one snapshot store don't rebuild in lockstep
+    - `status` reports whether a rebuild is running, the last duration and the last error
+    """
+
+    def __init__(self, rebuild: Callable[[], Any], lead: float = 21600, jitter: float = 3600, retry: float = 900):
+        self._rebuild = rebuild
+        self.lead, self.jitter, self.retry = lead, jitter, retry
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-refresh")
+        self._lock = threading.Lock()
+        self._inflight: Optional[Future] = None
+        self.reason: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.runs = 0
+        self.failures = 0
+        self.next_scheduled_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        inflight = self._inflight
+        return inflight is not None and not inflight.done()
+
+    def trigger(self, reason: str = "manual") -> Future:
+        """The in-flight rebuild, or a new one started for `reason`."""
+        with self._lock:
+            if self._inflight is None or self._inflight.done():
+                self.reason, self.started_at = reason, datetime.now().timestamp()
+                print(f"Snapshot refresh started ({reason}).")
+                self._inflight = self._executor.submit(self._run)
+            return self._inflight
+
+    async def refresh(self, reason: str = "manual") -> Any:
+        """Await the in-flight rebuild (starting one if needed); raises what the rebuild raised."""
+        return await asyncio.wrap_future(self.trigger(reason))
+
+    def _run(self) -> Any:
+        start = time.perf_counter()
+        try:
+            result = self._rebuild()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+            raise
+        finally:
+            self.runs += 1
+            self.last_duration = time.perf_counter() - start
+            self.finished_at = datetime.now().timestamp()
+        self.last_error = None
+        print(f"Snapshot refresh finished in {self.last_duration:.1f}s.")
+        return result
+
+    def due_at(self, expires_at: float) -> float:
+        return expires_at - self.lead - random.uniform(0, self.jitter)
+
+    async def schedule(self, expires_at: Callable[[], Optional[float]]):
+        """
+        Rebuild ahead of expiry until cancelled.\n
+        `expires_at()` is the resident snapshot's expiry (None without one, which rebuilds right away).
+        It's re-read on waking: if another worker's rebuild was picked up meanwhile, the expiry will have
+        moved and the wait starts over. A failed rebuild is retried every `retry` seconds.
+        """
+        while True:
+            expiry = await asyncio.to_thread(expires_at)
+            now = datetime.now().timestamp()
+            self.next_scheduled_at = now if expiry is None else max(now, self.due_at(expiry))
+            await asyncio.sleep(self.next_scheduled_at - now)
+            current = await asyncio.to_thread(expires_at)
+            if expiry is not None and current is not None and current > expiry:
+                continue
+            try:
+                await self.refresh("scheduled")
+            except Exception:
+                await asyncio.sleep(self.retry)
+
+    def status(self) -> Dict:
+        return {
+            "running": self.running,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "runs": self.runs,
+            "failures": self.failures,
+            "next_scheduled_at": self.next_scheduled_at,
+        }
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import gzip, threading
+
+import brotli
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+# preferred first; identity is always available
+ENCODINGS = ("br", "gzip")
+
+
+@dataclass(frozen=True)
+class EncodedBody:
+    """One JSON body, serialized once, with its precompressed variants."""
+
+    identity: bytes
+    variants: Dict[str, bytes]  # content-coding -> compressed bytes
+
+    @classmethod
+    def encode(cls, content: Any, gzip_level: int = 9, brotli_quality: int = 9) -> "EncodedBody":
+        """
+        Serialize with orjson and compress with each supported coding.\n
+        Brotli quality 9 is within ~10% of quality 11's size at a fraction of the time (~0.1s vs ~6s
+        for the 2 MB lookups), which keeps the first request after a refresh fast.
+        """
+        body = orjson.dumps(content)
+        return cls(
+            identity=body,
+            variants={
+                "br": brotli.compress(body, quality=brotli_quality),
+                "gzip": gzip.compress(body, compresslevel=gzip_level, mtime=0),
+            },
+        )
+
+    def negotiate(self, accept_encoding: Optional[str]) -> tuple[Optional[str], bytes]:
+        """`(content-coding or None, bytes)` for an `Accept-Encoding` header, honouring q-values."""
+        coding = negotiate_coding(accept_encoding, self.variants)
+        return coding, self.variants[coding] if coding else self.identity
+
+
+def negotiate_coding(accept_encoding: Optional[str], available=ENCODINGS) -> Optional[str]:
+    """Best of `ENCODINGS` that is `available` and accepted, or None for identity."""
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in ENCODINGS:
+        q = accepted.get(coding, wildcard)
+        if q > best_q and coding in available:
+            best, best_q = coding, q
+    return best
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """`"br;q=1.0, gzip;q=0.8"` -> `{"br": 1.0, "gzip": 0.8}`; malformed q-values count as 0."""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+class EncodedBodies:
+    """
+    Per-snapshot store of encoded bodies, built on first use and kept for the generation's lifetime.\n
+    Concurrent first requests for one key wait on a single build rather than each encoding it.
+    """
+
+    def __init__(self):
+        self._bodies: Dict[Hashable, EncodedBody] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> EncodedBody:
+        body = self._bodies.get(key)
+        if body is None:
+            with self._lock:
+                body = self._bodies.get(key)
+                if body is None:
+                    body = EncodedBody.encode(build())
+                    self._bodies[key] = body
+        return body
+
+    def keys(self) -> List[Hashable]:
+        return list(self._bodies)
+
+
+def encoded_response(request: Request, body: EncodedBody, media_type: str = "application/json") -> Response:
+    """Serve precomputed bytes in the best encoding the client accepts; no serialization per request."""
+    coding, content = body.negotiate(request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding"}
+    if coding:
+        headers["Content-Encoding"] = coding
+    return Response(content=content, media_type=media_type, headers=headers)
@@ -0,0 +1,421 @@
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Literal, Optional, Sequence, Set, Tuple
+import numpy as np
+import math, re, unicodedata
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and fold accents (NFKD -> ASCII) so tokens compare consistently."""
+    if not isinstance(text, str):
+        return ""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into alphanumeric tokens."""
+    return _TOKEN_RE.findall(normalize(text))
+
+
+class InvertedIndex:
+    """
+    Positional inverted index over a fixed list of documents.\n
+    postings: term -> {doc_idx: [token positions]}, with a sorted vocabulary for prefix expansion.
+    Query cost scales with the postings touched (i.e. the result size), not the corpus size.
+    """
+
+    def __init__(self, doc_ids: Iterable[str], texts: Iterable[str]):
+        self.doc_ids: List[str] = list(doc_ids)
+        postings: Dict[str, Dict[int, List[int]]] = {}
+        for doc, text in enumerate(texts):
+            for pos, token in enumerate(tokenize(text)):
+                postings.setdefault(token, {}).setdefault(doc, []).append(pos)
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        """All vocabulary terms starting with `prefix` via bisect on the sorted vocabulary."""
+        terms = []
+        for i in range(bisect_left(self.vocabulary, prefix), len(self.vocabulary)):
+            term = self.vocabulary[i]
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _term_postings(self, token: str, prefix: bool) -> Dict[int, List[int]]:
+        if not prefix:
+            return self.postings.get(token, {})
+        terms = self._prefix_terms(token)
+        if len(terms) == 1:
+            return self.postings[terms[0]]
+        merged: Dict[int, List[int]] = {}
+        for term in terms:
+            for doc, positions in self.postings[term].items():
+                merged.setdefault(doc, []).extend(positions)
+        return merged
+
+    def search(self, query: str, prefix_last: bool = True) -> List[int]:
+        """
+        Return doc indexes (in corpus order) containing the query tokens as a contiguous phrase.\n
+        The last query token is matched as a prefix when `prefix_last` is set, so partially typed
+        words ("secur") still match.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        plists = [
+            self._term_postings(tok, prefix_last and i == len(tokens) - 1) for i, tok in enumerate(tokens)
+        ]
+        if any(not p for p in plists):
+            return []
+
+        # intersect doc sets starting from the rarest term
+        candidates = set(min(plists, key=len))
+        for plist in sorted(plists, key=len):
+            candidates.intersection_update(plist)
+            if not candidates:
+                return []
+
+        if len(tokens) == 1:
+            return sorted(candidates)
+
+        # phrase check: some start position p with token i at p + i for every i
+        hits = []
+        for doc in candidates:
+            following = [set(p[doc]) for p in plists[1:]]
+            if any(all(start + i in pos for i, pos in enumerate(following, 1)) for start in plists[0][doc]):
+                hits.append(doc)
+        return sorted(hits)
+
+    def search_ids(self, query: str, prefix_last: bool = True) -> List[str]:
+        return [self.doc_ids[doc] for doc in self.search(query, prefix_last)]
+
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm-style trigrams: each token padded with two leading spaces and one trailing space."""
+    grams = set()
+    for token in tokenize(text):
+        padded = f"  {token} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Trigram index for typo-tolerant matching of short texts, stored as CSR postings
+    (trigram -> doc indexes) and ranked by Jaccard overlap of trigram sets (pg_trgm `similarity`).
+
+    Any document scoring >= threshold (in either mode) must share at least `threshold * |query trigrams|` trigrams,
+    so candidates are count-filtered from a single bincount before similarity is computed.
+    """
+
+    def __init__(self, texts: Iterable[str]):
+        gram_ids: Dict[str, int] = {}
+        rows, cols = [], []
+        sizes = []
+        for doc, text in enumerate(texts):
+            grams = trigrams(text)
+            sizes.append(len(grams))
+            for gram in grams:
+                rows.append(gram_ids.setdefault(gram, len(gram_ids)))
+                cols.append(doc)
+
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        order = np.argsort(rows_arr, kind="stable")
+        self.gram_ids = gram_ids
+        self.indices = np.asarray(cols, dtype=np.int32)[order]
+        self.indptr = np.zeros(len(gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows_arr, minlength=len(gram_ids)), out=self.indptr[1:])
+        self.doc_sizes = np.asarray(sizes, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.doc_sizes)
+
+    def candidates(self, query: str, threshold: float) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Count-filter step: `(doc indexes, shared trigram counts, query trigram count)`."""
+        grams = trigrams(query)
+        ids = [self.gram_ids[g] for g in grams if g in self.gram_ids]
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), len(grams)
+
+        postings = np.concatenate([self.indices[self.indptr[i] : self.indptr[i + 1]] for i in ids])
+        shared = np.bincount(postings, minlength=len(self))
+
+        min_shared = max(1, math.ceil(threshold * len(grams)))
+        docs = np.flatnonzero(shared >= min_shared)
+        return docs, shared[docs], len(grams)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        threshold: float = 0.3,
+        mode: Literal["similarity", "word_similarity"] = "similarity",
+    ) -> List[Tuple[int, float]]:
+        """
+        Similarity-ranked `(doc index, score)` pairs at or above `threshold`.
+
+        `word_similarity` scores the share of the query's trigrams present in the document instead of
+        the Jaccard overlap, so a misspelled word still matches a longer correct one.
+        """
+        docs, shared, q_size = self.candidates(query, threshold)
+        if docs.size == 0:
+            return []
+        if mode == "word_similarity":
+            return _top_k(docs, shared / q_size, limit, threshold)
+        return _top_k(docs, shared / (q_size + self.doc_sizes[docs] - shared), limit, threshold)
+
+
+class WordTrigramIndex:
+    """
+    Typo-tolerant matching for long texts (pg_trgm `word_similarity` in spirit).
+
+    Whole-document trigram overlap is meaningless for multi-paragraph descriptions, so each query
+    token is instead matched against the corpus vocabulary through a `TrigramIndex`, and a document
+    scores the mean (over query tokens) of its best-matching word's similarity.
+    """
+
+    def __init__(self, texts: Iterable[str], word_threshold: float = 0.5, max_expansions: int = 32):
+        vocab: Dict[str, int] = {}
+        rows, cols = [], []
+        n_docs = 0
+        for doc, text in enumerate(texts):
+            n_docs += 1
+            for token in set(tokenize(text)):
+                rows.append(vocab.setdefault(token, len(vocab)))
+                cols.append(doc)
+
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        order = np.argsort(rows_arr, kind="stable")
+        self.words = TrigramIndex(vocab)  # word ids follow vocab insertion order
+        self.indices = np.asarray(cols, dtype=np.int32)[order]
+        self.indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows_arr, minlength=len(vocab)), out=self.indptr[1:])
+        self.n_docs = n_docs
+        self.word_threshold = word_threshold
+        self.max_expansions = max_expansions
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def search(self, query: str, limit: int = 10, threshold: float = 0.2) -> List[Tuple[int, float]]:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        total = np.zeros(self.n_docs)
+        for token in tokens:
+            best = np.zeros(self.n_docs)
+            expansions = self.words.search(
+                token, limit=self.max_expansions, threshold=self.word_threshold, mode="word_similarity"
+            )
+            for word, sim in expansions:
+                docs = self.indices[self.indptr[word] : self.indptr[word + 1]]
+                best[docs] = np.maximum(best[docs], sim)
+            total += best
+
+        scores = total / len(tokens)
+        docs = np.flatnonzero(scores >= threshold)
+        return _top_k(docs, scores[docs], limit, threshold)
+
+
+def _top_k(docs: np.ndarray, scores: np.ndarray, limit: int, threshold: float) -> List[Tuple[int, float]]:
+    """Partial-sort the `limit` best `(doc, score)` pairs at or above threshold, ties by doc index."""
+    keep = scores >= threshold
+    docs, scores = docs[keep], scores[keep]
+    if docs.size > limit:
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        docs, scores = docs[top], scores[top]
+    order = np.lexsort((docs, -scores))
+    return [(int(d), float(sc)) for d, sc in zip(docs[order], scores[order])]
+
+
+def fuzzy_search(
+    fields: Dict[str, Tuple[TrigramIndex | WordTrigramIndex, float]],
+    query: str,
+    limit: int = 10,
+    threshold: float = 0.2,
+) -> List[Tuple[int, float, str]]:
+    """
+    Combine weighted per-field trigram indexes over the same documents, scoring each document by
+    its best weighted field (ties broken by the sum over fields). Returns `(doc, score, field)`.
+    """
+    best: Dict[int, Tuple[float, float, str]] = {}
+    for name, (index, weight) in fields.items():
+        for doc, score in index.search(query, limit=limit * 4, threshold=threshold):
+            weighted = score * weight
+            top, total, field = best.get(doc, (0.0, 0.0, name))
+            best[doc] = (weighted, total + weighted, name) if weighted > top else (top, total + weighted, field)
+
+    ranked = sorted(best.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))
+    return [(doc, top, field) for doc, (top, _, field) in ranked[:limit] if top >= threshold]
+
+
+class BM25Index:
+    """
+    Okapi BM25 (BM25F across fields) over a fixed document list.
+
+    Each field is a term-major CSR matrix (`indptr`/`doc_ids`/`tf`, i.e. per-term postings) plus
+    per-document field lengths. Raw term frequencies are stored, so k1, b and field weights are
+    query-time parameters; scoring a query is a sparse-vector gather over its terms' postings.
+    """
+
+    DEFAULT_WEIGHTS = {"title": 2.0, "description": 1.0, "cross_refs": 0.5}
+
+    def __init__(
+        self,
+        terms: np.ndarray,
+        doc_freq: np.ndarray,
+        n_docs: int,
+        fields: Dict[str, Dict[str, np.ndarray]],
+        generation: str = "",
+    ):
+        self.terms = terms
+        self.term_ids: Dict[str, int] = {t: i for i, t in enumerate(terms.tolist())}
+        self.doc_freq = doc_freq
+        self.n_docs = n_docs
+        self.fields = fields  # name -> {indptr, doc_ids, tf, doc_len}
+        self.avg_len = {name: float(f["doc_len"].mean()) if n_docs else 0.0 for name, f in fields.items()}
+        self.idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        self.generation = generation
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    @classmethod
+    def build(cls, fields: Dict[str, Sequence[str]], generation: str = "") -> "BM25Index":
+        """Build from `{field name: texts}`, every field holding one text per document."""
+        vocab: Dict[str, int] = {}
+        raw = {}
+        n_docs = max((len(texts) for texts in fields.values()), default=0)
+        for name, texts in fields.items():
+            rows, cols, vals, lengths = [], [], [], []
+            for doc, text in enumerate(texts):
+                tokens = tokenize(text)
+                lengths.append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    rows.append(vocab.setdefault(term, len(vocab)))
+                    cols.append(doc)
+                    vals.append(tf)
+            raw[name] = (
+                np.asarray(rows, dtype=np.int64),
+                np.asarray(cols, dtype=np.int32),
+                np.asarray(vals, dtype=np.float32),
+                lengths,
+            )
+
+        # renumber terms in sorted order so persisted indexes are deterministic
+        terms = np.asarray(sorted(vocab), dtype=str)
+        remap = np.empty(len(vocab), dtype=np.int64)
+        remap[[vocab[t] for t in terms.tolist()]] = np.arange(len(terms))
+
+        csr_fields = {}
+        postings_by_term = []
+        for name, (rows, cols, vals, lengths) in raw.items():
+            rows = remap[rows]
+            order = np.lexsort((cols, rows))
+            indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=len(terms)), out=indptr[1:])
+            csr_fields[name] = {
+                "indptr": indptr,
+                "doc_ids": cols[order],
+                "tf": vals[order],
+                "doc_len": np.asarray(lengths + [0] * (n_docs - len(lengths)), dtype=np.float32),
+            }
+            postings_by_term.append(np.stack([rows, cols.astype(np.int64)], axis=1))
+
+        # document frequency: docs containing the term in any field
+        pairs = np.unique(np.concatenate(postings_by_term or [np.empty((0, 2), np.int64)]), axis=0)
+        doc_freq = np.bincount(pairs[:, 0], minlength=len(terms)).astype(np.float64)
+        return cls(terms, doc_freq, n_docs, csr_fields, generation)
+
+    def save(self, path: Path):
+        arrays = {
+            "terms": self.terms,
+            "doc_freq": self.doc_freq,
+            "n_docs": np.asarray(self.n_docs),
+            "field_names": np.asarray(list(self.fields), dtype=str),
+            "generation": np.asarray(self.generation),
+        }
+        for name, field in self.fields.items():
+            arrays.update({f"{name}.{key}": value for key, value in field.items()})
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as npz:
+            fields = {
+                name: {key: npz[f"{name}.{key}"] for key in ("indptr", "doc_ids", "tf", "doc_len")}
+                for name in npz["field_names"].tolist()
+            }
+            return cls(npz["terms"], npz["doc_freq"], int(npz["n_docs"]), fields, str(npz["generation"]))
+
+    def scores(
+        self,
+        query: str,
+        k1: float = 1.2,
+        b: float = 0.75,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> np.ndarray:
+        """Dense BM25F score vector (one entry per document) for a query."""
+        weights = {**self.DEFAULT_WEIGHTS, **(weights or {})}
+        scores = np.zeros(self.n_docs)
+        for term, qtf in Counter(tokenize(query)).items():
+            tid = self.term_ids.get(term)
+            if tid is None:
+                continue
+            # length-normalized, field-weighted pseudo term frequency
+            pseudo_tf = np.zeros(self.n_docs)
+            for name, field in self.fields.items():
+                weight = weights.get(name, 0.0)
+                lo, hi = field["indptr"][tid], field["indptr"][tid + 1]
+                if weight == 0.0 or lo == hi:
+                    continue
+                docs, tf = field["doc_ids"][lo:hi], field["tf"][lo:hi]
+                norm = 1.0 - b + b * field["doc_len"][docs] / (self.avg_len[name] or 1.0)
+                pseudo_tf[docs] += weight * tf / norm
+            touched = np.flatnonzero(pseudo_tf)
+            tf_t = pseudo_tf[touched]
+            scores[touched] += qtf * self.idf[tid] * tf_t * (k1 + 1.0) / (tf_t + k1)
+        return scores
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        k1: float = 1.2,
+        b: float = 0.75,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Top-k `(doc index, score)` pairs with a positive score, best first."""
+        scores = self.scores(query, k1=k1, b=b, weights=weights)
+        docs = np.flatnonzero(scores > 0)
+        return _top_k(docs, scores[docs], limit, threshold=0.0)
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[int]],
+    k: int = 60,
+    limit: int = 10,
+) -> List[Tuple[int, float]]:
+    """Fuse ranked doc lists (best first) by summing `1 / (k + rank)`; returns `(doc, score)`."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            fused[doc] = fused.get(doc, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def reverse_adjacency(adjacency: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Invert `code -> [referenced codes]` into `code -> [codes referencing it]`, preserving order."""
+    reverse: Dict[str, List[str]] = {}
+    for code, related in adjacency.items():
+        for target in related:
+            reverse.setdefault(target, []).append(code)
+    return reverse
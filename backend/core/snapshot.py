@@ -0,0 +1,165 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+
+from core.cube import AggregateCube, records_measure_frame
+from core.graph import CrossRefGraph
+from core.pagination import KeysetPager
+from core.records import LazyRecords, RecordsByKey
+from core.responses import EncodedBodies
+from core.search import BM25Index, InvertedIndex, WordTrigramIndex, reverse_adjacency
+from core.vectors import DenseIndex
+
+
+def generation_for(timestamp: float) -> str:
+    """Generation id of a cache written at `timestamp`; stable across workers loading the same cache."""
+    return f"{int(timestamp * 1000):x}"
+
+
+@dataclass(frozen=True)
+class NAICSSnapshot:
+    """
+    Immutable, process-resident view of one processed lookups generation.\n
+    Built once from the cached pipeline result; every derived lookup the read endpoints need is
+    computed up front so serving a request never touches disk. Treat nested containers as read-only.
+    """
+
+    generation: str
+    timestamp: float
+    expires_at: float
+    mtime: float
+    lookups: Dict  # everything but the records (`naics`), which are `codes`
+    download_status: Dict
+    codes: LazyRecords  # record dicts over `records`, materialized as they are served
+    by_code: RecordsByKey
+    code_to_description: Dict[str, str]
+    code_to_sector: Dict[str, str]
+    cross_references: Dict[str, List[str]]
+    referenced_by: Dict[str, List[str]]
+    search_index: InvertedIndex
+    fuzzy_fields: Dict[str, Tuple[WordTrigramIndex, float]]  # field -> (index, weight), in `codes` order
+    graph: CrossRefGraph
+    bm25: BM25Index
+    dense: Optional[DenseIndex]  # embeddings aligned to `codes`, when provided
+    records: pa.Table  # the records, columnar (memory-mapped when loaded from the snapshot store)
+    pager: KeysetPager  # `codes` positions in code order, for cursor pagination
+    cube: Optional[AggregateCube]  # sector x level x defense x score-bucket aggregates of `records`
+    defense_codes: FrozenSet[str]
+    stats: Dict
+    loaded_at: float = field(default_factory=lambda: datetime.now().timestamp())
+    encoded: EncodedBodies = field(default_factory=EncodedBodies)  # response bodies encoded for this generation
+
+    @classmethod
+    def from_cache(
+        cls,
+        data: Dict,
+        mtime: float = 0.0,
+        graph: Optional[CrossRefGraph] = None,
+        bm25: Optional[BM25Index] = None,
+        dense: Optional[DenseIndex] = None,
+        records: Optional[pa.Table] = None,
+        cube: Optional[AggregateCube] = None,
+    ) -> "NAICSSnapshot":
+        """
+        Build a snapshot (and its derived lookups) from a `process_and_cache` result dict.
+
+        Indexes persisted by the pipeline (graph, BM25) are reused when they belong to the same
+        generation, otherwise they are rebuilt from the records (BM25 then lacks the cross-ref field).
+        Dense embeddings are only attached when they have exactly one row per code, and get their IVF
+        lists trained here. `records` is the Arrow table the codes were read from, if any (then `data`
+        may omit the `naics` records, and their dicts are built lazily as they are served); otherwise one
+        is built from the records. A persisted aggregate cube is likewise reused only for the same
+        generation and row count.
+        """
+        lookups = {key: value for key, value in data.get("lookups", {}).items() if key != "naics"}
+        rows = data.get("lookups", {}).get("naics")
+        if records is None or (rows is not None and records.num_rows != len(rows)):
+            records = pa.Table.from_pylist(rows or [])
+        codes = LazyRecords(records, rows)
+        indexes = lookups.get("indexes", {})
+        metadata = lookups.get("metadata", {})
+        timestamp = float(data.get("timestamp", 0))
+        generation = generation_for(timestamp)
+
+        # derived lookups come from whole columns, so a memory-mapped table is never turned into row dicts here
+        code_list = codes.column("code")
+        titles = [title or "" for title in codes.column("title")]
+        descriptions = [description or "" for description in codes.column("description")]
+        related = [related or [] for related in codes.column("related_codes")]
+        if graph is None or graph.generation != generation:
+            frame = pd.DataFrame({"naics_code": code_list, "related_codes": related})
+            graph = CrossRefGraph.from_related_codes(frame, generation=generation)
+        if dense is not None and len(dense) != len(codes):
+            print(f"Warning: Ignoring embeddings with {len(dense)} rows for {len(codes)} codes.")
+            dense = None
+        if dense is not None and dense.ivf is None:  # trained here, off the request path
+            dense.build_ivf()
+        if cube is None or cube.generation != generation or cube.total != len(codes):
+            cube = AggregateCube.build(records_measure_frame(records), generation) if len(codes) else None
+        if bm25 is None or bm25.generation != generation or len(bm25) != len(codes):
+            bm25 = BM25Index.build({"title": titles, "description": descriptions}, generation=generation)
+
+        cross_references = dict(zip(code_list, related))
+        code_to_description = dict(zip(code_list, descriptions))
+        stats = {
+            "total_codes": metadata.get("total_codes", len(codes)),
+            "defense_count": metadata.get("defense_count", 0),
+            "avg_cross_refs": metadata.get("avg_cross_refs", 0.0),
+            "codes_with_cross_refs": len(indexes.get("codes_with_cross_refs", [])),
+            "high_defense_codes": len(indexes.get("high_defense_codes", [])),
+            "processed_at": metadata.get("processed_at"),
+        }
+        return cls(
+            generation=generation,
+            timestamp=timestamp,
+            expires_at=float(data.get("expires_at", timestamp + 604800)),
+            mtime=mtime,
+            lookups=lookups,
+            download_status=data.get("download_status", {}),
+            codes=codes,
+            by_code=RecordsByKey(codes, code_list),
+            code_to_description=code_to_description,
+            code_to_sector={code: sector or "" for code, sector in zip(code_list, codes.column("sector"))},
+            cross_references=cross_references,
+            referenced_by=reverse_adjacency(cross_references),
+            search_index=InvertedIndex(code_to_description.keys(), code_to_description.values()),
+            fuzzy_fields={
+                "title": (WordTrigramIndex(titles), 1.0),
+                "description": (WordTrigramIndex(descriptions), 0.9),
+            },
+            graph=graph,
+            bm25=bm25,
+            dense=dense,
+            records=records,
+            pager=KeysetPager.build(code_list),
+            cube=cube,
+            defense_codes=frozenset(indexes.get("defense_codes", [])),
+            stats=stats,
+        )
+
+    @property
+    def expired(self) -> bool:
+        return datetime.now().timestamp() > self.expires_at
+
+    @property
+    def last_modified(self) -> float:
+        """When the lookups were processed (falls back to the cache timestamp)."""
+        try:
+            return datetime.fromisoformat(self.stats.get("processed_at")).timestamp()
+        except (TypeError, ValueError):
+            return self.timestamp
+
+    def export_lookups(self) -> Dict:
+        """The full lookups, records included (materializing every record dict)."""
+        return {"naics": self.codes.to_list(), **self.lookups}
+
+    def payload(self) -> Dict:
+        """Return the snapshot in the `process_and_cache` result shape."""
+        return {
+            "lookups": self.export_lookups(),
+            "download_status": self.download_status,
+            "timestamp": self.timestamp,
+            "expires_at": self.expires_at,
+        }
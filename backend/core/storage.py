@@ -0,0 +1,151 @@
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+import pyarrow as pa
+import pandas as pd
+import hashlib, json, os, shutil
+
+from core.snapshot import generation_for
+
+SCHEMA_VERSION = 1
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Streamed SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frame_to_ipc(df: pd.DataFrame) -> bytes:
+    """Serialize a DataFrame as an Arrow IPC stream, far cheaper to ship between processes than a pickle."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def frame_from_ipc(buffer: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+
+class SnapshotStore:
+    """
+    Versioned, columnar on-disk form of a processed lookups generation.\n
+    - `manifest.json`: tiny pointer to the current generation (timestamp, expiry, source hashes,
+      schema version, file sizes), so freshness checks never parse the data itself
+    - `<generation>/records.arrow`: Arrow IPC file of the lookup records, memory-mapped on load
+    - `<generation>/extras.json`: indexes, metadata, relationship analysis and download status
+    - `<generation>/<name>.npz`: graph and retrieval index arrays
+    A generation directory is fully written before the manifest is atomically replaced.
+    """
+
+    def __init__(self, root: Path, keep_generations: int = 2):
+        self.root = root
+        self.manifest_file = root / "manifest.json"
+        self.keep_generations = keep_generations
+
+    def read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_file, "r") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if manifest.get("schema_version") != SCHEMA_VERSION:
+            print(f"Snapshot schema {manifest.get('schema_version')} != {SCHEMA_VERSION}, ignoring.")
+            return None
+        return manifest
+
+    def manifest_mtime(self) -> float:
+        try:
+            return self.manifest_file.stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def path(self, manifest: Dict, name: str) -> Path:
+        return self.root / manifest["generation"] / manifest["files"][name]["path"]
+
+    def write(
+        self,
+        result: Dict,
+        table: pa.Table,
+        artifacts: Dict[str, object],
+        source_hashes: Dict[str, str],
+    ) -> Dict:
+        """Persist a `process_and_cache` result (plus `.save(path)`-able artifacts) as a new generation."""
+        generation = generation_for(result["timestamp"])
+        gen_dir = self.root / generation
+        tmp_dir = self.root / f".{generation}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        files = {"records": "records.arrow", "extras": "extras.json"}
+        with pa.OSFile(str(tmp_dir / files["records"]), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:  # uncompressed, so loads can mmap
+                writer.write_table(table)
+
+        lookups = result["lookups"]
+        extras = {
+            "lookups": {key: value for key, value in lookups.items() if key != "naics"},
+            "download_status": result.get("download_status", {}),
+        }
+        with open(tmp_dir / files["extras"], "w") as f:
+            json.dump(extras, f)
+
+        for name, artifact in artifacts.items():
+            files[name] = f"{name}.npz"
+            artifact.save(tmp_dir / files[name])
+
+        shutil.rmtree(gen_dir, ignore_errors=True)
+        os.replace(tmp_dir, gen_dir)
+
+        manifest = {
+            "schema_version": SCHEMA_VERSION,
+            "generation": generation,
+            "timestamp": result["timestamp"],
+            "expires_at": result["expires_at"],
+            "processed_at": lookups.get("metadata", {}).get("processed_at"),
+            "written_at": datetime.now().timestamp(),
+            "row_count": table.num_rows,
+            "source_hashes": source_hashes,
+            "files": {name: {"path": path, "bytes": (gen_dir / path).stat().st_size} for name, path in files.items()},
+        }
+        tmp_manifest = self.root / ".manifest.json.tmp"
+        with open(tmp_manifest, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_manifest, self.manifest_file)
+
+        self._prune(keep=generation)
+        return manifest
+
+    def load(self, manifest: Dict) -> Tuple[Dict, pa.Table]:
+        """
+        Load a generation as `(result dict, records table)`; the table is memory-mapped, not copied, and the
+        result's lookups leave out the `naics` records (the snapshot serves them from the table).
+        """
+        source = pa.memory_map(str(self.path(manifest, "records")), "r")
+        table = pa.ipc.open_file(source).read_all()
+        with open(self.path(manifest, "extras"), "r") as f:
+            extras = json.load(f)
+
+        data = {
+            "lookups": extras["lookups"],
+            "download_status": extras.get("download_status", {}),
+            "timestamp": manifest["timestamp"],
+            "expires_at": manifest["expires_at"],
+        }
+        return data, table
+
+    def _prune(self, keep: str):
+        """Drop all but the newest `keep_generations` generation directories (never the current one)."""
+        generations = sorted(
+            (p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith(".")),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for stale in generations[self.keep_generations :]:
+            if stale.name != keep:
+                shutil.rmtree(stale, ignore_errors=True)
@@ -0,0 +1,160 @@
+from pathlib import Path
+from typing import List, Literal, Optional, Tuple
+import numpy as np
+import threading
+
+
+class DenseIndex:
+    """
+    Cosine top-k over a (possibly memory-mapped) embedding matrix, one row per document.\n
+    - `exact`: chunked, batched matmul against every row, so float16 matrices larger than RAM
+      are streamed from the mmap one block at a time
+    - `ivf`: inverted-file approximation (spherical k-means coarse quantizer); a query only
+      scores the rows of its `nprobe` nearest lists
+    """
+
+    def __init__(self, matrix: np.ndarray, chunk_rows: int = 65536):
+        if matrix.ndim != 2:
+            raise ValueError(f"Embedding matrix must be 2-D, got shape {matrix.shape}")
+        self.matrix = matrix
+        self.chunk_rows = chunk_rows
+        self._ivf: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._ivf_lock = threading.Lock()
+
+        # row norms once, so searches only pay for the matmul
+        norms = np.empty(len(matrix), dtype=np.float32)
+        for lo in range(0, len(matrix), chunk_rows):
+            block = np.asarray(matrix[lo : lo + chunk_rows], dtype=np.float32)
+            norms[lo : lo + len(block)] = np.linalg.norm(block, axis=1)
+        self.inv_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def ivf(self) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """`(centroids, indptr, row ids)` once `build_ivf` has run, else None."""
+        return self._ivf
+
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> "DenseIndex":
+        """Memory-map a float32/float16 `.npy` matrix rather than reading it into memory."""
+        matrix = np.load(path, mmap_mode="r")
+        if matrix.dtype not in (np.float32, np.float16):
+            raise ValueError(f"Unsupported embedding dtype {matrix.dtype}; expected float32 or float16")
+        return cls(matrix, **kwargs)
+
+    def _normalize(self, queries: np.ndarray) -> np.ndarray:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"Query dimension {queries.shape[1]} does not match index dimension {self.dim}")
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        return np.divide(queries, norms, out=np.zeros_like(queries), where=norms > 0)
+
+    @staticmethod
+    def _merge_top_k(
+        best: Tuple[np.ndarray, np.ndarray],
+        rows: np.ndarray,
+        sims: np.ndarray,
+        limit: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Fold a block of (m, n) similarities into running (m, limit) top-k rows/scores."""
+        all_rows = np.concatenate([best[0], np.broadcast_to(rows, sims.shape)], axis=1)
+        all_sims = np.concatenate([best[1], sims], axis=1)
+        if all_sims.shape[1] > limit:
+            top = np.argpartition(-all_sims, limit - 1, axis=1)[:, :limit]
+            all_rows = np.take_along_axis(all_rows, top, axis=1)
+            all_sims = np.take_along_axis(all_sims, top, axis=1)
+        return all_rows, all_sims
+
+    @staticmethod
+    def _ranked(rows: np.ndarray, sims: np.ndarray) -> List[List[Tuple[int, float]]]:
+        results = []
+        for r, s in zip(rows, sims):
+            order = np.lexsort((r, -s))
+            results.append([(int(r[i]), float(s[i])) for i in order if r[i] >= 0])
+        return results
+
+    def search_exact(self, queries: np.ndarray, limit: int = 10) -> List[List[Tuple[int, float]]]:
+        """Exact cosine top-k for a batch of queries, one BLAS matmul per matrix chunk."""
+        q = self._normalize(queries)
+        best = (np.full((len(q), 0), -1, dtype=np.int64), np.empty((len(q), 0), dtype=np.float32))
+        for lo in range(0, len(self), self.chunk_rows):
+            block = np.asarray(self.matrix[lo : lo + self.chunk_rows], dtype=np.float32)
+            sims = (q @ block.T) * self.inv_norms[lo : lo + len(block)]
+            best = self._merge_top_k(best, np.arange(lo, lo + len(block)), sims, limit)
+        return self._ranked(*best)
+
+    def build_ivf(self, nlist: Optional[int] = None, iters: int = 10, sample: int = 50_000, seed: int = 0):
+        """
+        Train a spherical k-means coarse quantizer and bucket every row into its nearest list.\n
+        Stored as (centroids, list indptr, row ids grouped by list), i.e. CSR over lists.
+        """
+        n = len(self)
+        nlist = nlist or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        train_rows = np.sort(rng.choice(n, size=min(n, sample), replace=False))
+        train = np.asarray(self.matrix[train_rows], dtype=np.float32) * self.inv_norms[train_rows, None]
+        centroids = train[rng.choice(len(train), size=min(nlist, len(train)), replace=False)]
+        for _ in range(iters):
+            assign = np.argmax(train @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, train)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # empty lists keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1.0), centroids)
+
+        assign = np.empty(n, dtype=np.int64)
+        for lo in range(0, n, self.chunk_rows):
+            block = np.asarray(self.matrix[lo : lo + self.chunk_rows], dtype=np.float32)
+            assign[lo : lo + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        indptr = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=len(centroids)), out=indptr[1:])
+        self._ivf = (centroids, indptr, order)
+        return self._ivf
+
+    def search_ivf(
+        self,
+        queries: np.ndarray,
+        limit: int = 10,
+        nprobe: int = 8,
+        nlist: Optional[int] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Approximate top-k scoring only rows in each query's `nprobe` closest lists (at most all of them).\n
+        The lists are trained on first use if `build_ivf` hasn't been called; the snapshot builds them up front.
+        """
+        if nprobe < 1:
+            raise ValueError(f"nprobe must be at least 1, got {nprobe}")
+        with self._ivf_lock:
+            centroids, indptr, order = self._ivf or self.build_ivf(nlist)
+        nprobe = min(nprobe, len(centroids))
+        q = self._normalize(queries)
+        probes = np.argsort(-(q @ centroids.T), axis=1)[:, :nprobe]
+
+        results = []
+        for qi, lists in enumerate(probes):
+            rows = np.sort(np.concatenate([order[indptr[c] : indptr[c + 1]] for c in lists]))
+            if rows.size == 0:
+                results.append([])
+                continue
+            sims = (np.asarray(self.matrix[rows], dtype=np.float32) @ q[qi]) * self.inv_norms[rows]
+            best = (np.full((1, 0), -1, dtype=np.int64), np.empty((1, 0), dtype=np.float32))
+            results.extend(self._ranked(*self._merge_top_k(best, rows, sims[None, :], limit)))
+        return results
+
+    def search(
+        self,
+        queries: np.ndarray,
+        limit: int = 10,
+        mode: Literal["exact", "ivf"] = "exact",
+        nprobe: int = 8,
+    ) -> List[List[Tuple[int, float]]]:
+        if mode == "ivf":
+            return self.search_ivf(queries, limit=limit, nprobe=nprobe)
+        return self.search_exact(queries, limit=limit)
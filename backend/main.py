@@ -1,9 +1,33 @@
+from contextlib import asynccontextmanager, suppress
+import asyncio
+
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from core import naics
+from core import dataviz, jobs, metrics, naics
+from core.caching import CacheHeadersMiddleware
+from core.metrics import MetricsMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # warm the resident NAICS snapshot before accepting traffic
+    await run_in_threadpool(naics.get_processor().load_snapshot)
+    # then keep it fresh: rebuild in the background ahead of expiry (see core.refresh)
+    scheduler = asyncio.create_task(naics.get_refresher().schedule(naics.snapshot_expires_at))
+    yield
+    scheduler.cancel()
+    with suppress(asyncio.CancelledError):
+        await scheduler
+    jobs.get_job_runner().shutdown()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.include_router(naics.router)
+app.include_router(dataviz.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
+app.add_middleware(CacheHeadersMiddleware)  # ETag/Cache-Control left by route validators (see core.caching)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -11,6 +35,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)  # outermost: per-route latency and in-flight requests (see core.metrics)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,58 @@
+from pathlib import Path
+import contextlib, io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from bench.synthetic import write_workbooks
+from core import jobs, naics
+
+
+@pytest.fixture(scope="session")
+def built(tmp_path_factory) -> naics.NAICSProcessor:
+    """
+    The processor that ran the pipeline on synthetic workbooks, never the real `core/data`; its
+    resident snapshot is the one built in memory, not read back from the store.
+    """
+    root = tmp_path_factory.mktemp("naics")
+    write_workbooks(root, scale=0.5, seed=0)
+    processor = naics.NAICSProcessor(root)
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor.process_and_cache(download=False)
+    return processor
+
+
+@pytest.fixture(scope="session")
+def data_dir(built: naics.NAICSProcessor) -> Path:
+    return built.data_dir
+
+
+@pytest.fixture(scope="session")
+def processor(data_dir: Path) -> naics.NAICSProcessor:
+    """A processor serving `data_dir` from its snapshot store, installed as the app's global one."""
+    processor = naics.NAICSProcessor(data_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor.load_snapshot()
+    previous, naics._processor = naics._processor, processor
+    yield processor
+    naics._processor = previous
+
+
+@pytest.fixture(scope="session")
+def snapshot(processor: naics.NAICSProcessor) -> naics.NAICSSnapshot:
+    return processor.get_snapshot()
+
+
+@pytest.fixture(scope="session")
+def client(processor: naics.NAICSProcessor) -> TestClient:
+    """The app without its lifespan, so no refresh is ever scheduled."""
+    from main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def runner(tmp_path: Path) -> jobs.JobRunner:
+    runner = jobs.JobRunner(tmp_path / "jobs")
+    yield runner
+    runner.shutdown()
@@ -0,0 +1,175 @@
+from dataclasses import replace
+from email.utils import formatdate
+import gzip, io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from prometheus_client import REGISTRY
+
+from core import naics
+from core.pagination import encode_cursor, filter_fingerprint
+
+NDJSON = {"accept": "application/x-ndjson"}
+
+
+# ETag / 304
+
+
+def test_conditional_get_returns_304(client, snapshot):
+    path = f"/naics/codes/{snapshot.codes[5]['code']}"
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith(f'"{snapshot.generation}-')
+
+    revalidated = client.get(path, headers={"if-none-match": etag})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+    # weak comparison, and a list of candidates
+    assert client.get(path, headers={"if-none-match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get(path, headers={"if-none-match": '"other"'}).status_code == 200
+
+
+def test_etag_varies_with_the_representation(client):
+    plain = client.get("/naics/codes?limit=5").headers["etag"]
+    assert client.get("/naics/codes?limit=6").headers["etag"] != plain
+    assert client.get("/naics/codes?limit=5", headers=NDJSON).headers["etag"] != plain
+    assert client.get("/naics/codes?limit=5", headers={"if-none-match": plain}).status_code == 304
+
+
+def test_if_modified_since(client, snapshot):
+    since = formatdate(snapshot.last_modified, usegmt=True)
+    assert client.get("/stats", headers={"if-modified-since": since}).status_code == 304
+    earlier = formatdate(snapshot.last_modified - 3600, usegmt=True)
+    assert client.get("/stats", headers={"if-modified-since": earlier}).status_code == 200
+    # If-None-Match takes precedence when both are sent
+    assert client.get("/stats", headers={"if-modified-since": since, "if-none-match": '"x"'}).status_code == 200
+
+
+# cursor paging
+
+
+def test_cursor_pages_cover_every_code_once(client, snapshot):
+    codes, cursor = [], None
+    while True:
+        params = {"limit": 97, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/naics/codes", params=params).json()
+        codes += [c["code"] for c in page["codes"]]
+        assert not page["generation_changed"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert codes == sorted(c["code"] for c in snapshot.codes)
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", "e30", "bm90IGpzb24"])
+def test_malformed_cursor_is_400(client, cursor):
+    response = client.get("/naics/codes", params={"limit": 10, "cursor": cursor})
+    assert response.status_code == 400
+    assert "Malformed cursor" in response.json()["detail"]
+
+
+def test_cursor_for_other_filters_is_400(client):
+    cursor = client.get("/naics/codes", params={"limit": 10, "defense_only": True}).json()["next_cursor"]
+    response = client.get("/naics/codes", params={"limit": 10, "cursor": cursor})
+    assert response.status_code == 400
+    assert "different filters" in response.json()["detail"]
+
+
+def test_cursor_from_older_generation_resumes(client, snapshot):
+    filters = filter_fingerprint({"defense_only": False, "sector": None, "min_cross_refs": 0})
+    after = snapshot.codes[10]["code"]
+    cursor = encode_cursor(after, "older-generation", filters)
+    page = client.get("/naics/codes", params={"limit": 5, "cursor": cursor}).json()
+    assert page["generation_changed"] and page["codes"][0]["code"] > after
+
+    streamed = client.get("/naics/codes", params={"limit": 5, "cursor": cursor}, headers=NDJSON)
+    assert streamed.headers["x-generation-changed"] == "true"
+    assert len(streamed.text.splitlines()) == 5
+
+
+# exports
+
+
+def test_export_csv(client, snapshot):
+    response = client.get("/export/csv")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/csv")
+    df = pd.read_csv(io.BytesIO(response.content), dtype={"naics_code": str})
+    assert len(df) == snapshot.records.num_rows
+    assert df["naics_code"].tolist() == snapshot.records.column("code").to_pylist()
+
+
+def test_export_parquet_and_arrow_match_records(client, snapshot):
+    parquet = pq.read_table(io.BytesIO(client.get("/export/parquet").content))
+    assert parquet.equals(snapshot.records)
+    arrow = pa.ipc.open_stream(client.get("/export/arrow").content).read_all()
+    assert arrow.equals(snapshot.records)
+
+
+def test_export_column_subset_and_gzip(client, snapshot):
+    response = client.get("/export/arrow", params={"columns": "code,sector", "gzip": True})
+    assert response.headers["content-type"] == "application/gzip"
+    assert "comprehensive_naics_data.arrow.gz" in response.headers["content-disposition"]
+    table = pa.ipc.open_stream(gzip.decompress(response.content)).read_all()
+    assert table.column_names == ["code", "sector"] and table.num_rows == snapshot.records.num_rows
+
+
+def test_export_json_is_the_lookups_document(client, snapshot):
+    document = client.get("/export/json").json()
+    assert document["naics"] == snapshot.codes.to_list()
+    assert document["metadata"] == snapshot.lookups["metadata"]
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [("/export/xml", {}), ("/export/csv", {"columns": "code,nope"}), ("/export/json", {"gzip": True})],
+)
+def test_export_rejects_bad_requests(client, path, params):
+    assert client.get(path, params=params).status_code == 400
+
+
+# /naics/data cache lookups
+
+
+class StubRefresher:
+    """Records rebuild requests instead of running them."""
+
+    def __init__(self):
+        self.reasons = []
+
+    def trigger(self, reason: str):
+        self.reasons.append(reason)
+
+    async def refresh(self, reason: str):
+        self.reasons.append(reason)
+
+
+def lookups() -> dict:
+    return {
+        result: REGISTRY.get_sample_value("naics_snapshot_cache_total", {"result": result}) or 0.0
+        for result in ("hit", "miss", "expired")
+    }
+
+
+def test_naics_data_counts_cache_lookups(client, processor, snapshot, monkeypatch):
+    refresher = StubRefresher()
+    monkeypatch.setattr(naics, "_refresher", refresher)
+
+    before = lookups()
+    assert client.get("/naics/data").status_code == 200
+    assert lookups() == {**before, "hit": before["hit"] + 1}
+
+    monkeypatch.setattr(processor, "_snapshot", replace(snapshot, expires_at=0.0))
+    before = lookups()
+    assert client.get("/naics/data").status_code == 200
+    assert lookups() == {**before, "expired": before["expired"] + 1}
+    assert refresher.reasons == ["expired"]
+
+    monkeypatch.setitem(client.app.dependency_overrides, naics.current_snapshot, lambda: None)
+    monkeypatch.setattr(processor, "_snapshot", snapshot)
+    before = lookups()
+    assert client.get("/naics/data").status_code == 200
+    assert lookups() == {**before, "miss": before["miss"] + 1}
+    assert refresher.reasons == ["expired", "no snapshot"]
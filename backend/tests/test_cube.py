@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.cube import MEASURES, AggregateCube, records_measure_frame
+
+
+@pytest.fixture(scope="module")
+def frame(snapshot) -> pd.DataFrame:
+    return records_measure_frame(snapshot.records)
+
+
+def grouped(frame: pd.DataFrame, by: list) -> pd.DataFrame:
+    """What `AggregateCube.rollup` should return, computed row by row with a pandas groupby."""
+    aggregations = {"count": ("naics_code", "size")}
+    for name in MEASURES:
+        for stat in ("sum", "mean", "min", "max"):
+            aggregations[f"{name}_{stat}"] = (name, stat)
+    if not by:
+        return frame.assign(all="all").groupby("all").agg(**aggregations).rename_axis(None)
+    return frame.groupby(by).agg(**aggregations)
+
+
+@pytest.mark.parametrize("by", [[], ["sector"], ["level"], ["sector", "level"], ["defense_related", "score_bucket"]])
+def test_rollup_matches_groupby(snapshot, frame, by):
+    expected = grouped(frame, by)
+    actual = snapshot.cube.rollup(by)
+    assert list(actual.index) == list(expected.index)
+    assert actual["count"].tolist() == expected["count"].tolist()
+    for column in expected.columns.drop("count"):
+        assert np.allclose(actual[column], expected[column]), column
+
+
+def test_filtered_rollup_matches_groupby(snapshot, frame):
+    where = {"defense_related": True, "level": [5, 6]}
+    subset = frame[frame["defense_related"] & frame["level"].isin([5, 6])]
+    expected = grouped(subset, ["sector"])
+    actual = snapshot.cube.rollup(["sector"], where)
+    assert actual["count"].tolist() == expected["count"].tolist()
+    assert np.allclose(actual["cross_ref_count_sum"], expected["cross_ref_count_sum"])
+
+
+def test_quantile_sketch_lands_in_the_exact_values_bin(snapshot, frame):
+    for name, edges in MEASURES.items():
+        for q in (0.5, 0.9):
+            exact = frame[name].quantile(q, interpolation="lower")
+            bin_ = np.searchsorted(edges, exact, side="right") - 1
+            upper = edges[bin_ + 1] if bin_ + 1 < len(edges) else frame[name].max()
+            assert edges[bin_] <= snapshot.cube.quantile(name, q) <= upper, (name, q, exact)
+
+
+def test_rollup_rejects_unknown_dimensions(snapshot):
+    with pytest.raises(ValueError):
+        snapshot.cube.rollup(["naics_code"])
+    with pytest.raises(ValueError):
+        snapshot.cube.rollup([], {"nope": 1})
+
+
+def test_save_and_load(snapshot, tmp_path):
+    snapshot.cube.save(tmp_path / "cube.npz")
+    loaded = AggregateCube.load(tmp_path / "cube.npz")
+    pd.testing.assert_frame_equal(
+        loaded.rollup(["sector"], quantiles=[0.5]), snapshot.cube.rollup(["sector"], quantiles=[0.5])
+    )
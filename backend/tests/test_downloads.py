@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import httpx
+
+from core.downloads import SourceDownloader
+
+URL = "https://example.test/naics.xlsx"
+BODY = b"workbook bytes " * 10_000
+ETAG = '"v1"'
+LAST_MODIFIED = "Mon, 06 Oct 2025 00:00:00 GMT"
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    """A body that drops the connection after its first chunk."""
+
+    async def __aiter__(self):
+        yield BODY[:1000]
+        raise httpx.ReadError("connection reset")
+
+
+def downloader(handler, **kwargs) -> SourceDownloader:
+    return SourceDownloader(transport=httpx.MockTransport(handler), backoff=0, chunk_size=4096, **kwargs)
+
+
+def fetch(downloader: SourceDownloader, path: Path) -> dict:
+    return downloader.download({"codes": (URL, path)})["codes"]
+
+
+def leftovers(path: Path) -> list:
+    return sorted(p.name for p in path.parent.iterdir() if p.name.endswith(".part"))
+
+
+def test_downloads_then_revalidates_with_304(tmp_path):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(dict(request.headers))
+        if request.headers.get("if-none-match") == ETAG:
+            return httpx.Response(304)
+        return httpx.Response(200, content=BODY, headers={"ETag": ETAG, "Last-Modified": LAST_MODIFIED})
+
+    path = tmp_path / "codes.xlsx"
+    first = fetch(downloader(handler), path)
+    assert first["status"] == "downloaded" and first["bytes"] == len(BODY)
+    assert path.read_bytes() == BODY
+    assert "if-none-match" not in seen[0]
+
+    second = fetch(downloader(handler), path)
+    assert second["status"] == "not_modified" and second["bytes"] == 0
+    assert seen[1]["if-none-match"] == ETAG
+    assert seen[1]["if-modified-since"] == LAST_MODIFIED
+    assert path.read_bytes() == BODY
+
+
+def test_retries_5xx_with_backoff(tmp_path):
+    statuses = iter([503, 502, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = next(statuses)
+        return httpx.Response(status, content=BODY if status == 200 else b"busy")
+
+    path = tmp_path / "codes.xlsx"
+    result = fetch(downloader(handler, retries=3), path)
+    assert result["status"] == "downloaded" and result["attempts"] == 3
+    assert path.read_bytes() == BODY
+
+
+def test_gives_up_after_retries(tmp_path):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(503)
+
+    path = tmp_path / "codes.xlsx"
+    result = fetch(downloader(handler, retries=2), path)
+    assert result["status"] == "failed" and result["error"] == "HTTP 503"
+    assert len(calls) == 3
+    assert not path.exists()
+
+
+def test_client_errors_are_not_retried(tmp_path):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(404)
+
+    result = fetch(downloader(handler, retries=3), tmp_path / "codes.xlsx")
+    assert result["status"] == "failed" and result["error"] == "HTTP 404"
+    assert len(calls) == 1
+
+
+def test_failed_refresh_keeps_the_stale_copy(tmp_path):
+    path = tmp_path / "codes.xlsx"
+    path.write_bytes(b"previous copy")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("census.gov unreachable")
+
+    result = fetch(downloader(handler, retries=1), path)
+    assert result["status"] == "stale" and result["error"].startswith("ConnectError")
+    assert path.read_bytes() == b"previous copy"
+
+
+def test_interrupted_body_leaves_no_partial_file(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=BrokenStream(), headers={"ETag": ETAG})
+
+    path = tmp_path / "codes.xlsx"
+    result = fetch(downloader(handler, retries=1), path)
+    assert result["status"] == "failed" and result["attempts"] == 2
+    assert not path.exists() and leftovers(path) == []
+
+    # an existing copy survives an interrupted refresh untouched
+    path.write_bytes(b"previous copy")
+    result = fetch(downloader(handler, retries=1), path)
+    assert result["status"] == "stale"
+    assert path.read_bytes() == b"previous copy" and leftovers(path) == []
+    assert not SourceDownloader.sidecar(path).exists()
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from core import jobs
+from core.jobs import JobError, Task
+
+TIMEOUT = 60
+
+
+def failed(job: jobs.Job) -> str:
+    """The error of a job that must fail, after checking `wait` raises rather than returning."""
+    with pytest.raises(JobError):
+        job.wait(TIMEOUT)
+    assert job.status == "failed" and job.finished_at is not None
+    return job.error
+
+
+def test_exception_in_the_job_fails_it(runner, tmp_path):
+    assert failed(runner.submit("export", {"format": "xml"})).startswith("ValueError: Format must be")
+    empty = runner.submit("export", {"data_dir": str(tmp_path / "empty")})
+    assert failed(empty) == "ValueError: NAICS data not processed yet"
+
+
+def test_process_exiting_without_a_result_fails_the_job(runner, monkeypatch):
+    monkeypatch.setitem(jobs.TASKS, "exit", Task("sys:exit"))  # SystemExit skips the job's error report
+    assert failed(runner.submit("exit")) == "job process exited without a result"
+
+
+def test_process_that_cannot_start_fails_the_job(runner, monkeypatch):
+    def unstartable(job, task):
+        raise OSError("Too many open files")
+
+    monkeypatch.setattr(runner, "_start", unstartable)
+    error = failed(runner.submit("export", {"format": "csv"}))
+    assert error == "Job process failed to start: OSError: Too many open files"
+
+
+def test_failing_on_success_hook_fails_the_job(runner, monkeypatch):
+    monkeypatch.setitem(jobs.TASKS, "hooked", Task("builtins:repr", on_success="builtins:int"))
+    assert failed(runner.submit("hooked")).startswith("TypeError")
+
+
+def test_failed_job_through_the_api(client, processor, runner, monkeypatch):
+    monkeypatch.setattr(jobs, "_runner", runner)
+    submitted = client.post("/jobs", json={"kind": "export", "params": {"format": "csv", "columns": "nope"}})
+    assert submitted.status_code == 202
+    # jobs always run against the serving processor's data
+    assert submitted.json()["params"]["data_dir"] == str(processor.data_dir)
+
+    deadline = time.monotonic() + TIMEOUT
+    while (job := client.get(f"/jobs/{submitted.json()['id']}").json())["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert job["status"] == "failed" and job["error"].startswith("ValueError: Unknown columns")
+    assert client.get(f"/jobs/{job['id']}/artifact").status_code == 404
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"kind": "rebuild", "params": {"data_dir": "/tmp/elsewhere"}},
+        {"kind": "export", "params": {"output_dir": "/tmp/elsewhere"}},
+        {"kind": "dataviz", "params": {"dpi": 300, "colour": "red"}},
+        {"kind": "export", "params": {"format": "xml"}},
+        {"kind": "dataviz", "params": {"dpi": 10_000}},
+        {"kind": "shell", "params": {}},
+    ],
+)
+def test_api_rejects_params_outside_the_kinds_model(client, runner, monkeypatch, body):
+    monkeypatch.setattr(jobs, "_runner", runner)
+    assert client.post("/jobs", json=body).status_code == 422
+    assert runner.jobs() == []
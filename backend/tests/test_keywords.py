@@ -0,0 +1,46 @@
+import pandas as pd
+
+from core.keywords import DEFENSE_TAXONOMY, HIGH_DEFENSE_SCORE, KeywordScorer
+from core.naics import NAICSProcessor
+
+TEXTS = pd.Series([
+    "Establishments primarily engaged in providing support services.",
+    "Repair and maintenance services, with consulting and training support.",
+    "Manufacturing guided missiles and their support equipment.",
+    "Computer systems design services.",
+    "Growing wheat.",
+])
+
+
+def test_generic_words_alone_are_not_defense():
+    scores = KeywordScorer(DEFENSE_TAXONOMY).score(TEXTS)
+    assert scores["keyword_count"].tolist() == [2, 6, 3, 3, 0]
+    assert scores["score"].tolist() == [0.5, 1.5, 3.5, 1.75, 0.0]
+    # six generic words outscore one specific keyword, yet only the specific one qualifies
+    assert scores["related"].tolist() == [False, False, True, True, False]
+
+
+def test_plain_and_trie_patterns_agree():
+    assert KeywordScorer(DEFENSE_TAXONOMY, trie=True).score(TEXTS).equals(
+        KeywordScorer(DEFENSE_TAXONOMY, trie=False).score(TEXTS)
+    )
+
+
+def test_support_services_code_is_not_counted_as_defense():
+    df = pd.DataFrame({"naics_code": ["561210", "336414"], "description": TEXTS[[0, 2]].tolist()})
+    analysed = NAICSProcessor._add_defense_analysis(None, KeywordScorer(DEFENSE_TAXONOMY), df)
+    assert analysed["defense_related"].tolist() == [False, True]
+
+
+def test_snapshot_indexes_follow_the_score(snapshot):
+    records = snapshot.records.to_pandas()
+    indexes = snapshot.lookups["indexes"]
+    high = records.loc[records["defense_score"] >= HIGH_DEFENSE_SCORE, "code"]
+    assert set(indexes["high_defense_codes"]) == set(high)
+    assert snapshot.defense_codes == set(records.loc[records["defense_related"], "code"])
+    assert len(snapshot.defense_codes) == snapshot.lookups["metadata"]["defense_count"]
+    # every defense code matched something other than the generic service words
+    generic = set(DEFENSE_TAXONOMY["services"])
+    scorer = KeywordScorer(DEFENSE_TAXONOMY)
+    for description in records.loc[records["defense_related"], "description"]:
+        assert set(scorer.matches(description)) - generic
@@ -0,0 +1,69 @@
+import inspect
+
+import pandas as pd
+
+from core.pipeline import Pipeline, Stage, _code_closure
+
+SCALE = 3
+
+
+def scaled(values: list) -> list:
+    return [value * SCALE for value in values]
+
+
+def frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "naics_code": ["11", "111", "1111"],
+        "related_codes": [[], ["111"], ["11", "111"]],
+        "defense_categories": [{}, {"space": ["satellite"]}, {"weapons": ["munitions"], "space": []}],
+        "score": scaled([0.0, 1.5, float("nan")]),
+    })
+
+
+def summary(df: pd.DataFrame) -> dict:
+    return {"codes": df["naics_code"].tolist(), "related": int(df["related_codes"].map(len).sum())}
+
+
+def stages(calls: list) -> list:
+    def counted(name, fn):
+        def run(*args):
+            calls.append(name)
+            return fn(*args)
+        return run
+
+    return [
+        Stage("frame", counted("frame", frame)),
+        Stage("summary", counted("summary", summary), ("frame",)),
+        Stage("opaque", counted("opaque", lambda df: {"a", "set"}), ("frame",)),
+    ]
+
+
+def test_memos_round_trip_without_pickles(tmp_path):
+    calls = []
+    first = Pipeline(stages(calls), tmp_path).run()
+    second = Pipeline(stages(calls), tmp_path).run(["frame", "summary"])
+    assert calls == ["frame", "summary", "opaque"]
+
+    pd.testing.assert_frame_equal(second["frame"], first["frame"])
+    assert second["frame"]["related_codes"].tolist() == [[], ["111"], ["11", "111"]]
+    assert second["frame"]["defense_categories"][1] == {"space": ["satellite"]}
+    assert second["summary"] == first["summary"]
+    assert sorted(p.suffix for p in tmp_path.iterdir() if p.stem.count(".")) == [".arrow", ".json"]
+
+
+def test_unsupported_outputs_and_legacy_pickles_rerun(tmp_path):
+    calls = []
+    plan = {row["stage"]: row for row in Pipeline(stages(calls), tmp_path).plan()}
+    # a pickle at the memo's old path is never read
+    (tmp_path / f"frame.{plan['frame']['key'][:16]}.pkl").write_bytes(b"not trusted")
+    Pipeline(stages(calls), tmp_path).run()
+    Pipeline(stages(calls), tmp_path).run()
+    assert calls == ["frame", "summary", "opaque", "opaque"]
+    assert not list(tmp_path.glob("*.pkl"))
+
+
+def test_code_hash_covers_helpers_and_constants():
+    closure = "\n".join(_code_closure(frame))
+    assert inspect.getsource(scaled) in closure
+    assert "SCALE = 3" in closure
+    assert Stage("frame", frame).code_hash() != Stage("frame", frame, version=2).code_hash()
@@ -0,0 +1,57 @@
+from datetime import datetime
+import contextlib, io
+
+import pandas as pd
+import pytest
+
+from bench.synthetic import write_workbooks
+from core.naics import NAICSProcessor
+
+
+def test_store_round_trip(built, snapshot, data_dir):
+    original = built.get_snapshot()
+    assert snapshot is not original
+    assert (snapshot.generation, snapshot.timestamp, snapshot.expires_at) == (
+        original.generation,
+        original.timestamp,
+        original.expires_at,
+    )
+    assert snapshot.records.equals(original.records)
+    assert snapshot.codes.to_list() == original.codes.to_list()
+    assert snapshot.by_code[original.codes[0]["code"]] == original.codes[0]
+    assert snapshot.lookups == original.lookups and "naics" not in snapshot.lookups
+    assert snapshot.export_lookups() == original.export_lookups()
+    assert snapshot.cross_references == original.cross_references
+    assert snapshot.referenced_by == original.referenced_by
+    assert snapshot.defense_codes == original.defense_codes
+    assert snapshot.stats == original.stats
+    pd.testing.assert_frame_equal(
+        snapshot.cube.rollup(["sector", "level"], quantiles=[0.5]),
+        original.cube.rollup(["sector", "level"], quantiles=[0.5]),
+    )
+    # the store is the only copy written; the legacy JSON cache is only ever read, to migrate it
+    assert not (data_dir / "naics_lookups.json").exists()
+
+
+def test_manifest_points_at_a_complete_generation(processor, snapshot):
+    manifest = processor.store.read_manifest()
+    assert manifest["generation"] == snapshot.generation
+    for name in manifest["files"]:
+        assert processor.store.path(manifest, name).exists()
+
+
+def test_memoized_refresh_stamps_a_new_processing_time(tmp_path):
+    write_workbooks(tmp_path, scale=0.25, seed=1)
+    processor = NAICSProcessor(tmp_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        first = processor.process_and_cache(download=False)
+        second = processor.process_and_cache(download=False)
+    assert processor.pipeline_stats["lookups"]["action"] == "cached"
+
+    for result in (first, second):
+        processed_at = result["lookups"]["metadata"]["processed_at"]
+        assert datetime.fromisoformat(processed_at).timestamp() == pytest.approx(result["timestamp"], abs=1e-3)
+    snapshot = processor.get_snapshot()
+    assert snapshot.timestamp == second["timestamp"] > first["timestamp"]
+    assert snapshot.last_modified == pytest.approx(second["timestamp"], abs=1e-3)
+    assert snapshot.stats["processed_at"] == second["lookups"]["metadata"]["processed_at"]
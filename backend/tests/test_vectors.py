@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from core.vectors import DenseIndex
+
+
+@pytest.fixture(scope="module")
+def index() -> DenseIndex:
+    """4096 embeddings around 256 loose topic centres, more topics than the index's 64 lists."""
+    rng = np.random.default_rng(0)
+    centres = rng.normal(size=(256, 48))
+    matrix = centres[rng.integers(0, 256, 4096)] + 0.8 * rng.normal(size=(4096, 48))
+    index = DenseIndex(matrix.astype(np.float32), chunk_rows=1000)
+    index.build_ivf()
+    return index
+
+
+@pytest.fixture(scope="module")
+def queries(index: DenseIndex) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    rows = rng.choice(len(index), 200, replace=False)
+    return np.asarray(index.matrix[rows]) + 0.2 * rng.normal(size=(200, index.dim)).astype(np.float32)
+
+
+def recall(approximate, exact) -> float:
+    """Share of the exact top-k rows the approximate search also returned."""
+    hits = sum(len({row for row, _ in a} & {row for row, _ in e}) for a, e in zip(approximate, exact))
+    return hits / sum(len(e) for e in exact)
+
+
+def test_exact_matches_brute_force(index, queries):
+    matrix = np.asarray(index.matrix, dtype=np.float64)
+    sims = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ (
+        matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    ).T
+    expected = -np.sort(-sims, axis=1)[:, :10]
+    results = index.search_exact(queries, limit=10)
+    # float32 vs float64 may swap near-ties, so compare the ranked similarities
+    assert np.allclose([[score for _, score in result] for result in results], expected, atol=1e-5)
+
+
+def test_ivf_recall_against_exact(index, queries):
+    exact = index.search_exact(queries, limit=10)
+    assert recall(index.search_ivf(queries, limit=10, nprobe=8), exact) >= 0.9
+    assert recall(index.search_ivf(queries, limit=10, nprobe=1), exact) < recall(
+        index.search_ivf(queries, limit=10, nprobe=16), exact
+    )
+
+
+def test_probing_every_list_is_exact(index, queries):
+    nlist = len(index.ivf[0])
+    exact = index.search_exact(queries, limit=10)
+    assert recall(index.search_ivf(queries, limit=10, nprobe=nlist), exact) == 1.0
+    # past the list count, nprobe is clamped rather than indexing out of range
+    assert index.search_ivf(queries[:5], limit=10, nprobe=10 * nlist) == index.search_ivf(
+        queries[:5], limit=10, nprobe=nlist
+    )
+
+
+def test_nprobe_must_be_positive(index, queries):
+    with pytest.raises(ValueError):
+        index.search_ivf(queries[:1], nprobe=0)